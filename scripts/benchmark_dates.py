@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark convert_date() and convert_time() against strptime().
+
+Builds a realistic column of collision dates (twenty years of days, with a
+few blank and malformed values) and a column of collision times (including
+the 2500 unknown-time sentinel and non-zero-padded times), then times the
+converters against the strptime() versions they replaced.
+
+Usage:
+    python scripts/benchmark_dates.py [--rows 1000000] [--repeat 3]
+"""
+
+import argparse
+import random
+import timeit
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+from switrs_to_sqlite.converters import convert_date, convert_time
+
+
+def strptime_date(val: str) -> str | None:
+    """Convert a YYYYMMDD date the way convert_date() used to."""
+    sval = val.strip()
+    if len(sval) != 8:
+        return None
+    try:
+        return datetime.strptime(sval, "%Y%m%d").date().isoformat()
+    except ValueError:
+        return None
+
+
+def strptime_time(val: str) -> str | None:
+    """Convert an HHMM time the way convert_time() used to."""
+    sval = val.strip()
+    if not sval or sval == "2500":
+        return None
+    if len(sval) == 3:
+        sval = "0" + sval
+    try:
+        return datetime.strptime(sval, "%H%M").time().isoformat()
+    except ValueError:
+        return None
+
+
+def make_dates(rows: int, rng: random.Random) -> list[str]:
+    """Return collision dates spread over twenty years, with some bad values."""
+    start = date(2001, 1, 1)
+    days = (date(2021, 1, 1) - start).days
+    values = [
+        (start + timedelta(days=rng.randrange(days))).strftime("%Y%m%d")
+        for _ in range(rows)
+    ]
+    for i in rng.sample(range(rows), rows // 1000):
+        values[i] = rng.choice(["", "20200230", "2020011"])
+    return values
+
+
+def make_times(rows: int, rng: random.Random) -> list[str]:
+    """Return collision times, some unknown and some not zero-padded."""
+    values = []
+    for _ in range(rows):
+        hour, minute = rng.randrange(24), rng.randrange(60)
+        if rng.random() < 0.01:
+            values.append("2500")
+        elif hour < 10 and rng.random() < 0.5:
+            values.append(f"{hour}{minute:02d}")
+        else:
+            values.append(f"{hour:02d}{minute:02d}")
+    return values
+
+
+def best_time(
+    func: Callable[[str], str | None], values: list[str], repeat: int
+) -> float:
+    """Return the fastest of repeat runs of func over every value."""
+    return min(
+        timeit.repeat(lambda: [func(v) for v in values], number=1, repeat=repeat)
+    )
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argparser.add_argument("--rows", type=int, default=1_000_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    args = argparser.parse_args()
+
+    rng = random.Random(0)
+    columns = (
+        ("date", make_dates(args.rows, rng), strptime_date, convert_date),
+        ("time", make_times(args.rows, rng), strptime_time, convert_time),
+    )
+
+    print(f"{'column':<8}{'strptime':>16}{'fast path':>16}{'speedup':>10}")
+    for name, values, reference, fast in columns:
+        assert [fast(v) for v in values] == [reference(v) for v in values]
+        slow_time = best_time(reference, values, args.repeat)
+        fast_time = best_time(fast, values, args.repeat)
+        print(
+            f"{name:<8}"
+            f"{args.rows / slow_time:>12,.0f} v/s"
+            f"{args.rows / fast_time:>12,.0f} v/s"
+            f"{slow_time / fast_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark the compiled row parser and columnar engine against a column loop.
+
+CSVParser.resolve_indices() compiles a straight-line parse function for the
+header layout. This script compares it with the interpreted loop it
+replaced, which walks the parsing table and calls each column's converter,
+and with the columnar engine in CSVParser.parse_batch(), for the collision,
+party, and victim tables. The rows in tests/data are repeated to build a
+realistic number of rows per table.
+
+Usage:
+    python scripts/benchmark_parsers.py [--rows 200000] [--repeat 3]
+"""
+
+import argparse
+import csv
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tests"))
+
+from conftest import COLLISION_HEADER, PARTY_HEADER, VICTIM_HEADER  # noqa: E402
+
+from switrs_to_sqlite.datatypes import DATATYPE_MAP  # noqa: E402
+from switrs_to_sqlite.parsers import (  # noqa: E402
+    CSVParser,
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+
+TESTS_DATA_DIR = PROJECT_ROOT / "tests" / "data"
+
+TABLES = (
+    (make_collision_parser, COLLISION_HEADER, "test_collisions.txt"),
+    (make_party_parser, PARTY_HEADER, "test_parties.txt"),
+    (make_victim_parser, VICTIM_HEADER, "test_victims.txt"),
+)
+
+
+def interpreted_parse_row(parser: CSVParser, row: list[str]) -> list[Any]:
+    """Parse a row the way CSVParser did before the parse function was compiled."""
+    extend = (parser._max_index + 1) - len(row)
+    if extend > 0:
+        row = row + [""] * extend
+
+    values: list[Any] = []
+    if not parser.has_primary_column:
+        values.append(None)
+
+    for col, idx in zip(parser.parsing_table, parser._ordered_indices, strict=True):
+        dtype = DATATYPE_MAP[col.sql_type]
+        val = col.converter(row[idx], dtype, col.nulls)
+        if col.mapping is not None:
+            val = col.mapping.get(val, val)
+        values.append(val)
+
+    return values
+
+
+def load_rows(data_file: str, count: int) -> list[list[str]]:
+    """Read the test rows and repeat them until there are count rows."""
+    with (TESTS_DATA_DIR / data_file).open() as f:
+        sample = list(csv.reader(f))
+    repeats = count // len(sample) + 1
+    return (sample * repeats)[:count]
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argparser.add_argument("--rows", type=int, default=200_000)
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--batch-size", type=int, default=100_000)
+    args = argparser.parse_args()
+
+    print(
+        f"{'table':<12}{'interpreted':>14}{'compiled':>14}{'speedup':>10}"
+        f"{'columnar':>14}{'speedup':>10}"
+    )
+    for parser_factory, header, data_file in TABLES:
+        parser = parser_factory()
+        parser.resolve_indices(list(header))
+        rows = load_rows(data_file, args.rows)
+
+        for row in rows:
+            assert parser.parse_row(row) == interpreted_parse_row(parser, row)
+
+        interpreted = min(
+            timeit.repeat(
+                lambda: [interpreted_parse_row(parser, row) for row in rows],  # noqa: B023
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        compiled = min(
+            timeit.repeat(
+                lambda: [parser.parse_row(row) for row in rows],  # noqa: B023
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+
+        batches = [
+            rows[i : i + args.batch_size] for i in range(0, len(rows), args.batch_size)
+        ]
+        columnar = min(
+            timeit.repeat(
+                lambda: [parser.parse_batch(batch) for batch in batches],  # noqa: B023
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+
+        interpreted_rate = args.rows / interpreted
+        compiled_rate = args.rows / compiled
+        columnar_rate = args.rows / columnar
+        print(
+            f"{parser.table_name:<12}"
+            f"{interpreted_rate:>10,.0f} r/s"
+            f"{compiled_rate:>10,.0f} r/s"
+            f"{interpreted / compiled:>9.2f}x"
+            f"{columnar_rate:>10,.0f} r/s"
+            f"{interpreted / columnar:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
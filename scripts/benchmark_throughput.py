@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Measure conversion throughput, stage by stage, on synthetic SWITRS data.
+
+For each size, synthetic collision, party, and victim files are generated
+with switrs_to_sqlite.synthetic, then each table is read in blocks of rows
+and every stage of the conversion is timed on its own:
+
+    read       decompressing (or just reading) the raw bytes of the file
+    csv        decoding the text and splitting it into rows with csv.reader
+    parse_row  converting each row with the compiled CSVParser.parse_row()
+    insert     inserting each block into SQLite in one transaction
+
+The csv stage also pays for reading the file, so the read stage shows how
+much of it is decompression. The default sizes are 1, 10, and 50 million
+collisions; the larger sizes need tens of gigabytes of free disk space.
+
+Usage:
+    python scripts/benchmark_throughput.py [--rows 1000000 ...] [--gzip]
+"""
+
+import argparse
+import contextlib
+import csv
+import gzip
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO
+
+from switrs_to_sqlite.load_profiles import DEFAULT_LOAD_PROFILE, LOAD_PROFILES
+from switrs_to_sqlite.open_record import open_record_file
+from switrs_to_sqlite.parsers import (
+    CSVParser,
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+from switrs_to_sqlite.synthetic import generate_records
+
+STAGES = ("read", "csv", "parse_row", "insert")
+
+_READ_SIZE = 1 << 20
+
+
+@contextlib.contextmanager
+def _timed(times: dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    times[stage] += time.perf_counter() - start
+
+
+def _open_binary(path: Path) -> BinaryIO | gzip.GzipFile:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return path.open("rb")
+
+
+def benchmark_table(
+    parser_factory: Callable[[], CSVParser],
+    path: Path,
+    db_path: Path,
+    block_size: int,
+) -> tuple[int, dict[str, float]]:
+    """Time every stage of converting one file.
+
+    Returns:
+        The number of rows and the seconds spent in each stage.
+    """
+    times = dict.fromkeys(STAGES, 0.0)
+
+    with _timed(times, "read"), _open_binary(path) as raw:
+        while raw.read(_READ_SIZE):
+            pass
+
+    row_parser = parser_factory()
+    rows = 0
+    with (
+        contextlib.closing(sqlite3.connect(db_path)) as con,
+        open_record_file(str(path)) as f,
+    ):
+        for pragma in LOAD_PROFILES[DEFAULT_LOAD_PROFILE].pragmas():
+            con.execute(pragma)
+        con.execute(row_parser.create_table_statement())
+        insert_sql = row_parser.insert_statement()
+
+        reader = csv.reader(f)
+        row_parser.resolve_indices(next(reader))
+        while True:
+            with _timed(times, "csv"):
+                block = list(islice(reader, block_size))
+            if not block:
+                break
+            with _timed(times, "parse_row"):
+                parsed = [row_parser.parse_row(row) for row in block]
+            with _timed(times, "insert"):
+                con.execute("BEGIN")
+                con.executemany(insert_sql, parsed)
+                con.commit()
+            rows += len(block)
+
+    return rows, times
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argparser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[1_000_000, 10_000_000, 50_000_000],
+        help="numbers of collisions to generate",
+    )
+    argparser.add_argument("--gzip", action="store_true", help="gzip the inputs")
+    argparser.add_argument("--block-size", type=int, default=100_000)
+    argparser.add_argument("--seed", type=int, default=0)
+    argparser.add_argument(
+        "--work-dir", help="directory for the generated files (default: a temp dir)"
+    )
+    args = argparser.parse_args()
+
+    print(
+        f"{'collisions':>12}{'table':>12}{'rows':>14}{'MB':>9}"
+        + "".join(f"{stage:>14}" for stage in STAGES)
+    )
+    for size in args.rows:
+        with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp_dir:
+            files = generate_records(tmp_dir, size, seed=args.seed, compress=args.gzip)
+            tables = (
+                (make_collision_parser, files.collision_file),
+                (make_party_parser, files.party_file),
+                (make_victim_parser, files.victim_file),
+            )
+            for parser_factory, path in tables:
+                db_path = Path(tmp_dir) / "benchmark.sqlite3"
+                rows, times = benchmark_table(
+                    parser_factory, path, db_path, args.block_size
+                )
+                db_path.unlink()
+                megabytes = path.stat().st_size / 1e6
+                rates = "".join(
+                    f"{rows / seconds if seconds else 0:>10,.0f} r/s"
+                    for seconds in times.values()
+                )
+                print(
+                    f"{size:>12,}{path.name.split('Records')[0]:>12}"
+                    f"{rows:>14,}{megabytes:>9,.1f}{rates}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Write synthetic SWITRS collision, party, and victim record files.
+
+The files have the same headers and linked case IDs as the real CHP
+exports, and can be converted with switrs_to_sqlite. See
+switrs_to_sqlite.synthetic for how the values are chosen.
+
+Usage:
+    python scripts/generate_synthetic.py OUTPUT_DIR [--collisions 1000000] [--gzip]
+"""
+
+import argparse
+from pathlib import Path
+
+from switrs_to_sqlite.synthetic import generate_records
+
+
+def main() -> None:
+    argparser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argparser.add_argument("output_dir", help="directory to write the files to")
+    argparser.add_argument("--collisions", type=int, default=1_000_000)
+    argparser.add_argument("--seed", type=int, default=0)
+    argparser.add_argument("--gzip", action="store_true", help="gzip the files")
+    args = argparser.parse_args()
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    files = generate_records(
+        args.output_dir, args.collisions, seed=args.seed, compress=args.gzip
+    )
+    for path, rows in (
+        (files.collision_file, files.collisions),
+        (files.party_file, files.parties),
+        (files.victim_file, files.victims),
+    ):
+        print(f"{path}: {rows:,} rows")
+
+
+if __name__ == "__main__":
+    main()
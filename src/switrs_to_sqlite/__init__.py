@@ -1,5 +1,6 @@
 __version__: str = "5.0.0"
 
 from switrs_to_sqlite.main import convert_files
+from switrs_to_sqlite.merge import merge_databases
 
-__all__ = ["__version__", "convert_files"]
+__all__ = ["__version__", "convert_files", "merge_databases"]
@@ -0,0 +1,109 @@
+"""Write the converted tables to Arrow IPC files, also known as Feather files.
+
+Each table is written to its own file as its rows are parsed, one record
+batch per batch of rows, with the column types of arrow_tables. The files
+are not compressed, so pandas, Polars, or pyarrow can memory-map them and
+read the columns in place, without parsing or copying them.
+
+An Arrow IPC file holds a single dictionary for each dictionary-encoded
+column, which later batches may only add values to. Each mapped column is
+therefore encoded by a DictionaryEncoder whose dictionary grows as new
+descriptions are seen, and every batch stores only the values it adds.
+"""
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from switrs_to_sqlite.arrow_tables import (
+    DICTIONARY,
+    DictionaryEncoder,
+    arrow_schema,
+    column_types,
+    first_cases,
+    record_batch,
+    require_pyarrow,
+)
+from switrs_to_sqlite.index_plan import IndexSpec
+from switrs_to_sqlite.parsers import CSVParser
+
+
+class ArrowTableWriter:
+    """Writes one table to an Arrow IPC file, a record batch per batch.
+
+    As in SQLite, only the first collision of each case_id is kept, and
+    parties and victims are numbered from 1 in input order.
+
+    Args:
+        row_parser: The parser the table's rows come from.
+        path: The Arrow IPC file to write.
+
+    Attributes:
+        duplicates: The number of collisions dropped so far.
+    """
+
+    def __init__(self, row_parser: CSVParser, path: Path) -> None:
+        pa = require_pyarrow("Arrow")
+        self._schema = arrow_schema(row_parser)
+        self._encoders = {
+            i: DictionaryEncoder()
+            for i, (_, type_name) in enumerate(column_types(row_parser))
+            if type_name == DICTIONARY
+        }
+        # The case_ids seen so far, for collisions
+        self._cases: set[Any] | None = set() if row_parser.has_primary_column else None
+        self._next_id = None if row_parser.has_primary_column else 1
+        self.duplicates = 0
+        self._file = pa.OSFile(str(path), "wb")
+        self._writer = pa.ipc.new_file(
+            self._file,
+            self._schema,
+            options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Convert a batch of parsed rows and append it to the file."""
+        if self._cases is not None:
+            first_rows = first_cases(rows, self._cases)
+            self.duplicates += len(rows) - len(first_rows)
+            rows = first_rows
+        if not rows:
+            return
+        self._writer.write_batch(
+            record_batch(self._schema, rows, self._next_id, self._encoders)
+        )
+        if self._next_id is not None:
+            self._next_id += len(rows)
+
+    def close(self) -> None:
+        """Write the footer that lets readers find the batches, and close."""
+        self._writer.close()
+        self._file.close()
+
+
+class ArrowSink:
+    """Writes each table to an Arrow IPC file in a new directory.
+
+    Args:
+        directory: The directory to create, which must not exist.
+
+    Raises:
+        ValueError: If pyarrow is not installed.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        require_pyarrow("Arrow")
+        directory.mkdir()
+        self._directory = directory
+
+    def open_table(self, row_parser: CSVParser) -> ArrowTableWriter:
+        """Create the Arrow file of row_parser's table, and return its writer."""
+        path = self._directory / f"{row_parser.table_name}.arrow"
+        return ArrowTableWriter(row_parser, path)
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Do nothing, as Arrow files have no indexes."""
+        return {}
+
+    def close(self) -> None:
+        """Do nothing; each file is closed with its table."""
@@ -0,0 +1,177 @@
+"""Arrow schemas and record batches for the converted tables.
+
+The columnar outputs type each column the way the SQLite output does, from
+its SQL type through DATATYPE_MAP, with two refinements: columns whose
+converter returns a bool are stored as booleans rather than 0 and 1, and
+columns mapped through value_maps, which hold few distinct descriptions,
+are dictionary-encoded strings.
+
+pyarrow is optional, and only imported when a columnar output is written.
+"""
+
+import functools
+import importlib
+from collections.abc import Mapping, Sequence
+from types import ModuleType
+from typing import Any
+
+from switrs_to_sqlite.converters import (
+    cellphone_use_to_bool,
+    non_standard_str_to_bool,
+    string_to_bool,
+)
+from switrs_to_sqlite.datatypes import DATATYPE_MAP
+from switrs_to_sqlite.parsers import CSVParser
+
+# Converters that return True or False, which SQLite stores as 1 or 0
+BOOL_CONVERTERS = frozenset(
+    {string_to_bool, cellphone_use_to_bool, non_standard_str_to_bool}
+)
+
+# The pyarrow name of the type of each Python type in DATATYPE_MAP
+_ARROW_TYPE_NAMES: dict[type[int] | type[float] | type[str] | None, str] = {
+    int: "int64",
+    float: "double",
+    str: "string",
+    None: "null",
+}
+
+# Strings stored as indices into a dictionary of the distinct values
+DICTIONARY = "dictionary"
+
+
+@functools.cache
+def arrow_backend() -> ModuleType | None:
+    """Return the pyarrow module, or None if it is not installed."""
+    try:
+        return importlib.import_module("pyarrow")
+    except ImportError:
+        return None
+
+
+def require_pyarrow(output: str) -> ModuleType:
+    """Return the pyarrow module, which writing output needs.
+
+    Raises:
+        ValueError: If pyarrow is not installed.
+    """
+    pa = arrow_backend()
+    if pa is None:
+        raise ValueError(f"{output} output needs the pyarrow package")
+    return pa
+
+
+def column_types(row_parser: CSVParser) -> list[tuple[str, str]]:
+    """Return the name and Arrow type of each column of a table.
+
+    Types are named as pyarrow names them, except for DICTIONARY, which is
+    a dictionary of strings with int32 indices.
+    """
+    types = []
+    if not row_parser.has_primary_column:
+        # The id column numbered by SQLite, which parse_row() leaves as None
+        types.append((row_parser.columns[0][0], "int64"))
+    for col in row_parser.parsing_table:
+        if col.mapping is not None:
+            type_name = DICTIONARY
+        elif col.converter in BOOL_CONVERTERS:
+            type_name = "bool"
+        else:
+            type_name = _ARROW_TYPE_NAMES[DATATYPE_MAP[col.sql_type]]
+        types.append((col.name, type_name))
+    return types
+
+
+def arrow_schema(row_parser: CSVParser) -> Any:
+    """Return the Arrow schema of a table, with the types of column_types()."""
+    pa = require_pyarrow("Arrow")
+    types = {
+        "int64": pa.int64(),
+        "double": pa.float64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "null": pa.null(),
+        DICTIONARY: pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema(
+        [(name, types[type_name]) for name, type_name in column_types(row_parser)]
+    )
+
+
+def first_cases(rows: Sequence[Sequence[Any]], cases: set[Any]) -> list[Sequence[Any]]:
+    """Return the collisions whose case_id is not in cases, adding it.
+
+    The case_id is the first column. As in SQLite, only the first row of
+    each case is kept, even within rows.
+    """
+    first_rows = []
+    for row in rows:
+        if row[0] not in cases:
+            cases.add(row[0])
+            first_rows.append(row)
+    return first_rows
+
+
+class DictionaryEncoder:
+    """Encodes the strings of one column as indices into a growing dictionary.
+
+    Values are numbered in the order they are first seen, so the dictionary
+    after each batch starts with the dictionary of every batch before it,
+    which lets an Arrow IPC file store only the values each batch adds.
+
+    Attributes:
+        values: The distinct values seen so far, in index order.
+    """
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._indices: dict[str, int] = {}
+
+    def encode(self, column: Sequence[str | None]) -> list[int | None]:
+        """Return the index of each value, adding new values to the end."""
+        indices = self._indices
+        encoded: list[int | None] = []
+        for value in column:
+            if value is None:
+                encoded.append(None)
+                continue
+            index = indices.get(value)
+            if index is None:
+                index = indices[value] = len(self.values)
+                self.values.append(value)
+            encoded.append(index)
+        return encoded
+
+
+def record_batch(
+    schema: Any,
+    rows: Sequence[Sequence[Any]],
+    first_id: int | None = None,
+    encoders: Mapping[int, DictionaryEncoder] | None = None,
+) -> Any:
+    """Convert parsed rows to an Arrow record batch with the given schema.
+
+    Args:
+        schema: The schema of the table, from arrow_schema().
+        rows: Rows returned by CSVParser.parse_row() or parse_batch().
+        first_id: If given, fill the first column with consecutive ids from
+            first_id, where SQLite would number the rows.
+        encoders: The encoder of each dictionary column, by position. A
+            column with an encoder gets its whole dictionary so far; the
+            others get a dictionary of the values in this batch alone.
+    """
+    pa = require_pyarrow("Arrow")
+    columns: list[Sequence[Any]] = list(zip(*rows, strict=True)) or [()] * len(schema)
+    if first_id is not None:
+        columns[0] = range(first_id, first_id + len(rows))
+    encoders = encoders or {}
+    arrays = []
+    for i, (values, field) in enumerate(zip(columns, schema, strict=True)):
+        encoder = encoders.get(i)
+        if encoder is None:
+            arrays.append(pa.array(values, type=field.type))
+        else:
+            indices = pa.array(encoder.encode(values), type=pa.int32())
+            dictionary = pa.array(encoder.values, type=pa.string())
+            arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+    return pa.record_batch(arrays, schema=schema)
@@ -0,0 +1,145 @@
+"""Checkpoints that let an interrupted conversion be resumed with --resume.
+
+While a database is built, a table in it records how far each table has
+got: the input file it is loaded from, how many rows of that file are
+committed, and how far into the file the reader was when they were. Each
+update is made in the same transaction as the rows it counts, so the
+checkpoint never claims rows that were lost. The table is dropped once the
+conversion is complete.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+CHECKPOINT_TABLE = "conversion_checkpoints"
+
+
+@dataclass(frozen=True)
+class InputIdentity:
+    """Identifies the version of an input file a table was loaded from.
+
+    Attributes:
+        file_name: The absolute path of the file.
+        size: The size of the file in bytes.
+        mtime_ns: The time the file was last modified, in nanoseconds.
+    """
+
+    file_name: str
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def of(cls, file_name: str) -> "InputIdentity":
+        """Return the identity of a file as it is now."""
+        path = Path(file_name).resolve()
+        stat = path.stat()
+        return cls(str(path), stat.st_size, stat.st_mtime_ns)
+
+    def same_file(self, other: "InputIdentity") -> bool:
+        """Whether other is the same version of the file.
+
+        Files are compared by size and modification time only, so the
+        inputs may be moved between a failed run and its resumption.
+        """
+        return (self.size, self.mtime_ns) == (other.size, other.mtime_ns)
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """How far the loading of one table got.
+
+    Attributes:
+        table: The name of the table.
+        source: The input file the table is loaded from.
+        rows: The number of rows of the input file that are committed.
+        input_offset: How far into the input file on disk the reader was
+            when the rows were committed. Rows are read ahead of being
+            committed, so this is past the end of the last committed row.
+        done: Whether the table is completely loaded.
+    """
+
+    table: str
+    source: InputIdentity
+    rows: int
+    input_offset: int
+    done: bool
+
+
+def create_checkpoint_table(con: sqlite3.Connection) -> None:
+    """Create the checkpoint table in a new database.
+
+    It has no rowid, so that it fits in a single page, the only one left
+    free once it is dropped.
+    """
+    con.execute(
+        f"CREATE TABLE {CHECKPOINT_TABLE} ("
+        "table_name TEXT PRIMARY KEY, "
+        "input_file TEXT NOT NULL, "
+        "input_size INTEGER NOT NULL, "
+        "input_mtime_ns INTEGER NOT NULL, "
+        "rows INTEGER NOT NULL, "
+        "input_offset INTEGER NOT NULL, "
+        "done INTEGER NOT NULL) WITHOUT ROWID"
+    )
+
+
+def read_checkpoints(con: sqlite3.Connection) -> dict[str, Checkpoint] | None:
+    """Return the checkpoint of every table started so far, keyed by table.
+
+    Returns:
+        The checkpoints, or None if the database has no checkpoint table.
+    """
+    found = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (CHECKPOINT_TABLE,),
+    ).fetchone()
+    if found is None:
+        return None
+    return {
+        row[0]: Checkpoint(
+            table=row[0],
+            source=InputIdentity(row[1], row[2], row[3]),
+            rows=row[4],
+            input_offset=row[5],
+            done=bool(row[6]),
+        )
+        for row in con.execute(
+            "SELECT table_name, input_file, input_size, input_mtime_ns, rows, "
+            f"input_offset, done FROM {CHECKPOINT_TABLE}"
+        )
+    }
+
+
+def start_table(con: sqlite3.Connection, table: str, source: InputIdentity) -> None:
+    """Record that a table is being loaded from scratch from source."""
+    con.execute(
+        f"INSERT OR REPLACE INTO {CHECKPOINT_TABLE} VALUES (?, ?, ?, ?, 0, 0, 0)",
+        (table, source.file_name, source.size, source.mtime_ns),
+    )
+
+
+def record_progress(
+    con: sqlite3.Connection, table: str, rows: int, input_offset: int
+) -> None:
+    """Record the rows committed so far, inside their transaction."""
+    con.execute(
+        f"UPDATE {CHECKPOINT_TABLE} SET rows = ?, input_offset = ? "
+        "WHERE table_name = ?",
+        (rows, input_offset, table),
+    )
+
+
+def finish_table(con: sqlite3.Connection, table: str, rows: int) -> None:
+    """Record that every row of a table is loaded."""
+    con.execute(
+        f"UPDATE {CHECKPOINT_TABLE} SET rows = ?, input_offset = input_size, "
+        "done = 1 WHERE table_name = ?",
+        (rows, table),
+    )
+
+
+def drop_checkpoint_table(con: sqlite3.Connection) -> None:
+    """Remove the checkpoint table once the conversion is complete."""
+    con.execute(f"DROP TABLE {CHECKPOINT_TABLE}")
+    con.commit()
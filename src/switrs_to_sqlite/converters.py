@@ -1,8 +1,23 @@
 """Converter functions for transforming CSV values to database values."""
 
+import calendar
 from collections.abc import Collection
 from datetime import datetime
 
+# Every valid "MMDD" in a leap year. Only "0229" also depends on the year.
+_VALID_MONTH_DAYS: frozenset[str] = frozenset(
+    f"{month:02d}{day:02d}"
+    for month in range(1, 13)
+    for day in range(1, calendar.monthrange(2000, month)[1] + 1)
+)
+
+# Every valid "HHMM" time mapped to its ISO 8601 form "HH:MM:SS"
+_ISO_TIMES: dict[str, str] = {
+    f"{hour:02d}{minute:02d}": f"{hour:02d}:{minute:02d}:00"
+    for hour in range(24)
+    for minute in range(60)
+}
+
 
 def identity(
     val: str,
@@ -208,12 +223,25 @@ def convert_date(
     dtype: type[int] | type[float] | type[str] | None = None,
     nulls: Collection[str] | None = None,
 ) -> str | None:
-    """Convert a YYYYMMDD date string to ISO 8601 format (YYYY-MM-DD)."""
+    """Convert a YYYYMMDD date string to ISO 8601 format (YYYY-MM-DD).
+
+    Plain eight-digit strings are validated and formatted directly, which is
+    much faster than strptime(). Anything else falls back to strptime() so
+    that unusual input is handled exactly as before.
+    """
     sval = val.strip()
     if nulls is not None and sval in nulls:
         return None
     if len(sval) != 8:
         return None
+    if sval.isascii() and sval.isdigit():
+        year = sval[:4]
+        month_day = sval[4:]
+        if month_day not in _VALID_MONTH_DAYS or year == "0000":
+            return None
+        if month_day == "0229" and not calendar.isleap(int(year)):
+            return None
+        return f"{year}-{sval[4:6]}-{sval[6:]}"
     try:
         return datetime.strptime(sval, "%Y%m%d").date().isoformat()
     except ValueError:
@@ -225,7 +253,12 @@ def convert_time(
     dtype: type[int] | type[float] | type[str] | None = None,
     nulls: Collection[str] | None = None,
 ) -> str | None:
-    """Convert an HHMM time string to ISO 8601 format (HH:MM:SS)."""
+    """Convert an HHMM time string to ISO 8601 format (HH:MM:SS).
+
+    Valid four-digit times are looked up in a precomputed table instead of
+    calling strptime(). Anything else falls back to strptime() so that
+    unusual input is handled exactly as before.
+    """
     sval = val.strip()
     if nulls is not None and sval in nulls:
         return None
@@ -234,6 +267,12 @@ def convert_time(
     # Source data is not always zero-padded (e.g. "900" instead of "0900")
     if len(sval) == 3:
         sval = "0" + sval
+    iso_time = _ISO_TIMES.get(sval)
+    if iso_time is not None:
+        return iso_time
+    # A four-digit time can only be split as HHMM, so it is simply invalid
+    if len(sval) == 4 and sval.isascii() and sval.isdigit():
+        return None
     try:
         return datetime.strptime(sval, "%H%M").time().isoformat()
     except ValueError:
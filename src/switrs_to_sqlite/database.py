@@ -0,0 +1,57 @@
+"""Helpers for the SQLite databases written by switrs_to_sqlite."""
+
+import sqlite3
+
+from switrs_to_sqlite.load_profiles import LoadProfile
+from switrs_to_sqlite.parsers import (
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+
+
+def configure_connection(con: sqlite3.Connection, profile: LoadProfile) -> None:
+    """Set the pragmas used for bulk loading a fresh database."""
+    for pragma in profile.pragmas():
+        con.execute(pragma)
+
+
+def table_columns() -> dict[str, list[str]]:
+    """Return the output column names of each table, keyed by table name."""
+    tables = {}
+    for parser_factory in (
+        make_collision_parser,
+        make_party_parser,
+        make_victim_parser,
+    ):
+        row_parser = parser_factory()
+        tables[row_parser.table_name] = [col[0] for col in row_parser.columns]
+    return tables
+
+
+def check_tables(con: sqlite3.Connection, file_name: str, schema: str = "main") -> None:
+    """Check that an existing database has the tables this version writes.
+
+    Args:
+        con: The connection the database is open or attached on.
+        file_name: The name of the database file, for error messages.
+        schema: The name the database is attached as.
+
+    Raises:
+        ValueError: If the file is not a SQLite database, or a table is
+            missing or has different columns.
+    """
+    for table, columns in table_columns().items():
+        try:
+            existing = [
+                row[1] for row in con.execute(f"PRAGMA {schema}.table_info({table})")
+            ]
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"'{file_name}' is not a SQLite database: {e}") from None
+        if not existing:
+            raise ValueError(f"'{file_name}' has no {table} table")
+        if existing != columns:
+            raise ValueError(
+                f"The {table} table in '{file_name}' has different columns "
+                "than this version writes; rebuild it with this version"
+            )
@@ -0,0 +1,144 @@
+"""Load the converted tables into a DuckDB database instead of SQLite.
+
+DuckDB stores each column on its own, so the wide GROUP BY scans of
+dashboards read far less than they do from SQLite's rows. The tables are
+created from the same CSVParser schema as the SQLite ones, with INTEGER and
+REAL widened to DuckDB's 64-bit BIGINT and DOUBLE, as SQLite stores them.
+
+Each batch of parsed rows is converted to an Arrow record batch and loaded
+by one INSERT that scans it, the bulk path DuckDB's appender takes for a
+DataFrame, rather than a statement per row. duckdb and pyarrow are
+optional, and only imported when this output is written.
+"""
+
+import functools
+import importlib
+from collections.abc import Sequence
+from types import ModuleType
+from typing import Any
+
+from switrs_to_sqlite.arrow_tables import arrow_schema, record_batch, require_pyarrow
+from switrs_to_sqlite.index_plan import IndexSpec, build_indexes
+from switrs_to_sqlite.parsers import CSVParser
+
+# DuckDB's INTEGER and REAL are only 32 bits wide
+DUCKDB_TYPES = {"INTEGER": "BIGINT", "REAL": "DOUBLE"}
+
+# The oldest DuckDB that can add a primary key to a loaded table
+_MIN_DUCKDB_VERSION = (1, 2)
+
+# The name each record batch is registered under while it is inserted
+_BATCH_VIEW = "parsed_batch"
+
+
+@functools.cache
+def duckdb_backend() -> ModuleType | None:
+    """Return the duckdb module, or None if it is not installed."""
+    try:
+        return importlib.import_module("duckdb")
+    except ImportError:
+        return None
+
+
+def require_duckdb() -> ModuleType:
+    """Return the duckdb module, checking pyarrow is installed too.
+
+    Raises:
+        ValueError: If duckdb or pyarrow is not installed, or duckdb is
+            older than 1.2.
+    """
+    duckdb = duckdb_backend()
+    if duckdb is None:
+        raise ValueError("DuckDB output needs the duckdb package")
+    version = tuple(int(part) for part in duckdb.__version__.split(".")[:2])
+    if version < _MIN_DUCKDB_VERSION:
+        raise ValueError(
+            f"DuckDB output needs duckdb 1.2 or later, found {duckdb.__version__}"
+        )
+    require_pyarrow("DuckDB")
+    return duckdb
+
+
+def connect_duckdb(file_name: str) -> Any:
+    """Open or create a DuckDB database file; see require_duckdb()."""
+    return require_duckdb().connect(file_name)
+
+
+class DuckDBTableWriter:
+    """Creates one table in a DuckDB database and loads batches of rows.
+
+    The table is created without its primary key, which DuckDB would check
+    against an index for every row inserted, and the key is added once
+    every row is loaded. As in SQLite, only the first row of each case_id
+    is kept, and parties and victims are numbered in input order.
+
+    Args:
+        con: The DuckDB connection.
+        row_parser: The parser the table's rows come from.
+
+    Attributes:
+        duplicates: The number of rows dropped for repeating a case_id,
+            known once the writer is closed.
+    """
+
+    def __init__(self, con: Any, row_parser: CSVParser) -> None:
+        self._con = con
+        self._table = row_parser.table_name
+        self._key = row_parser.columns[0][0]
+        self._schema = arrow_schema(row_parser)
+        self._keyed = row_parser.has_primary_column
+        self._next_id = None if self._keyed else 1
+        self.duplicates = 0
+        con.execute(
+            row_parser.create_table_statement(primary_key=False, types=DUCKDB_TYPES)
+        )
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Insert a batch of parsed rows in one statement."""
+        batch = record_batch(self._schema, rows, self._next_id)
+        if self._next_id is not None:
+            self._next_id += len(rows)
+        self._con.register(_BATCH_VIEW, batch)
+        try:
+            self._con.execute(f"INSERT INTO {self._table} SELECT * FROM {_BATCH_VIEW}")
+        finally:
+            self._con.unregister(_BATCH_VIEW)
+
+    def close(self) -> None:
+        """Drop all but the first row of each case_id, then add the key."""
+        table = self._table
+        key = self._key
+        if self._keyed:
+            # Rows are numbered in the order they were inserted
+            deleted = self._con.execute(
+                f"DELETE FROM {table} WHERE rowid NOT IN "
+                f"(SELECT min(rowid) FROM {table} GROUP BY {key})"
+            )
+            self.duplicates = deleted.fetchone()[0]
+        self._con.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({key})")
+
+
+class DuckDBSink:
+    """Loads the tables into a new DuckDB database.
+
+    Args:
+        file_name: The database file to create.
+
+    Raises:
+        ValueError: If duckdb or pyarrow is not installed.
+    """
+
+    def __init__(self, file_name: str) -> None:
+        self._con = connect_duckdb(file_name)
+
+    def open_table(self, row_parser: CSVParser) -> DuckDBTableWriter:
+        """Create the table of row_parser, and return its writer."""
+        return DuckDBTableWriter(self._con, row_parser)
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Build the indexes in the plan; see build_indexes()."""
+        return build_indexes(self._con, plan)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._con.close()
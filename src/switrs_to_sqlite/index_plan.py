@@ -0,0 +1,161 @@
+"""Declarative plan of the indexes built after the tables are loaded."""
+
+import json
+import sqlite3
+import sys
+import time
+from collections.abc import Collection, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Definition of a single index on one table.
+
+    Attributes:
+        name: The name of the index in the database.
+        table: The table the index is built on.
+        columns: The indexed columns, in order.
+        unique: Whether to create a UNIQUE index.
+    """
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    unique: bool = False
+
+    def create_statement(self) -> str:
+        """Return the CREATE INDEX statement for this index."""
+        unique = "UNIQUE " if self.unique else ""
+        cols = ", ".join(self.columns)
+        return f"CREATE {unique}INDEX {self.name} ON {self.table} ({cols})"
+
+
+DEFAULT_INDEX_PLAN: tuple[IndexSpec, ...] = (
+    IndexSpec(name="idx_parties_case_id", table="parties", columns=("case_id",)),
+    IndexSpec(name="idx_victims_case_id", table="victims", columns=("case_id",)),
+)
+
+
+def load_index_plan(file_name: str) -> list[IndexSpec]:
+    """Read extra indexes from a JSON file.
+
+    The file holds a list of objects with "name", "table", "columns", and
+    optionally "unique", for example:
+
+        [
+            {"name": "idx_collisions_date", "table": "collisions",
+             "columns": ["collision_date"]},
+            {"name": "idx_parties_case_party", "table": "parties",
+             "columns": ["case_id", "party_number"], "unique": true}
+        ]
+
+    Args:
+        file_name: The path of the JSON file.
+
+    Returns:
+        The indexes defined in the file.
+
+    Raises:
+        ValueError: If the file is not a list of valid index definitions.
+    """
+    with Path(file_name).open() as f:
+        try:
+            entries = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"'{file_name}' is not valid JSON: {e}") from None
+
+    if not isinstance(entries, list):
+        raise ValueError(f"'{file_name}' must contain a list of indexes")
+
+    plan = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Index definition must be an object, got {entry!r}")
+        unknown = set(entry) - {"name", "table", "columns", "unique"}
+        if unknown:
+            raise ValueError(f"Unknown index keys {sorted(unknown)} in {entry!r}")
+        try:
+            name, table, columns = entry["name"], entry["table"], entry["columns"]
+        except KeyError as e:
+            raise ValueError(f"Index definition {entry!r} is missing {e}") from None
+        if isinstance(columns, str) or not isinstance(columns, list):
+            raise ValueError(f"Index '{name}' columns must be a list of names")
+        plan.append(
+            IndexSpec(
+                name=name,
+                table=table,
+                columns=tuple(columns),
+                unique=bool(entry.get("unique", False)),
+            )
+        )
+    return plan
+
+
+def validate_index_plan(
+    plan: Sequence[IndexSpec], tables: Mapping[str, Collection[str]]
+) -> None:
+    """Check that every index names existing tables and columns.
+
+    Args:
+        plan: The indexes to check.
+        tables: The column names of each table in the database.
+
+    Raises:
+        ValueError: If an index is invalid, or two indexes share a name.
+    """
+    seen: set[str] = set()
+    for spec in plan:
+        if not spec.name.isidentifier():
+            raise ValueError(f"Invalid index name '{spec.name}'")
+        if spec.name in seen:
+            raise ValueError(f"Duplicate index name '{spec.name}'")
+        seen.add(spec.name)
+        if spec.table not in tables:
+            raise ValueError(f"Index '{spec.name}' is on unknown table '{spec.table}'")
+        if not spec.columns:
+            raise ValueError(f"Index '{spec.name}' has no columns")
+        for column in spec.columns:
+            if column not in tables[spec.table]:
+                raise ValueError(
+                    f"Index '{spec.name}' uses unknown column '{spec.table}.{column}'"
+                )
+
+
+def order_index_plan(
+    plan: Sequence[IndexSpec], table_order: Sequence[str]
+) -> list[IndexSpec]:
+    """Order indexes so that each table is scanned while its pages are hot.
+
+    Indexes are grouped by table, in the order the tables were loaded, and
+    within a table sorted by their columns so that indexes sharing leading
+    columns are built one after another.
+    """
+    position = {table: i for i, table in enumerate(table_order)}
+    return sorted(
+        plan, key=lambda spec: (position.get(spec.table, len(position)), spec.columns)
+    )
+
+
+def build_indexes(
+    con: sqlite3.Connection, plan: Sequence[IndexSpec]
+) -> dict[str, float]:
+    """Create each index in the plan, printing how long each one took.
+
+    A DuckDB connection, which takes the same statements, works too.
+
+    Returns:
+        The seconds spent building each index, keyed by index name.
+    """
+    if not plan:
+        return {}
+    print("Building indexes...", file=sys.stderr)
+    seconds = {}
+    for spec in plan:
+        start = time.perf_counter()
+        con.execute(spec.create_statement())
+        con.commit()
+        seconds[spec.name] = time.perf_counter() - start
+        print(f"  {spec.name}: {seconds[spec.name]:,.1f}s", file=sys.stderr)
+    return seconds
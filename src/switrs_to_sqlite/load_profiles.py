@@ -0,0 +1,104 @@
+"""Named SQLite settings for bulk loading the database."""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    """SQLite settings used while loading the database.
+
+    Attributes:
+        name: The name used to select the profile on the command line.
+        page_size: The database page size in bytes.
+        journal_mode: The rollback journal mode (OFF, WAL, DELETE, ...).
+        synchronous: How often SQLite waits for data to reach the disk.
+        locking_mode: NORMAL or EXCLUSIVE. An exclusive lock lets SQLite
+            skip re-reading the schema and locks between transactions.
+        temp_store: Where temporary tables and indexes (such as the sorter
+            used when building an index) are kept: DEFAULT, FILE, or MEMORY.
+        cache_size: The page cache size. Negative values are in KiB.
+        mmap_size: The most bytes of the database to memory map.
+        batch_size: The number of rows inserted per transaction.
+    """
+
+    name: str
+    page_size: int
+    journal_mode: str
+    synchronous: str
+    locking_mode: str
+    temp_store: str
+    cache_size: int
+    mmap_size: int
+    batch_size: int
+
+    def pragmas(self) -> list[str]:
+        """Return the PRAGMA statements for this profile, in a safe order.
+
+        The page size must be set before anything is written to the database,
+        and before the journal mode is switched to WAL.
+        """
+        return [
+            f"PRAGMA page_size = {self.page_size}",
+            f"PRAGMA journal_mode = {self.journal_mode}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA locking_mode = {self.locking_mode}",
+            f"PRAGMA temp_store = {self.temp_store}",
+            f"PRAGMA cache_size = {self.cache_size}",
+            f"PRAGMA mmap_size = {self.mmap_size}",
+        ]
+
+    def describe(self) -> str:
+        """Return a one-line summary of the profile's settings."""
+        return (
+            f"{self.name}: page_size={self.page_size}, "
+            f"journal_mode={self.journal_mode}, synchronous={self.synchronous}, "
+            f"locking_mode={self.locking_mode}, temp_store={self.temp_store}, "
+            f"cache_size={self.cache_size}, mmap_size={self.mmap_size}, "
+            f"batch_size={self.batch_size:,}"
+        )
+
+
+LOAD_PROFILES: dict[str, LoadProfile] = {
+    # No journal and no syncing: a crash leaves an unusable file, but the
+    # build is simply rerun. Large pages, cache, and memory map for local
+    # NVMe disks.
+    "fast": LoadProfile(
+        name="fast",
+        page_size=16384,
+        journal_mode="OFF",
+        synchronous="OFF",
+        locking_mode="EXCLUSIVE",
+        temp_store="MEMORY",
+        cache_size=-256_000,
+        mmap_size=1 << 30,
+        batch_size=100_000,
+    ),
+    # The same crash behavior as fast, but with a small cache, no memory map,
+    # and temporary data on disk, for hosts that are short on RAM.
+    "low-memory": LoadProfile(
+        name="low-memory",
+        page_size=4096,
+        journal_mode="OFF",
+        synchronous="OFF",
+        locking_mode="EXCLUSIVE",
+        temp_store="FILE",
+        cache_size=-16_000,
+        mmap_size=0,
+        batch_size=10_000,
+    ),
+    # A write-ahead log with syncs, so every committed batch survives a crash.
+    # No memory map, which is unreliable on network filesystems.
+    "safe": LoadProfile(
+        name="safe",
+        page_size=4096,
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        locking_mode="EXCLUSIVE",
+        temp_store="DEFAULT",
+        cache_size=-64_000,
+        mmap_size=0,
+        batch_size=50_000,
+    ),
+}
+
+DEFAULT_LOAD_PROFILE = "fast"
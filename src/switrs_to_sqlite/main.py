@@ -3,45 +3,1094 @@
 import argparse
 import contextlib
 import csv
+import functools
+import itertools
+import multiprocessing
+import queue
 import sqlite3
 import sys
-from collections.abc import Generator, Iterator
+import tempfile
+import time
+from collections import deque
+from collections.abc import Callable, Generator, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from switrs_to_sqlite import __version__
-from switrs_to_sqlite.open_record import open_record_file
+from switrs_to_sqlite.arrow_tables import require_pyarrow
+from switrs_to_sqlite.checkpoints import (
+    Checkpoint,
+    InputIdentity,
+    create_checkpoint_table,
+    drop_checkpoint_table,
+    finish_table,
+    read_checkpoints,
+    record_progress,
+    start_table,
+)
+from switrs_to_sqlite.database import check_tables, configure_connection, table_columns
+from switrs_to_sqlite.duckdb_output import require_duckdb
+from switrs_to_sqlite.index_plan import (
+    DEFAULT_INDEX_PLAN,
+    IndexSpec,
+    build_indexes,
+    load_index_plan,
+    order_index_plan,
+    validate_index_plan,
+)
+from switrs_to_sqlite.load_profiles import (
+    DEFAULT_LOAD_PROFILE,
+    LOAD_PROFILES,
+    LoadProfile,
+)
+from switrs_to_sqlite.memory_estimate import (
+    available_memory,
+    available_space,
+    estimate_database_bytes,
+)
+from switrs_to_sqlite.open_record import (
+    RecordFileError,
+    open_record_file,
+    read_record_range,
+    split_record_file,
+)
+from switrs_to_sqlite.parquet_output import ROW_GROUP_SIZE
 from switrs_to_sqlite.parsers import (
     CSVParser,
     make_collision_parser,
     make_party_parser,
     make_victim_parser,
 )
+from switrs_to_sqlite.profiling import (
+    DEFAULT_SAMPLE_EVERY,
+    ConversionProfile,
+    TableProfile,
+)
+from switrs_to_sqlite.progress import (
+    METRICS_FORMATS,
+    MetricsWriter,
+    ProgressMeter,
+    ProgressSample,
+    QueueWriter,
+    open_metrics_writer,
+)
+from switrs_to_sqlite.sinks import (
+    DEFAULT_OUTPUTS,
+    OUTPUT_FORMATS,
+    PARALLEL_TABLE_FORMATS,
+    Sink,
+    TableWriter,
+    open_sink,
+)
 
 _PROGRESS_INTERVAL = 100_000
 
+# Number of raw CSV rows sent to a worker process in one task
+_CHUNK_SIZE = 10_000
+
+# Bytes of an uncompressed file read and parsed by a worker process in one
+# task with --mmap; about as many rows as _CHUNK_SIZE
+_RANGE_SIZE = 4 << 20
+
+# Number of raw CSV rows converted at once by the columnar engine
+_BATCH_SIZE = 100_000
+
+# How often progress samples from --parallel-tables shards are written
+_SAMPLE_POLL_SECONDS = 0.5
+
+ENGINES = ("row", "columnar")
+
+# Build the database in RAM with build_in
+IN_MEMORY = ":memory:"
+
+# Where the shards of a database built in RAM are written, as each is built
+# in a process of its own; the system's temporary directory if this does not
+# exist
+_SHARED_MEMORY_DIR = Path("/dev/shm")
+
+_T = TypeVar("_T")
+
+# Parser used by each worker process, set up once by _init_worker()
+_worker_parser: CSVParser | None = None
+_worker_columnar = False
+
+
+@dataclass(frozen=True)
+class _LoadOptions:
+    """Settings shared by every table load, including those in shards."""
+
+    profile: LoadProfile = LOAD_PROFILES[DEFAULT_LOAD_PROFILE]
+    parse_errors: str | None = None
+    workers: int = 1
+    engine: str = "row"
+    cache_stats: bool = False
+    defer_unique: bool = False
+    # Time each stage, and the columns of one row in every sample_every;
+    # None turns profiling off
+    sample_every: int | None = None
+    # Where to send machine-readable progress, if anywhere
+    metrics: MetricsWriter | None = None
+    # Have workers read byte ranges of uncompressed files themselves
+    mmap: bool = False
+    # Record each table's progress in the checkpoint table, for --resume
+    checkpoint: bool = False
+
+
+@dataclass
+class _FileRanges:
+    """The byte ranges of records in an uncompressed file, for --mmap.
+
+    Attributes:
+        file_name: The name of the file.
+        ranges: The start and end offset of each range of records.
+        position: The end of the last range parsed so far.
+    """
+
+    file_name: str
+    ranges: list[tuple[int, int]]
+    position: int = 0
+
+    def raw_position(self) -> int:
+        """Return how far into the file the parsed ranges reach."""
+        return self.position
+
+
+def _chunked(items: Iterator[_T], size: int) -> Generator[list[_T], None, None]:
+    """Yield lists of up to size items until the iterator is exhausted."""
+    while chunk := list(itertools.islice(items, size)):
+        yield chunk
+
+
+def _init_worker(
+    parser_factory: Callable[[], CSVParser], header_row: list[str], columnar: bool
+) -> None:
+    """Build the parser for this worker process from the table's header."""
+    global _worker_parser, _worker_columnar
+    _worker_parser = parser_factory()
+    _worker_parser.resolve_indices(header_row)
+    _worker_columnar = columnar
+
+
+def _parse_chunk(rows: list[list[str]]) -> Sequence[Sequence[Any]]:
+    """Parse a chunk of raw CSV rows inside a worker process."""
+    assert _worker_parser is not None
+    if _worker_columnar:
+        return _worker_parser.parse_batch(rows)
+    parse_row = _worker_parser.parse_row
+    return [parse_row(row) for row in rows]
+
+
+def _parse_range(
+    file_name: str, start: int, end: int, errors: str | None
+) -> Sequence[Sequence[Any]]:
+    """Read, split, and parse a range of an uncompressed file in a worker."""
+    assert _worker_parser is not None
+    reader = csv.reader(read_record_range(file_name, start, end, errors))
+    if _worker_columnar:
+        return _worker_parser.parse_batch(list(reader))
+    parse_row = _worker_parser.parse_row
+    return [parse_row(row) for row in reader]
+
+
+def _parse_ranges_in_pool(
+    file_ranges: _FileRanges,
+    executor: ProcessPoolExecutor,
+    options: _LoadOptions,
+) -> Generator[Sequence[Sequence[Any]], None, None]:
+    """Yield parsed ranges of a file from the worker pool in input order.
+
+    Each worker reads its range of the file itself, so only the parsed rows
+    pass between processes. As in _parse_in_pool(), only a few ranges per
+    worker are in flight at once.
+    """
+    pending: deque[tuple[Future[Sequence[Sequence[Any]]], int]] = deque()
+    max_pending = 2 * options.workers
+    for start, end in file_ranges.ranges:
+        future = executor.submit(
+            _parse_range, file_ranges.file_name, start, end, options.parse_errors
+        )
+        pending.append((future, end))
+        if len(pending) >= max_pending:
+            future, file_ranges.position = pending.popleft()
+            yield future.result()
+    while pending:
+        future, file_ranges.position = pending.popleft()
+        yield future.result()
 
-class _RowCounter:
-    __slots__ = ("count",)
 
-    def __init__(self) -> None:
-        self.count = 0
+def _parse_in_pool(
+    reader: Iterator[list[str]],
+    executor: ProcessPoolExecutor,
+    workers: int,
+) -> Generator[Sequence[Sequence[Any]], None, None]:
+    """Yield parsed chunks from the worker pool in input order.
+
+    Only a few chunks per worker are in flight at once, so memory stays
+    bounded no matter how large the input file is.
+    """
+    pending: deque[Future[Sequence[Sequence[Any]]]] = deque()
+    max_pending = 2 * workers
+    for chunk in _chunked(reader, _CHUNK_SIZE):
+        pending.append(executor.submit(_parse_chunk, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 
 def _parsed_rows(
     reader: Iterator[list[str]],
     row_parser: CSVParser,
-    counter: _RowCounter,
-) -> Generator[list[Any], None, None]:
-    """Yield parsed rows while printing progress to stderr."""
+    meter: ProgressMeter,
+    options: _LoadOptions,
+    executor: ProcessPoolExecutor | None = None,
+    file_ranges: _FileRanges | None = None,
+) -> Generator[Sequence[Any], None, None]:
+    """Yield parsed rows while printing progress to stderr.
+
+    If an executor is given, rows are parsed in chunks by its worker
+    processes instead of in this process; if file_ranges are given too,
+    the workers read the rows from those ranges of the file rather than
+    from reader. With the columnar engine, rows are converted in large
+    batches by CSVParser.parse_batch(). Rows are yielded in input order
+    either way.
+    """
     table = row_parser.table_name
     print(f"Converting {table}...", file=sys.stderr)
-    for row in reader:
-        counter.count += 1
-        if counter.count % _PROGRESS_INTERVAL == 0:
-            print(f"  {counter.count:,} rows", file=sys.stderr, flush=True)
-        yield row_parser.parse_row(row)
-    print(f"  {table}: {counter.count:,} rows total", file=sys.stderr)
+    if executor is None and options.engine == "row":
+        for row in reader:
+            meter.count += 1
+            if meter.count >= meter.next_report:
+                meter.report()
+            yield row_parser.parse_row(row)
+    else:
+        chunks: Iterator[Sequence[Sequence[Any]]]
+        if executor is not None and file_ranges is not None:
+            chunks = _parse_ranges_in_pool(file_ranges, executor, options)
+        elif executor is not None:
+            chunks = _parse_in_pool(reader, executor, options.workers)
+        else:
+            chunks = map(row_parser.parse_batch, _chunked(reader, _BATCH_SIZE))
+        for parsed_chunk in chunks:
+            meter.count += len(parsed_chunk)
+            if meter.count >= meter.next_report:
+                meter.report()
+            yield from parsed_chunk
+    print(f"  {table}: {meter.count:,} rows total", file=sys.stderr)
+
+
+def _write_batches(
+    rows: Iterator[Sequence[Any]],
+    batch_size: int,
+    write: Callable[[list[Sequence[Any]]], None],
+    table_profile: TableProfile | None = None,
+) -> None:
+    """Pass rows to write in lists of batch_size rows each.
+
+    When profiling, the time spent writing is added to the insert stage,
+    and the time spent producing the rows, less the stages timed upstream,
+    to the parse stage.
+    """
+    if table_profile is None:
+        for batch in _chunked(rows, batch_size):
+            write(batch)
+        return
+
+    stages = table_profile.stages
+    upstream = ("read", "csv", "sample")
+    before = sum(stages[stage] for stage in upstream)
+    producing = 0.0
+    batches = _chunked(rows, batch_size)
+    while True:
+        start = time.perf_counter()
+        block = next(batches, None)
+        producing += time.perf_counter() - start
+        if block is None:
+            break
+        start = time.perf_counter()
+        write(block)
+        stages["insert"] += time.perf_counter() - start
+    upstream_seconds = sum(stages[stage] for stage in upstream) - before
+    stages["parse"] += max(producing - upstream_seconds, 0.0)
+
+
+def _insert_rows(
+    con: sqlite3.Connection,
+    insert_sql: str,
+    rows: Iterator[Sequence[Any]],
+    batch_size: int,
+    table_profile: TableProfile | None = None,
+    on_commit: Callable[[int], None] | None = None,
+) -> None:
+    """Insert rows in explicit transactions of batch_size rows each.
+
+    The rows are passed through _write_batches(), which profiles them. If
+    on_commit is given, it is called with the number of rows in each batch
+    just before the batch is committed, inside its transaction.
+    """
+
+    def insert(batch: list[Sequence[Any]]) -> None:
+        con.execute("BEGIN")
+        con.executemany(insert_sql, batch)
+        if on_commit is not None:
+            on_commit(len(batch))
+        con.commit()
+
+    _write_batches(rows, batch_size, insert, table_profile)
+
+
+@dataclass
+class _TableInput:
+    """The rows of one record file, parsed as they are consumed.
+
+    Attributes:
+        rows: The parsed rows, in input order.
+        meter: Counts the rows parsed and reports progress.
+        position: Returns how far into the file on disk the rows were read.
+    """
+
+    rows: Iterator[Sequence[Any]]
+    meter: ProgressMeter
+    position: Callable[[], int]
+
+
+def _start_worker_pool(
+    parser_factory: Callable[[], CSVParser], file_name: str, options: _LoadOptions
+) -> ProcessPoolExecutor | None:
+    """Start the worker processes that parse the rows of a record file.
+
+    The workers are started before the file is opened for reading, because
+    a compressed file is then decompressed on background threads, and a
+    process forked while one of them holds a lock could deadlock. The header
+    row the workers need is read here on this thread.
+
+    Returns:
+        The pool, with all its workers running, or None if the file is empty.
+    """
+    with open_record_file(file_name, errors=options.parse_errors, threaded=False) as f:
+        header_row = next(csv.reader(f), None)
+    if header_row is None:
+        return None
+    executor = ProcessPoolExecutor(
+        max_workers=options.workers,
+        initializer=_init_worker,
+        initargs=(parser_factory, header_row, options.engine == "columnar"),
+    )
+    try:
+        # Forked workers are all started by the first task
+        executor.submit(int).result()
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        raise
+    return executor
+
+
+@contextlib.contextmanager
+def _open_table_input(
+    row_parser: CSVParser,
+    parser_factory: Callable[[], CSVParser],
+    file_name: str,
+    options: _LoadOptions,
+    table_profile: TableProfile | None = None,
+    resume_rows: int = 0,
+) -> Generator[_TableInput | None, None, None]:
+    """Open a record file and parse its rows with row_parser as they are read.
+
+    The header is read first; if the file is empty, a warning is printed and
+    None is yielded instead. If resume_rows is set, that many rows are read
+    past without being parsed. With options.workers, the rows are parsed by
+    a pool of worker processes that lasts until the context exits.
+    """
+    table = row_parser.table_name
+    with contextlib.ExitStack() as stack:
+        executor = None
+        if options.workers > 1:
+            executor = _start_worker_pool(parser_factory, file_name, options)
+            if executor is not None:
+                stack.enter_context(executor)
+        f = stack.enter_context(
+            open_record_file(file_name, errors=options.parse_errors)
+        )
+        reader: Iterator[list[str]]
+        if table_profile is None:
+            reader = csv.reader(f)
+        else:
+            reader = csv.reader(table_profile.timed_lines(f))
+        try:
+            header_row = next(reader)
+        except StopIteration:
+            print(
+                f"Warning: '{file_name}' is empty, skipping.",
+                file=sys.stderr,
+            )
+            yield None
+            return
+
+        row_parser.resolve_indices(header_row)
+        if resume_rows:
+            print(
+                f"  {table}: skipping {resume_rows:,} rows loaded before",
+                file=sys.stderr,
+            )
+            skipped_rows = sum(1 for _ in itertools.islice(reader, resume_rows))
+            if skipped_rows < resume_rows:
+                raise RecordFileError(
+                    f"'{file_name}' has fewer rows than were loaded from it before"
+                )
+        if table_profile is not None:
+            reader = table_profile.timed_rows(reader, row_parser)
+
+        # With --mmap, workers read the rows after the header themselves;
+        # compressed files cannot be split, and are read here as usual. A
+        # resumed table is read here too, past the rows loaded before.
+        file_ranges = None
+        position = f.raw_position
+        if options.mmap and options.workers > 1 and not resume_rows:
+            ranges = split_record_file(file_name, _RANGE_SIZE)
+            if ranges is not None:
+                file_ranges = _FileRanges(file_name, ranges[1:], ranges[0][1])
+                position = file_ranges.raw_position
+
+        meter = ProgressMeter(
+            table,
+            position,
+            f.raw_size,
+            _PROGRESS_INTERVAL,
+            options.metrics,
+        )
+        yield _TableInput(
+            _parsed_rows(reader, row_parser, meter, options, executor, file_ranges),
+            meter,
+            position,
+        )
+
+
+def _load_table(
+    con: sqlite3.Connection,
+    parser_factory: Callable[[], CSVParser],
+    file_name: str,
+    options: _LoadOptions,
+    resume_rows: int = 0,
+) -> TableProfile | None:
+    """Create a table and fill it with the parsed rows of one record file.
+
+    If resume_rows is set, the table already holds that many rows of the
+    file, which are read past without being parsed.
+
+    Returns:
+        The time spent in each stage if options.sample_every is set,
+        otherwise None.
+    """
+    row_parser = parser_factory()
+    table = row_parser.table_name
+    if not resume_rows:
+        con.execute(row_parser.create_table_statement())
+        if options.checkpoint:
+            start_table(con, table, InputIdentity.of(file_name))
+            con.commit()
+    table_profile = None
+    if options.sample_every is not None:
+        table_profile = TableProfile(row_parser.table_name, options.sample_every)
+
+    with _open_table_input(
+        row_parser, parser_factory, file_name, options, table_profile, resume_rows
+    ) as table_input:
+        if table_input is None:
+            return table_profile
+        meter = table_input.meter
+        position = table_input.position
+        deferred = options.defer_unique and row_parser.has_primary_column
+        # Rows loaded into the staging table are not in the output until
+        # they are copied, so only direct loads record their progress
+        on_commit = None
+        if options.checkpoint and not deferred:
+            committed = resume_rows
+
+            def record_commit(rows: int) -> None:
+                nonlocal committed
+                committed += rows
+                record_progress(con, table, committed, position())
+
+            on_commit = record_commit
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if deferred:
+                staging = stack.enter_context(_staging_database(con))
+                staging_table = f"{staging}.{row_parser.table_name}"
+                con.execute(
+                    row_parser.create_table_statement(staging_table, primary_key=False)
+                )
+                insert_sql = row_parser.insert_statement(staging_table)
+            else:
+                insert_sql = row_parser.insert_statement()
+
+            _insert_rows(
+                con,
+                insert_sql,
+                table_input.rows,
+                options.profile.batch_size,
+                table_profile,
+                on_commit,
+            )
+
+            if deferred:
+                dedupe_start = time.perf_counter()
+                _copy_first_unique_rows(con, row_parser, staging_table)
+                if table_profile is not None:
+                    table_profile.stages["dedupe"] += time.perf_counter() - dedupe_start
+            if options.checkpoint:
+                finish_table(con, table, resume_rows + meter.count)
+                con.commit()
+        meter.finish()
+        elapsed = time.perf_counter() - start
+        rate = meter.count / elapsed if elapsed > 0 else 0.0
+        print(
+            f"  {row_parser.table_name}: loaded in {elapsed:,.1f}s "
+            f"({rate:,.0f} rows/s)",
+            file=sys.stderr,
+        )
+
+        if row_parser.has_primary_column:
+            cursor = con.execute(f"SELECT COUNT(*) FROM {row_parser.table_name}")
+            inserted = cursor.fetchone()[0]
+            skipped = resume_rows + meter.count - inserted
+            if skipped:
+                print(
+                    f"Warning: {skipped:,} duplicate case_id rows "
+                    f"skipped in {row_parser.table_name}.",
+                    file=sys.stderr,
+                )
+
+        if options.cache_stats:
+            _print_cache_stats(row_parser, options)
+
+    if table_profile is not None:
+        table_profile.rows = meter.count
+    return table_profile
+
+
+@contextlib.contextmanager
+def _staging_database(con: sqlite3.Connection) -> Generator[str, None, None]:
+    """Attach a scratch database next to the main database as 'staging'.
+
+    Scratch tables are kept out of the output file, so dropping them does
+    not leave free pages behind. The database is removed on exit.
+    """
+    main_file = con.execute("PRAGMA database_list").fetchone()[2]
+    directory = Path(main_file).parent if main_file else None
+    with tempfile.TemporaryDirectory(prefix=".switrs-staging.", dir=directory) as d:
+        # ATTACH cannot run inside a transaction
+        con.commit()
+        con.execute("ATTACH DATABASE ? AS staging", (str(Path(d) / "staging.sqlite3"),))
+        try:
+            con.execute("PRAGMA staging.journal_mode = OFF")
+            con.execute("PRAGMA staging.synchronous = OFF")
+            yield "staging"
+        finally:
+            con.commit()
+            con.execute("DETACH DATABASE staging")
+
+
+def _copy_first_unique_rows(
+    con: sqlite3.Connection, row_parser: CSVParser, staging_table: str
+) -> None:
+    """Copy rows from a staging table, keeping the first row for each key.
+
+    Sorting by the key and then by input order means the primary key index
+    is built in one sorted pass, and INSERT OR IGNORE keeps the earliest row
+    of each key just as it does when loading directly. The rows are
+    therefore stored in key order, so their rowids differ from a direct
+    load's; copying them in input order would update the index at random
+    again.
+    """
+    key = row_parser.columns[0][0]
+    con.execute("BEGIN")
+    con.execute(
+        f"INSERT OR IGNORE INTO main.{row_parser.table_name} "
+        f"SELECT * FROM {staging_table} ORDER BY {key}, rowid"
+    )
+    con.commit()
+
+
+def _print_cache_stats(row_parser: CSVParser, options: _LoadOptions) -> None:
+    """Print the hit rate of each column's value cache to stderr."""
+    table = row_parser.table_name
+    if options.workers > 1 or options.engine != "row":
+        print(
+            f"  {table}: cache stats are only collected by the row engine "
+            "without --workers",
+            file=sys.stderr,
+        )
+        return
+
+    print(f"  {table} cache hit rates:", file=sys.stderr)
+    stats = sorted(row_parser.cache_stats(), key=lambda st: st.hit_rate, reverse=True)
+    for st in stats:
+        if st.enabled:
+            detail = f"{st.hit_rate:6.1%} ({st.entries:,} entries)"
+        elif st.lookups:
+            detail = f"   off (high cardinality, after {st.lookups:,} rows)"
+        else:
+            detail = "   off"
+        print(f"    {st.name:<32} {detail}", file=sys.stderr)
+
+
+def _build_shard(
+    parser_factory: Callable[[], CSVParser],
+    file_name: str,
+    shard_file: str,
+    options: _LoadOptions,
+) -> TableProfile | None:
+    """Load one table into its own temporary database file.
+
+    Runs in a separate process so that all tables are converted at once.
+    """
+    with contextlib.closing(sqlite3.connect(shard_file)) as con, con:
+        configure_connection(con, options.profile)
+        return _load_table(con, parser_factory, file_name, options)
+
+
+def _load_tables_from_shards(
+    con: sqlite3.Connection,
+    pairs: tuple[tuple[Callable[[], CSVParser], str], ...],
+    output_path: Path,
+    options: _LoadOptions,
+) -> list[TableProfile | None]:
+    """Build every table concurrently in a shard, then copy them into con.
+
+    The shards are written next to output_path, where the database is
+    built, so that they are kept on the same fast storage, and are removed
+    once they have been copied.
+
+    Returns:
+        The profile of each table, as returned by _load_table().
+    """
+    with contextlib.ExitStack() as stack:
+        shard_dir = stack.enter_context(
+            tempfile.TemporaryDirectory(
+                prefix=f".{output_path.name}.", dir=output_path.parent
+            )
+        )
+        # Progress samples come back from the shards over a queue, so that
+        # only this process writes the metrics output
+        samples: queue.Queue[ProgressSample] | None = None
+        # The checkpoint of each table is recorded here once it is copied
+        shard_options = replace(options, checkpoint=False)
+        if options.metrics is not None:
+            samples = stack.enter_context(multiprocessing.Manager()).Queue()
+            shard_options = replace(shard_options, metrics=QueueWriter(samples))
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=len(pairs)))
+
+        shards: list[tuple[CSVParser, str, str, Future[TableProfile | None]]] = []
+        for parser_factory, file_name in pairs:
+            row_parser = parser_factory()
+            shard_file = str(Path(shard_dir) / f"{row_parser.table_name}.sqlite3")
+            future = executor.submit(
+                _build_shard,
+                parser_factory,
+                file_name,
+                shard_file,
+                shard_options,
+            )
+            shards.append((row_parser, file_name, shard_file, future))
+
+        if samples is not None and options.metrics is not None:
+            _forward_samples(
+                samples, [future for _, _, _, future in shards], options.metrics
+            )
+
+        profiles = []
+        for row_parser, file_name, shard_file, future in shards:
+            profiles.append(future.result())
+            table = row_parser.table_name
+            con.execute(row_parser.create_table_statement())
+            # ATTACH cannot run inside a transaction
+            con.commit()
+            con.execute("ATTACH DATABASE ? AS shard", (shard_file,))
+            copied = con.execute(
+                f"INSERT INTO main.{table} SELECT * FROM shard.{table}"
+            ).rowcount
+            if options.checkpoint:
+                start_table(con, table, InputIdentity.of(file_name))
+                finish_table(con, table, copied)
+            con.commit()
+            con.execute("DETACH DATABASE shard")
+    return profiles
+
+
+def _load_tables(
+    con: sqlite3.Connection,
+    pairs: tuple[tuple[Callable[[], CSVParser], str], ...],
+    output_path: Path,
+    options: _LoadOptions,
+    parallel_tables: bool,
+    checkpoints: dict[str, Checkpoint] | None = None,
+) -> list[TableProfile | None]:
+    """Load every table into con, one after another or from shards.
+
+    If checkpoints are given, the conversion is being resumed: finished
+    tables are skipped, and a table loaded part of the way continues from
+    its last committed row, or is loaded again from scratch if it is built
+    in a shard.
+    """
+    resume_rows: dict[str, int] = {}
+    todo = []
+    for parser_factory, file_name in pairs:
+        row_parser = parser_factory()
+        table = row_parser.table_name
+        if checkpoints is not None:
+            rows = _resume_point(
+                con, row_parser, file_name, checkpoints.get(table), not parallel_tables
+            )
+            if rows is None:
+                continue
+            resume_rows[table] = rows
+        todo.append((parser_factory, file_name))
+
+    if parallel_tables:
+        return _load_tables_from_shards(con, tuple(todo), output_path, options)
+    return [
+        _load_table(
+            con,
+            parser_factory,
+            file_name,
+            options,
+            resume_rows.get(parser_factory().table_name, 0),
+        )
+        for parser_factory, file_name in todo
+    ]
+
+
+def _open_checkpoints(
+    con: sqlite3.Connection, output_file: str
+) -> dict[str, Checkpoint] | None:
+    """Check that an interrupted conversion can be resumed, and read its progress.
+
+    Returns:
+        The checkpoint of each table started before, or None if the
+        conversion already finished, so there is nothing to resume.
+
+    Raises:
+        ValueError: If the file is not a SQLite database, is damaged, or has
+            neither checkpoints nor the tables this version writes.
+    """
+    try:
+        result = con.execute("PRAGMA quick_check").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"'{output_file}' is not a SQLite database: {e}") from None
+    if result != "ok":
+        raise ValueError(
+            f"'{output_file}' is damaged ({result}). Remove it and rerun "
+            "without --resume."
+        )
+    checkpoints = read_checkpoints(con)
+    if checkpoints is None:
+        # The checkpoints are dropped once a conversion finishes
+        check_tables(con, output_file)
+        print(
+            f"'{output_file}' is already complete; there is nothing to resume",
+            file=sys.stderr,
+        )
+        return None
+    print(f"Resuming the conversion into '{output_file}'", file=sys.stderr)
+    return checkpoints
+
+
+def _resume_point(
+    con: sqlite3.Connection,
+    row_parser: CSVParser,
+    file_name: str,
+    checkpoint: Checkpoint | None,
+    can_continue: bool,
+) -> int | None:
+    """Decide where loading a table resumes from its checkpoint.
+
+    A table that was started but cannot be continued is dropped. Rows past
+    the checkpoint, which a crash may have left behind without a journal,
+    are deleted from parties and victims, whose ids count the rows of the
+    file in order; collisions are inserted with INSERT OR IGNORE, so those
+    rows are simply inserted again.
+
+    Returns:
+        The number of rows of the file to skip, or None if the table is
+        finished.
+
+    Raises:
+        ValueError: If the table was loaded from a different version of the
+            input file.
+    """
+    table = row_parser.table_name
+    if checkpoint is not None and (checkpoint.done or checkpoint.rows):
+        if not checkpoint.source.same_file(InputIdentity.of(file_name)):
+            raise ValueError(
+                f"'{file_name}' is not the file {table} was loaded from before "
+                f"('{checkpoint.source.file_name}'), or has changed since. Remove "
+                "the output and rerun without --resume."
+            )
+        if checkpoint.done:
+            print(f"  {table}: already loaded, skipping", file=sys.stderr)
+            return None
+        if can_continue:
+            if not row_parser.has_primary_column:
+                con.execute(f"DELETE FROM {table} WHERE id > ?", (checkpoint.rows,))
+                con.commit()
+            return checkpoint.rows
+    con.execute(f"DROP TABLE IF EXISTS {table}")
+    return 0
+
+
+def _configure_append_connection(con: sqlite3.Connection, profile: LoadProfile) -> None:
+    """Set the pragmas of a load profile that are safe on an existing database.
+
+    The journal and sync settings are left alone, so that the merge is a
+    single transaction that a crash rolls back rather than a corrupt file.
+    """
+    con.execute(f"PRAGMA temp_store = {profile.temp_store}")
+    con.execute(f"PRAGMA cache_size = {profile.cache_size}")
+    con.execute(f"PRAGMA mmap_size = {profile.mmap_size}")
+
+
+def _missing_indexes(
+    con: sqlite3.Connection, plan: Sequence[IndexSpec]
+) -> list[IndexSpec]:
+    """Return the indexes in the plan that the database does not have yet."""
+    existing = {
+        row[0]
+        for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    return [spec for spec in plan if spec.name not in existing]
+
+
+def _merge_delta(con: sqlite3.Connection, delta_file: str) -> None:
+    """Upsert the collisions, parties, and victims of a scratch database.
+
+    A collision in the scratch database is added if its case_id is new, and
+    replaces the existing row if its process_date is later (or the existing
+    row has none). The parties and victims of every replaced case are
+    deleted, and those of every added or replaced case copied in, so each
+    case keeps the parties and victims of the version that won. Every
+    statement is driven by the case IDs of the scratch database and looks
+    up the existing tables through their indexes, so the cost grows with
+    the new files rather than with the database.
+
+    All changes are made in one transaction.
+    """
+    columns = table_columns()
+    # ATTACH cannot run inside a transaction
+    con.commit()
+    con.execute("ATTACH DATABASE ? AS delta", (delta_file,))
+    try:
+        con.execute("BEGIN")
+        con.execute(
+            "CREATE TEMP TABLE appended_cases "
+            "(case_id TEXT PRIMARY KEY, replaced INTEGER NOT NULL)"
+        )
+        con.execute(
+            "INSERT INTO temp.appended_cases "
+            "SELECT new.case_id, old.case_id IS NOT NULL "
+            "FROM delta.collisions AS new "
+            "LEFT JOIN main.collisions AS old ON old.case_id = new.case_id "
+            "WHERE old.case_id IS NULL "
+            "OR new.process_date > old.process_date "
+            "OR (old.process_date IS NULL AND new.process_date IS NOT NULL)"
+        )
+        new_cases, replaced = con.execute(
+            "SELECT COUNT(*), COALESCE(SUM(replaced), 0) FROM temp.appended_cases"
+        ).fetchone()
+        offered = con.execute("SELECT COUNT(*) FROM delta.collisions").fetchone()[0]
+        print(
+            f"Appending {new_cases - replaced:,} new cases, replacing "
+            f"{replaced:,}, and keeping {offered - new_cases:,} that are not "
+            "newer than the database",
+            file=sys.stderr,
+        )
+
+        for table in ("parties", "victims"):
+            deleted = con.execute(
+                f"DELETE FROM main.{table} WHERE case_id IN "
+                "(SELECT case_id FROM temp.appended_cases WHERE replaced)"
+            ).rowcount
+            # Leave out the id column, so new rows are numbered after the
+            # existing ones
+            cols = ", ".join(columns[table][1:])
+            added = con.execute(
+                f"INSERT INTO main.{table} ({cols}) SELECT {cols} "
+                f"FROM delta.{table} WHERE case_id IN "
+                "(SELECT case_id FROM temp.appended_cases) ORDER BY id"
+            ).rowcount
+            print(f"  {table}: {deleted:,} removed, {added:,} added", file=sys.stderr)
+
+        con.execute(
+            "INSERT OR REPLACE INTO main.collisions "
+            "SELECT new.* FROM delta.collisions AS new "
+            "JOIN temp.appended_cases USING (case_id) ORDER BY new.rowid"
+        )
+        con.execute("DROP TABLE temp.appended_cases")
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        con.execute("DETACH DATABASE delta")
+
+
+def _append_tables(
+    con: sqlite3.Connection,
+    pairs: tuple[tuple[Callable[[], CSVParser], str], ...],
+    output_path: Path,
+    options: _LoadOptions,
+    parallel_tables: bool,
+    plan: Sequence[IndexSpec],
+) -> tuple[list[TableProfile | None], dict[str, float]]:
+    """Load the record files into a scratch database and merge it into con.
+
+    Indexes in the plan that the database lacks are built first, so that
+    the merge can use them; existing indexes are kept up to date by SQLite.
+
+    Returns:
+        The profile of each table, and the seconds spent building each
+        missing index.
+    """
+    index_seconds = build_indexes(con, _missing_indexes(con, plan))
+    with tempfile.TemporaryDirectory(
+        prefix=f".{output_path.name}.", dir=output_path.parent
+    ) as delta_dir:
+        delta_path = Path(delta_dir) / "delta.sqlite3"
+        with contextlib.closing(sqlite3.connect(delta_path)) as delta, delta:
+            configure_connection(delta, options.profile)
+            profiles = _load_tables(delta, pairs, delta_path, options, parallel_tables)
+
+        start = time.perf_counter()
+        _merge_delta(con, str(delta_path))
+        print(f"Merged in {time.perf_counter() - start:,.1f}s", file=sys.stderr)
+    return profiles, index_seconds
+
+
+def _write_to_all(writers: Sequence[TableWriter], rows: list[Sequence[Any]]) -> None:
+    """Pass a batch of rows to every writer of a table."""
+    for writer in writers:
+        writer.write(rows)
+
+
+def _write_table(
+    parser_factory: Callable[[], CSVParser],
+    file_name: str,
+    options: _LoadOptions,
+    sinks: Sequence[Sink],
+) -> TableProfile | None:
+    """Parse one record file, writing every batch of rows to each sink.
+
+    When profiling, the time spent in all of the sinks is counted in the
+    insert stage.
+
+    Returns:
+        The time spent in each stage if options.sample_every is set,
+        otherwise None.
+    """
+    row_parser = parser_factory()
+    table = row_parser.table_name
+    table_profile = None
+    if options.sample_every is not None:
+        table_profile = TableProfile(table, options.sample_every)
+    writers = [sink.open_table(row_parser) for sink in sinks]
+    with _open_table_input(
+        row_parser, parser_factory, file_name, options, table_profile
+    ) as table_input:
+        if table_input is None:
+            # The outputs still get the table, without any rows
+            for writer in writers:
+                writer.close()
+            return table_profile
+        start = time.perf_counter()
+        _write_batches(
+            table_input.rows,
+            options.profile.batch_size,
+            functools.partial(_write_to_all, writers),
+            table_profile,
+        )
+        for writer in writers:
+            writer.close()
+        meter = table_input.meter
+        meter.finish()
+        elapsed = time.perf_counter() - start
+        rate = meter.count / elapsed if elapsed > 0 else 0.0
+        print(
+            f"  {table}: written in {elapsed:,.1f}s ({rate:,.0f} rows/s)",
+            file=sys.stderr,
+        )
+        # Every output drops the same rows
+        duplicates = max(writer.duplicates for writer in writers)
+        if duplicates:
+            print(
+                f"Warning: {duplicates:,} duplicate case_id rows skipped in {table}.",
+                file=sys.stderr,
+            )
+        if options.cache_stats:
+            _print_cache_stats(row_parser, options)
+    if table_profile is not None:
+        table_profile.rows = meter.count
+    return table_profile
+
+
+def _write_tables(
+    pairs: tuple[tuple[Callable[[], CSVParser], str], ...],
+    options: _LoadOptions,
+    sinks: Sequence[Sink],
+    parallel_tables: bool = False,
+) -> list[TableProfile | None]:
+    """Parse each record file once, writing every batch of rows to each sink.
+
+    The tables are written in order, collisions first, or if parallel_tables
+    is set, all at once, each in its own process. The sinks are then passed
+    to the processes, so each must write its tables to files of their own;
+    see PARALLEL_TABLE_FORMATS.
+
+    Returns:
+        The profile of each table, as returned by _write_table().
+    """
+    if not parallel_tables:
+        return [
+            _write_table(parser_factory, file_name, options, sinks)
+            for parser_factory, file_name in pairs
+        ]
+
+    with contextlib.ExitStack() as stack:
+        # Progress samples come back over a queue, as from shards
+        samples: queue.Queue[ProgressSample] | None = None
+        table_options = options
+        if options.metrics is not None:
+            samples = stack.enter_context(multiprocessing.Manager()).Queue()
+            table_options = replace(options, metrics=QueueWriter(samples))
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=len(pairs)))
+        futures = [
+            executor.submit(
+                _write_table, parser_factory, file_name, table_options, sinks
+            )
+            for parser_factory, file_name in pairs
+        ]
+        if samples is not None and options.metrics is not None:
+            _forward_samples(samples, futures, options.metrics)
+        return [future.result() for future in futures]
+
+
+def _forward_samples(
+    samples: "queue.Queue[ProgressSample]",
+    futures: list[Future[TableProfile | None]],
+    writer: MetricsWriter,
+) -> None:
+    """Write the progress samples sent by table processes until they finish."""
+    pending = set(futures)
+    while True:
+        _, pending = wait(pending, timeout=_SAMPLE_POLL_SECONDS)
+        while True:
+            try:
+                writer.emit(samples.get_nowait())
+            except queue.Empty:
+                break
+        if not pending:
+            return
 
 
 def convert_files(
@@ -51,79 +1100,410 @@ def convert_files(
     output_file: str,
     *,
     parse_errors: str | None = None,
+    workers: int = 1,
+    mmap: bool = False,
+    parallel_tables: bool = False,
+    engine: str = "row",
+    cache_stats: bool = False,
+    load_profile: str = DEFAULT_LOAD_PROFILE,
+    batch_size: int | None = None,
+    defer_unique: bool = False,
+    indexes: Sequence[IndexSpec] = DEFAULT_INDEX_PLAN,
+    profile_file: str | None = None,
+    profile_sample_every: int = DEFAULT_SAMPLE_EVERY,
+    metrics_format: str | None = None,
+    metrics_file: str | None = None,
+    append: bool = False,
+    resume: bool = False,
+    build_in: str | None = None,
+    output_format: str = "sqlite",
+    row_group_size: int = ROW_GROUP_SIZE,
+    extra_outputs: Sequence[tuple[str, str]] = (),
 ) -> None:
-    """Convert SWITRS CSV files to a SQLite database.
+    """Convert SWITRS CSV files to a SQLite or DuckDB database, or to files.
 
     Args:
-        collision_file: Path to CollisionRecords.txt (or gzipped).
-        party_file: Path to PartyRecords.txt (or gzipped).
-        victim_file: Path to VictimRecords.txt (or gzipped).
-        output_file: Path for the output SQLite database.
+        collision_file: Path to CollisionRecords.txt (or compressed).
+        party_file: Path to PartyRecords.txt (or compressed).
+        victim_file: Path to VictimRecords.txt (or compressed).
+        output_file: Path for the output database, or for the directory of
+            CSV, Parquet, Arrow, or PostgreSQL files.
         parse_errors: How to handle unicode decoding errors in input files.
             One of 'strict', 'ignore', 'replace', or None (defaults to strict).
+        workers: Number of processes used to parse rows. With more than one,
+            chunks of rows are parsed in a process pool and written in input
+            order, so the output is identical to a single-process build.
+            The pool uses Python's default start method; where that does
+            not fork, as on macOS and Windows and from Python 3.14, a script
+            calling this must guard its entry point with
+            ``if __name__ == "__main__":``.
+        mmap: If True, split uncompressed input files into byte ranges of
+            whole records, which each worker reads through a memory map and
+            parses itself, so rows are not read and sent to the workers by
+            this process. Needs more than one worker. Compressed files are
+            read as usual.
+        parallel_tables: If True, build each table in its own process and
+            temporary database, then copy them into the output before the
+            indexes are created. Wall-clock time then approaches that of the
+            slowest table rather than the sum of all three. If every output
+            is in one of PARALLEL_TABLE_FORMATS, each table is instead
+            written straight to its files in its own process.
+        engine: How rows are converted. 'row' parses one row at a time;
+            'columnar' converts batches of rows column by column, converting
+            each distinct value in a column only once. Both produce the same
+            database.
+        cache_stats: If True, print the hit rate of each column's value cache
+            to stderr after each table is loaded.
+        load_profile: The name of the SQLite load profile to use, one of
+            LOAD_PROFILES: 'fast', 'low-memory', or 'safe'.
+        batch_size: The number of rows inserted per transaction. Defaults to
+            the load profile's batch size.
+        defer_unique: If True, load collisions into a scratch table without a
+            primary key, then copy them into the output sorted by case_id,
+            keeping the first row of each case_id. This avoids a random
+            B-tree insert per row while loading. The table holds the same
+            rows, but stored, and numbered by rowid, in case_id order
+            rather than input order.
+        indexes: The indexes to build once every table is loaded. Defaults
+            to the case_id indexes on parties and victims. Pass an empty
+            sequence to build none.
+        profile_file: If set, time each stage of loading every table, and
+            the converter of every column on a sample of rows, then print a
+            report of the slowest stages and columns to stderr and write the
+            raw timings to this JSON file.
+        profile_sample_every: When profiling, time the columns of one row in
+            every profile_sample_every rows.
+        metrics_format: Also write progress, throughput, and an ETA for each
+            table in a machine-readable format: 'jsonl' for one JSON object
+            per update, or 'prometheus' for a Prometheus textfile.
+        metrics_file: Where to write the metrics. JSON lines are appended to
+            the file, or written to stdout if this is None; a Prometheus
+            textfile is replaced on every update and must be given.
+        append: If True, add the record files to the existing database at
+            output_file instead of creating it. Collisions are upserted by
+            case_id, and a case already in the database is only replaced
+            if the new row has a later process_date; the parties and
+            victims of a replaced case are replaced along with it. The
+            files are loaded into a scratch database first, so the merge
+            costs time in proportion to the new files. Indexes in the plan
+            that the database lacks are built; existing ones are kept.
+        resume: If True and output_file exists, continue the conversion
+            that was interrupted while writing it. Every conversion records
+            the progress of each table in a checkpoint table, which is
+            dropped once it finishes; a resumed conversion skips the
+            finished tables and reads past the rows of the others that were
+            committed. If output_file does not exist, a new conversion is
+            started; if its conversion already finished, nothing is done.
+        build_in: Build the database somewhere other than output_file, then
+            write it to output_file in one sequential pass with SQLite's
+            backup API, so that slow or network-attached storage sees no
+            random page writes. Either ':memory:' to build it in RAM, or a
+            directory, such as a tmpfs, to build it in. If the database is
+            estimated from the input sizes not to fit in the memory or the
+            directory's free space, a warning is printed and it is built at
+            output_file instead. Cannot be combined with append or resume.
+        output_format: 'sqlite' to write a SQLite database; 'csv' to write
+            collisions.csv, parties.csv, and victims.csv, with the values
+            SQLite stores, in the directory output_file; 'parquet' to parse
+            the files straight into collisions.parquet, parties.parquet, and
+            victims.parquet in that directory; 'arrow' to write them as
+            uncompressed Arrow IPC (Feather) files, collisions.arrow,
+            parties.arrow, and victims.arrow, that readers can memory-map;
+            'postgres' to write the rows of each table in the text format
+            of PostgreSQL's COPY, to collisions.copy, parties.copy, and
+            victims.copy, with its CREATE TABLE statement in
+            collisions.sql, parties.sql, and victims.sql and the indexes
+            in indexes.sql; or 'duckdb' to load them into a DuckDB database
+            with the same tables and indexes, in bulk batches. None of these
+            goes through SQLite. Parquet and Arrow need the pyarrow package,
+            and DuckDB the duckdb and pyarrow packages. CSV, Parquet, Arrow,
+            and COPY files have no indexes.
+        row_group_size: The most rows in a Parquet row group. Each row
+            group holds the rows of one collision year, oldest first.
+        extra_outputs: The format and path of further outputs, written from
+            the same pass over the input files as output_file, so each file
+            is only parsed once. Any format may be used, SQLite included.
+            Unless output_format is 'sqlite' and there are no extra outputs,
+            append, resume, build_in, and defer_unique cannot be used, nor
+            can parallel_tables unless every output is in one of
+            PARALLEL_TABLE_FORMATS, and the load profile only sets the batch
+            size and the pragmas of a SQLite output.
+
+    Raises:
+        FileExistsError: If output_file exists and neither append nor resume
+            is set, or an extra output exists.
+        FileNotFoundError: If an input file or the build_in directory is
+            missing, or output_file is missing and append is True.
+        ValueError: If an argument is invalid, the database appended to
+            does not have the tables this version writes, the conversion
+            cannot be resumed, or a package the output format needs is not
+            installed.
     """
-    for input_file in (collision_file, party_file, victim_file):
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if mmap and workers == 1:
+        raise ValueError("mmap needs more than one worker")
+    if append and resume:
+        raise ValueError("append and resume cannot be combined")
+    if build_in is not None:
+        if append or resume:
+            raise ValueError("build_in cannot be combined with append or resume")
+        if build_in != IN_MEMORY and not Path(build_in).is_dir():
+            raise FileNotFoundError(f"Build directory not found: '{build_in}'")
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got '{engine}'")
+    outputs = [(output_format, output_file), *extra_outputs]
+    for fmt, _ in outputs:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"output_format must be one of {OUTPUT_FORMATS}, got '{fmt}'"
+            )
+    if len({Path(path).resolve() for _, path in outputs}) < len(outputs):
+        raise ValueError("Every output needs a path of its own")
+    # Only a SQLite database written on its own is loaded with checkpoints
+    use_sinks = outputs != [("sqlite", output_file)]
+    if use_sinks:
+        formats = {fmt for fmt, _ in outputs}
+        sqlite_only = {
+            "append": append,
+            "resume": resume,
+            "build_in": build_in is not None,
+            "parallel_tables": parallel_tables
+            and not formats <= set(PARALLEL_TABLE_FORMATS),
+            "defer_unique": defer_unique,
+        }
+        for name, used in sqlite_only.items():
+            if used:
+                raise ValueError(f"{name} only applies to a SQLite output on its own")
+        if "duckdb" in formats:
+            require_duckdb()
+        if "parquet" in formats:
+            require_pyarrow("Parquet")
+        if "arrow" in formats:
+            require_pyarrow("Arrow")
+    if row_group_size < 1:
+        raise ValueError(f"row_group_size must be at least 1, got {row_group_size}")
+    if load_profile not in LOAD_PROFILES:
+        raise ValueError(
+            f"load_profile must be one of {tuple(LOAD_PROFILES)}, got '{load_profile}'"
+        )
+    profile = LOAD_PROFILES[load_profile]
+    if batch_size is not None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        profile = replace(profile, batch_size=batch_size)
+    if profile_sample_every < 1:
+        raise ValueError(
+            f"profile_sample_every must be at least 1, got {profile_sample_every}"
+        )
+    if metrics_format is not None and metrics_format not in METRICS_FORMATS:
+        raise ValueError(
+            f"metrics_format must be one of {METRICS_FORMATS}, got '{metrics_format}'"
+        )
+    if metrics_format == "prometheus" and metrics_file is None:
+        raise ValueError("metrics_file is needed for Prometheus metrics")
+
+    pairs: tuple[tuple[Callable[[], CSVParser], str], ...] = (
+        (make_collision_parser, collision_file),
+        (make_party_parser, party_file),
+        (make_victim_parser, victim_file),
+    )
+
+    validate_index_plan(indexes, table_columns())
+
+    input_files = (collision_file, party_file, victim_file)
+    for input_file in input_files:
         if not Path(input_file).exists():
             raise FileNotFoundError(f"Input file not found: '{input_file}'")
 
     output_path = Path(output_file)
-    if output_path.exists():
+    if append:
+        if not output_path.exists():
+            raise FileNotFoundError(
+                f"Output file '{output_file}' not found; there is nothing to append to."
+            )
+    elif use_sinks:
+        for _, path in outputs:
+            if Path(path).exists():
+                raise FileExistsError(
+                    f"Output '{path}' already exists. Remove it before rerunning."
+                )
+    elif output_path.exists() and not resume:
         raise FileExistsError(
-            f"Output file '{output_file}' already exists. Remove it before rerunning."
+            f"Output file '{output_file}' already exists. Remove it before "
+            "rerunning, add to it with --append, or continue an interrupted "
+            "conversion with --resume."
         )
+    resuming = resume and output_path.exists()
 
-    pairs = (
-        (make_collision_parser(), collision_file),
-        (make_party_parser(), party_file),
-        (make_victim_parser(), victim_file),
+    options = _LoadOptions(
+        profile=profile,
+        parse_errors=parse_errors,
+        workers=workers,
+        mmap=mmap,
+        engine=engine,
+        cache_stats=cache_stats,
+        defer_unique=defer_unique,
+        sample_every=profile_sample_every if profile_file is not None else None,
     )
 
-    with contextlib.closing(sqlite3.connect(output_file)) as con, con:
-        con.execute("PRAGMA journal_mode = OFF")
-        con.execute("PRAGMA synchronous = OFF")
-        con.execute("PRAGMA cache_size = -64000")
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        if metrics_format is not None:
+            metrics = open_metrics_writer(metrics_format, metrics_file)
+            stack.callback(metrics.close)
+            options = replace(options, metrics=metrics)
+        table_order = [parser_factory().table_name for parser_factory, _ in pairs]
+        plan = order_index_plan(indexes, table_order)
+        if use_sinks:
+            sinks = [
+                stack.enter_context(
+                    contextlib.closing(open_sink(fmt, path, profile, row_group_size))
+                )
+                for fmt, path in outputs
+            ]
+            table_profiles = _write_tables(pairs, options, sinks, parallel_tables)
+            # Indexes built in several databases are timed together
+            index_seconds: dict[str, float] = {}
+            for sink in sinks:
+                for name, seconds in sink.finish(plan).items():
+                    index_seconds[name] = index_seconds.get(name, 0.0) + seconds
+        else:
+            # Where the database is built, and where scratch files, such as
+            # the shards of parallel_tables, go beside it; those of a database
+            # built in RAM go to shared memory
+            build_file, build_path = output_file, output_path
+            if build_in is not None and _fits_in(build_in, input_files):
+                scratch_dir = build_in
+                if build_in == IN_MEMORY:
+                    scratch_dir = (
+                        str(_SHARED_MEMORY_DIR)
+                        if _SHARED_MEMORY_DIR.is_dir()
+                        else tempfile.gettempdir()
+                    )
+                build_dir = stack.enter_context(
+                    tempfile.TemporaryDirectory(
+                        prefix=f".{output_path.name}.", dir=scratch_dir
+                    )
+                )
+                build_path = Path(build_dir) / output_path.name
+                build_file = build_in if build_in == IN_MEMORY else str(build_path)
+            con = stack.enter_context(contextlib.closing(sqlite3.connect(build_file)))
+            stack.enter_context(con)
+            print(f"Load profile {profile.describe()}", file=sys.stderr)
 
-        for row_parser, file_name in pairs:
-            con.execute(row_parser.create_table_statement())
+            if append:
+                check_tables(con, output_file)
+                _configure_append_connection(con, profile)
+                table_profiles, index_seconds = _append_tables(
+                    con, pairs, output_path, options, parallel_tables, plan
+                )
+            else:
+                checkpoints = None
+                if resuming:
+                    checkpoints = _open_checkpoints(con, output_file)
+                    if checkpoints is None:
+                        return
+                configure_connection(con, profile)
+                if checkpoints is None:
+                    create_checkpoint_table(con)
+                table_profiles = _load_tables(
+                    con,
+                    pairs,
+                    build_path,
+                    replace(options, checkpoint=True),
+                    parallel_tables,
+                    checkpoints,
+                )
+                index_seconds = build_indexes(con, _missing_indexes(con, plan))
+                drop_checkpoint_table(con)
+                if build_file != output_file:
+                    _write_database(con, output_path)
 
-            with open_record_file(file_name, errors=parse_errors) as f:
-                reader = csv.reader(f)
-                try:
-                    header_row = next(reader)
-                except StopIteration:
-                    print(
-                        f"Warning: '{file_name}' is empty, skipping.",
-                        file=sys.stderr,
-                    )
-                    continue
+    if profile_file is not None:
+        conversion_profile = ConversionProfile(
+            sample_every=profile_sample_every,
+            tables=[p for p in table_profiles if p is not None],
+            indexes=index_seconds,
+            total_seconds=time.perf_counter() - start,
+        )
+        for line in conversion_profile.report_lines():
+            print(line, file=sys.stderr)
+        conversion_profile.write_json(profile_file)
+        print(f"Profile timings written to '{profile_file}'", file=sys.stderr)
 
-                row_parser.resolve_indices(header_row)
 
-                counter = _RowCounter()
-                insert_sql = row_parser.insert_statement()
-                con.executemany(insert_sql, _parsed_rows(reader, row_parser, counter))
+def _fits_in(build_in: str, input_files: Sequence[str]) -> bool:
+    """Check whether the database is expected to fit where it is to be built.
+
+    Prints the estimate, and a warning if it does not fit.
+    """
+    needed = estimate_database_bytes(input_files)
+    available: int | None
+    if build_in == IN_MEMORY:
+        available, place = available_memory(), "memory"
+    else:
+        available, place = available_space(build_in), f"'{build_in}'"
+    if available is None or needed > available:
+        free = (
+            "an unknown amount" if available is None else f"{available / 1e9:,.1f} GB"
+        )
+        print(
+            f"Warning: the database needs about {needed / 1e9:,.1f} GB, but "
+            f"{free} is free in {place}; building it in place instead.",
+            file=sys.stderr,
+        )
+        return False
+    print(
+        f"Building the database in {place}: about {needed / 1e9:,.1f} GB "
+        f"needed, {available / 1e9:,.1f} GB free",
+        file=sys.stderr,
+    )
+    return True
 
-                if row_parser.has_primary_column:
-                    cursor = con.execute(
-                        f"SELECT COUNT(*) FROM {row_parser.table_name}"
-                    )
-                    inserted = cursor.fetchone()[0]
-                    skipped = counter.count - inserted
-                    if skipped:
-                        print(
-                            f"Warning: {skipped:,} duplicate case_id rows "
-                            f"skipped in {row_parser.table_name}.",
-                            file=sys.stderr,
-                        )
 
-        con.execute("CREATE INDEX idx_parties_case_id ON parties (case_id)")
-        con.execute("CREATE INDEX idx_victims_case_id ON victims (case_id)")
+def _write_database(con: sqlite3.Connection, output_path: Path) -> None:
+    """Copy a database built elsewhere to output_path in page order.
+
+    The copy is written next to output_path under a temporary name and
+    renamed once it is complete, so a failed copy leaves no output behind.
+    """
+    print(f"Writing the database to '{output_path}'...", file=sys.stderr)
+    start = time.perf_counter()
+    partial = output_path.with_name(f".{output_path.name}.partial")
+    con.commit()
+    try:
+        with contextlib.closing(sqlite3.connect(partial)) as target:
+            con.backup(target)
+        partial.replace(output_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    print(
+        f"  {output_path.stat().st_size / 1e6:,.1f} MB in "
+        f"{time.perf_counter() - start:,.1f}s",
+        file=sys.stderr,
+    )
+
+
+def _positive_int(value: str) -> int:
+    """Argparse type for options that need an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main(argv: list[str] | None = None) -> None:
     """CLI entry point for SWITRS-to-SQLite conversion."""
     argparser = argparse.ArgumentParser(
-        description="Convert SWITRS text files to a SQLite3 database"
+        description=(
+            "Convert SWITRS text files to a SQLite3 database, CSV, Parquet, "
+            "Arrow, PostgreSQL COPY files, or DuckDB"
+        )
     )
     argparser.add_argument(
         "--version",
@@ -133,17 +1513,17 @@ def main(argv: list[str] | None = None) -> None:
     argparser.add_argument(
         "collision_record",
         type=str,
-        help="the CollisionRecords.txt file or the same file gzipped",
+        help="the CollisionRecords.txt file, plain or compressed",
     )
     argparser.add_argument(
         "party_record",
         type=str,
-        help="the PartyRecords.txt file or the same file gzipped",
+        help="the PartyRecords.txt file, plain or compressed",
     )
     argparser.add_argument(
         "victim_record",
         type=str,
-        help="the VictimRecords.txt file or the same file gzipped",
+        help="the VictimRecords.txt file, plain or compressed",
     )
     argparser.add_argument(
         "-p",
@@ -159,21 +1539,238 @@ def main(argv: list[str] | None = None) -> None:
     argparser.add_argument(
         "-o",
         "--output-file",
-        help="file to save the database to",
-        default="switrs.sqlite3",
+        help=(
+            "file to save the database to, or directory for CSV, Parquet, "
+            "Arrow, or PostgreSQL files; give once for each --format, in the "
+            "same order (default: switrs.sqlite3, switrs_csv, switrs_parquet, "
+            "switrs_arrow, switrs_postgres, or switrs.duckdb)"
+        ),
+        action="append",
+    )
+    argparser.add_argument(
+        "--format",
+        help=(
+            "write a SQLite database (default); one CSV file per table; one "
+            "Parquet file per table with row groups ordered by collision "
+            "year; one Arrow IPC (Feather) file per table, for memory "
+            "mapping; one PostgreSQL COPY file and CREATE TABLE script per "
+            "table; or a DuckDB database. Give it more than once to write "
+            "several outputs from one pass over the input. Parquet and Arrow "
+            "need pyarrow, DuckDB needs duckdb and pyarrow"
+        ),
+        choices=OUTPUT_FORMATS,
+        action="append",
+    )
+    argparser.add_argument(
+        "--append",
+        help=(
+            "add the files to an existing output database: cases with a later "
+            "process date replace the stored ones, along with their parties "
+            "and victims, and new cases are added"
+        ),
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--resume",
+        help=(
+            "continue a conversion into the output file that was interrupted, "
+            "skipping the rows it already committed; starts a new conversion "
+            "if the output file does not exist, and does nothing if its "
+            "conversion already finished"
+        ),
+        action="store_true",
+    )
+    build = argparser.add_mutually_exclusive_group()
+    build.add_argument(
+        "--in-memory",
+        help=(
+            "build the database in RAM, then write it to the output file in "
+            "one sequential pass; built in place if it would not fit"
+        ),
+        action="store_true",
+    )
+    build.add_argument(
+        "--build-dir",
+        metavar="DIR",
+        help=(
+            "build the database in DIR, such as a tmpfs, then write it to the "
+            "output file in one sequential pass; built in place if it would "
+            "not fit"
+        ),
+    )
+    argparser.add_argument(
+        "-w",
+        "--workers",
+        help=(
+            "number of processes used to parse rows; the output is identical "
+            "to a single-process build (default: 1)"
+        ),
+        type=_positive_int,
+        default=1,
+    )
+    argparser.add_argument(
+        "--mmap",
+        help=(
+            "with --workers, have each worker read and parse its own byte "
+            "range of uncompressed input files through a memory map"
+        ),
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--parallel-tables",
+        help=(
+            "convert the collision, party, and victim files at the same time, "
+            "each in its own process, then merge the results; with only csv, "
+            "arrow, or postgres outputs, each process writes its table's files"
+        ),
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--engine",
+        help=(
+            "how rows are converted: 'row' parses one row at a time (default), "
+            "'columnar' converts large batches column by column"
+        ),
+        choices=ENGINES,
+        default="row",
+    )
+    argparser.add_argument(
+        "--cache-stats",
+        help="print the hit rate of each column's value cache after each table",
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--load-profile",
+        help=(
+            "SQLite settings used while loading: 'fast' (default) for local "
+            "disks, 'low-memory' for hosts short on RAM, 'safe' to survive a "
+            "crash"
+        ),
+        choices=tuple(LOAD_PROFILES),
+        default=DEFAULT_LOAD_PROFILE,
+    )
+    argparser.add_argument(
+        "--batch-size",
+        help="rows inserted per transaction (default: set by the load profile)",
+        type=_positive_int,
+    )
+    argparser.add_argument(
+        "--defer-unique",
+        help=(
+            "load collisions without a primary key and remove duplicate case "
+            "IDs in one sorted pass at the end; the collisions table is then "
+            "stored in case_id order rather than input order"
+        ),
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--index-plan",
+        help=(
+            "JSON file of extra indexes to build after loading, each with a "
+            "name, table, columns, and optionally unique"
+        ),
+    )
+    argparser.add_argument(
+        "--no-index",
+        help=(
+            "do not build any indexes, for staging builds; cannot be combined "
+            "with --index-plan"
+        ),
+        action="store_true",
+    )
+    argparser.add_argument(
+        "--metrics",
+        choices=METRICS_FORMATS,
+        help=(
+            "also report progress, throughput, and an ETA for each table as "
+            "'jsonl' (one JSON object per update) or 'prometheus' (a textfile "
+            "for the node exporter)"
+        ),
+    )
+    argparser.add_argument(
+        "--metrics-file",
+        help=(
+            "file to write --metrics to; JSON lines go to stdout if omitted, "
+            "a Prometheus textfile needs a file"
+        ),
+    )
+    argparser.add_argument(
+        "--profile",
+        metavar="JSON_FILE",
+        help=(
+            "time each stage of the conversion and the converters of sampled "
+            "rows, print the slowest to stderr, and write the raw timings to "
+            "JSON_FILE"
+        ),
+    )
+    argparser.add_argument(
+        "--profile-sample",
+        metavar="N",
+        type=_positive_int,
+        default=DEFAULT_SAMPLE_EVERY,
+        help=(
+            "with --profile, time the columns of one row in every N "
+            f"(default: {DEFAULT_SAMPLE_EVERY:,})"
+        ),
     )
 
     args = argparser.parse_args(argv)
+    if args.metrics == "prometheus" and args.metrics_file is None:
+        argparser.error("--metrics prometheus needs --metrics-file")
+    if args.mmap and args.workers == 1:
+        argparser.error("--mmap needs --workers of 2 or more")
+    if args.append and args.resume:
+        argparser.error("--append and --resume cannot be combined")
+    if args.no_index and args.index_plan is not None:
+        argparser.error("--no-index and --index-plan cannot be combined")
+    formats = args.format or ["sqlite"]
+    output_files = args.output_file or []
+    if len(output_files) > len(formats):
+        argparser.error("-o/--output-file is given more often than --format")
+    output_files += [DEFAULT_OUTPUTS[fmt] for fmt in formats[len(output_files) :]]
+    build_in = IN_MEMORY if args.in_memory else args.build_dir
+    if build_in is not None and (args.append or args.resume):
+        argparser.error(
+            "--in-memory and --build-dir cannot be combined with --append or --resume"
+        )
+
+    indexes: list[IndexSpec] = []
+    if not args.no_index:
+        indexes.extend(DEFAULT_INDEX_PLAN)
+        if args.index_plan is not None:
+            try:
+                indexes.extend(load_index_plan(args.index_plan))
+                validate_index_plan(indexes, table_columns())
+            except (OSError, ValueError) as e:
+                argparser.error(f"invalid index plan: {e}")
 
     try:
         convert_files(
             collision_file=args.collision_record,
             party_file=args.party_record,
             victim_file=args.victim_record,
-            output_file=args.output_file,
+            output_file=output_files[0],
             parse_errors=args.parse_error,
+            workers=args.workers,
+            mmap=args.mmap,
+            parallel_tables=args.parallel_tables,
+            engine=args.engine,
+            cache_stats=args.cache_stats,
+            load_profile=args.load_profile,
+            batch_size=args.batch_size,
+            defer_unique=args.defer_unique,
+            indexes=indexes,
+            profile_file=args.profile,
+            profile_sample_every=args.profile_sample,
+            metrics_format=args.metrics,
+            metrics_file=args.metrics_file,
+            append=args.append,
+            resume=args.resume,
+            build_in=build_in,
+            output_format=formats[0],
+            extra_outputs=list(zip(formats[1:], output_files[1:], strict=True)),
         )
-    except (FileExistsError, FileNotFoundError) as e:
+    except (FileExistsError, FileNotFoundError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
         raise SystemExit(1) from None
 
@@ -0,0 +1,59 @@
+"""Estimate whether a database can be built in memory or on a tmpfs.
+
+Building the database in RAM and writing it out in one sequential pass
+avoids the random page writes that are slow on network-attached storage,
+but needs room for the whole database, indexes included. The size is
+estimated from the sizes of the input files before the conversion starts.
+"""
+
+import os
+import shutil
+from collections.abc import Iterable
+from pathlib import Path
+
+from switrs_to_sqlite.open_record import is_compressed
+
+# Bytes of database, indexes included, per byte of uncompressed input. The
+# mapped codes are stored as longer descriptions, and synthetic files of
+# 211 MB convert to a 494 MB database; rounded up to leave headroom.
+DATABASE_BYTES_PER_INPUT_BYTE = 3.0
+
+# The assumed compression ratio of compressed inputs, whose uncompressed
+# size cannot be known without decompressing them. CSV text usually
+# compresses by less than this, so the estimate errs on the large side.
+COMPRESSION_RATIO = 10.0
+
+_MEMINFO = Path("/proc/meminfo")
+
+
+def estimate_database_bytes(input_files: Iterable[str]) -> int:
+    """Estimate the size of the database converted from the input files."""
+    input_bytes = 0.0
+    for file_name in input_files:
+        size = Path(file_name).stat().st_size
+        input_bytes += size * COMPRESSION_RATIO if is_compressed(file_name) else size
+    return int(input_bytes * DATABASE_BYTES_PER_INPUT_BYTE)
+
+
+def available_memory() -> int | None:
+    """Return the bytes of RAM available without swapping, or None if unknown.
+
+    On Linux this is MemAvailable, which counts the page cache that can be
+    reclaimed; elsewhere only free pages are counted.
+    """
+    try:
+        with _MEMINFO.open() as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def available_space(directory: str) -> int:
+    """Return the free bytes on the filesystem holding directory."""
+    return shutil.disk_usage(directory).free
@@ -0,0 +1,257 @@
+"""Merge snapshot databases of several SWITRS releases into one.
+
+Each release of the SWITRS files covers the collisions the CHP had on record
+when it was made, and a case may be revised or dropped between releases. The
+merged database holds every case in any of the snapshots, each taken from
+the newest snapshot that has it, with that snapshot's parties and victims.
+
+Cases are resolved in one pass: the case IDs of every snapshot, newest
+first, go into a temporary table keyed by case_id, where the first snapshot
+to claim a case keeps it. Each snapshot is then scanned once per table and
+its winning rows copied into the output in bulk.
+"""
+
+import argparse
+import contextlib
+import sqlite3
+import sys
+import time
+from collections.abc import Generator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from switrs_to_sqlite import __version__
+from switrs_to_sqlite.database import check_tables, configure_connection, table_columns
+from switrs_to_sqlite.index_plan import (
+    DEFAULT_INDEX_PLAN,
+    IndexSpec,
+    build_indexes,
+    order_index_plan,
+)
+from switrs_to_sqlite.load_profiles import DEFAULT_LOAD_PROFILE, LOAD_PROFILES
+from switrs_to_sqlite.parsers import (
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+
+# Tables in the order they are copied
+_TABLES = ("collisions", "parties", "victims")
+
+
+@dataclass(frozen=True)
+class SourceCounts:
+    """The rows taken from one snapshot database.
+
+    Attributes:
+        file_name: The snapshot database.
+        collisions: The number of collisions taken from it.
+        parties: The number of parties taken from it.
+        victims: The number of victims taken from it.
+    """
+
+    file_name: str
+    collisions: int
+    parties: int
+    victims: int
+
+
+@contextlib.contextmanager
+def _attached(con: sqlite3.Connection, file_name: str) -> Generator[str, None, None]:
+    """Attach a snapshot database as 'snapshot'.
+
+    One snapshot is attached at a time, so any number can be merged without
+    reaching SQLite's limit on attached databases.
+    """
+    # ATTACH cannot run inside a transaction
+    con.commit()
+    try:
+        con.execute("ATTACH DATABASE ? AS snapshot", (file_name,))
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"'{file_name}' is not a SQLite database: {e}") from None
+    try:
+        yield "snapshot"
+    finally:
+        con.commit()
+        con.execute("DETACH DATABASE snapshot")
+
+
+def _copy_rows(con: sqlite3.Connection, table: str, source: int) -> int:
+    """Copy the rows of the cases a snapshot won into the output table.
+
+    Parties and victims are renumbered after the rows already copied, as
+    every snapshot numbers its own from one.
+
+    Returns:
+        The number of rows copied.
+    """
+    if table == "collisions":
+        select = "SELECT s.*"
+        target = "main.collisions"
+        order = "s.rowid"
+    else:
+        columns = table_columns()[table][1:]
+        target = f"main.{table} ({', '.join(columns)})"
+        select = "SELECT " + ", ".join(f"s.{col}" for col in columns)
+        order = "s.id"
+    con.execute("BEGIN")
+    copied = con.execute(
+        f"INSERT INTO {target} {select} FROM snapshot.{table} AS s "
+        "JOIN temp.case_sources AS k ON k.case_id = s.case_id "
+        f"WHERE k.source = ? ORDER BY {order}",
+        (source,),
+    ).rowcount
+    con.commit()
+    return copied
+
+
+def merge_databases(
+    snapshot_files: Sequence[str],
+    output_file: str,
+    *,
+    load_profile: str = DEFAULT_LOAD_PROFILE,
+    indexes: Sequence[IndexSpec] = DEFAULT_INDEX_PLAN,
+) -> list[SourceCounts]:
+    """Merge snapshot databases, keeping each case from the newest snapshot.
+
+    Args:
+        snapshot_files: Databases written by switrs_to_sqlite, oldest
+            first. A case in several snapshots is taken, with its parties
+            and victims, from the last one listed.
+        output_file: Path for the merged SQLite database.
+        load_profile: The name of the SQLite load profile to use, one of
+            LOAD_PROFILES.
+        indexes: The indexes to build once every table is copied. Defaults
+            to the case_id indexes on parties and victims.
+
+    Returns:
+        The rows taken from each snapshot, in the order given.
+
+    Raises:
+        FileExistsError: If output_file already exists.
+        FileNotFoundError: If a snapshot does not exist.
+        ValueError: If no snapshots are given, the load profile is unknown,
+            or a snapshot does not have the tables this version writes.
+    """
+    if not snapshot_files:
+        raise ValueError("at least one snapshot database is needed")
+    if load_profile not in LOAD_PROFILES:
+        raise ValueError(
+            f"load_profile must be one of {tuple(LOAD_PROFILES)}, got '{load_profile}'"
+        )
+    for snapshot_file in snapshot_files:
+        if not Path(snapshot_file).exists():
+            raise FileNotFoundError(f"Snapshot database not found: '{snapshot_file}'")
+    if Path(output_file).exists():
+        raise FileExistsError(
+            f"Output file '{output_file}' already exists. Remove it before rerunning."
+        )
+
+    profile = LOAD_PROFILES[load_profile]
+    with contextlib.closing(sqlite3.connect(output_file)) as con, con:
+        configure_connection(con, profile)
+        for parser_factory in (
+            make_collision_parser,
+            make_party_parser,
+            make_victim_parser,
+        ):
+            con.execute(parser_factory().create_table_statement())
+        con.execute(
+            "CREATE TEMP TABLE case_sources "
+            "(case_id TEXT PRIMARY KEY, source INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+        print("Resolving case IDs...", file=sys.stderr)
+        start = time.perf_counter()
+        for source in reversed(range(len(snapshot_files))):
+            with _attached(con, snapshot_files[source]) as schema:
+                check_tables(con, snapshot_files[source], schema)
+                con.execute("BEGIN")
+                con.execute(
+                    "INSERT OR IGNORE INTO temp.case_sources "
+                    "SELECT case_id, ? FROM snapshot.collisions "
+                    "WHERE case_id IS NOT NULL",
+                    (source,),
+                )
+                con.commit()
+        cases = con.execute("SELECT COUNT(*) FROM temp.case_sources").fetchone()[0]
+        print(
+            f"  {cases:,} cases in {time.perf_counter() - start:,.1f}s",
+            file=sys.stderr,
+        )
+
+        counts = []
+        for source, snapshot_file in enumerate(snapshot_files):
+            print(f"Copying from '{snapshot_file}'...", file=sys.stderr)
+            with _attached(con, snapshot_file):
+                copied = {table: _copy_rows(con, table, source) for table in _TABLES}
+            counts.append(SourceCounts(snapshot_file, **copied))
+        con.execute("DROP TABLE temp.case_sources")
+
+        build_indexes(con, order_index_plan(indexes, _TABLES))
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    """CLI entry point for merging snapshot databases."""
+    argparser = argparse.ArgumentParser(
+        description=(
+            "Merge SWITRS databases built from several releases, taking each "
+            "case from the newest release that has it"
+        )
+    )
+    argparser.add_argument(
+        "--version",
+        action="version",
+        version=f"%(prog)s {__version__}",
+    )
+    argparser.add_argument(
+        "snapshots",
+        nargs="+",
+        help=(
+            "databases written by switrs_to_sqlite, oldest release first; a "
+            "case in several of them is taken from the last one listed"
+        ),
+    )
+    argparser.add_argument(
+        "-o",
+        "--output-file",
+        help="file to save the merged database to",
+        default="switrs.sqlite3",
+    )
+    argparser.add_argument(
+        "--load-profile",
+        help="SQLite settings used while writing, as for switrs_to_sqlite",
+        choices=tuple(LOAD_PROFILES),
+        default=DEFAULT_LOAD_PROFILE,
+    )
+    argparser.add_argument(
+        "--no-index",
+        help="do not build any indexes",
+        action="store_true",
+    )
+    args = argparser.parse_args(argv)
+
+    try:
+        counts = merge_databases(
+            args.snapshots,
+            args.output_file,
+            load_profile=args.load_profile,
+            indexes=() if args.no_index else DEFAULT_INDEX_PLAN,
+        )
+    except (FileExistsError, FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1) from None
+
+    print(f"Rows taken from each snapshot into '{args.output_file}':")
+    width = max(len(count.file_name) for count in counts)
+    print(f"  {'snapshot':<{width}} {'collisions':>12} {'parties':>12} {'victims':>12}")
+    for count in counts:
+        print(
+            f"  {count.file_name:<{width}} {count.collisions:>12,} "
+            f"{count.parties:>12,} {count.victims:>12,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
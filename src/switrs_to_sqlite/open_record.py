@@ -1,23 +1,754 @@
+import bz2
+import functools
 import gzip
+import importlib
+import io
+import lzma
+import mmap
+import os
+import queue
+import struct
+import threading
+import zipfile
+import zlib
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TextIO
+from types import ModuleType
+from typing import IO, Any, BinaryIO, Protocol
 
 _GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+_BZ2_MAGIC = b"BZh"
+_ZIP_MAGIC = b"PK\x03\x04"
+_COMPRESSED_MAGICS = (_GZIP_MAGIC, _ZSTD_MAGIC, _XZ_MAGIC, _BZ2_MAGIC, _ZIP_MAGIC)
 
+_UTF8_BOM = b"\xef\xbb\xbf"
 
-def open_record_file(file_name: str, errors: str | None = None) -> TextIO:
-    """Open a Record file, detecting gzip by magic bytes.
+# zlib-compatible modules with faster inflate, in order of preference: the
+# zlib-ng and ISA-L (python-isal) bindings
+_ZLIB_BACKENDS = ("zlib_ng.zlib_ng", "isal.isal_zlib")
+
+# zstd modules, in order of preference: the standard library's (Python 3.14
+# and later) and the zstandard package
+_ZSTD_BACKENDS = ("compression.zstd", "zstandard")
+
+# Bytes of compressed input read, and the most bytes of output inflated, in
+# one step of the decompression thread
+_INFLATE_BLOCK_SIZE = 1 << 20
+
+# Number of inflated blocks that can wait for the reader. Bounds the memory
+# used when decompression runs ahead of parsing.
+_QUEUE_BLOCKS = 8
+
+# How often a blocked decompression thread checks whether to stop
+_PUT_TIMEOUT_SECONDS = 0.1
+
+# Bytes decoded at a time by RecordFile. TextIOWrapper's default of 8 KiB
+# makes splitting the text into lines markedly slower than larger chunks.
+_TEXT_CHUNK_SIZE = 1 << 16
+
+# Passed to decompressobj() to read gzip headers and trailers
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# The FEXTRA flag of a gzip header, set when it has extra fields
+_GZIP_FEXTRA = 0x04
+
+# Number of threads decompressing independent frames at once
+_FRAME_WORKERS = min(8, os.cpu_count() or 1)
+
+# Adjacent frames are decompressed as one task until it holds this many
+# compressed bytes, so that small frames, like the 64 KiB members of a BGZF
+# file, do not each cost a task
+_FRAME_TASK_SIZE = 1 << 20
+
+# The largest zstd frame, decompressed, that is read whole to decompress it
+# on its own thread. Up to two tasks per thread are held in memory, so files
+# with larger frames, or frames that do not record their size, such as the
+# single frame zstd writes by default, are read as a stream instead.
+_MAX_FRAME_CONTENT_SIZE = 1 << 23
+
+# Skippable zstd frames have magic numbers 0x184D2A50 to 0x184D2A5F
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+_ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+
+# The longest zstd frame header: magic number, frame header descriptor,
+# window descriptor, dictionary ID, and frame content size
+_ZSTD_MAX_HEADER = 4 + 1 + 1 + 4 + 8
+
+# zstd block types
+_ZSTD_RLE_BLOCK = 1
+_ZSTD_RESERVED_BLOCK = 3
+
+# Bytes of a memory-mapped file copied at a time while counting its quotes
+_SCAN_BLOCK_SIZE = 1 << 20
+
+
+class RecordFileError(ValueError):
+    """A Record file that is compressed or archived in a way that cannot be read."""
+
+
+class _Decompressor(Protocol):
+    """A zlib-style decompression object for a single frame or member."""
+
+    @property
+    def eof(self) -> bool: ...
+
+    @property
+    def unused_data(self) -> bytes: ...
+
+    def decompress(self, data: bytes) -> bytes: ...
+
+
+@functools.cache
+def zlib_backend() -> ModuleType:
+    """Return the fastest installed zlib-compatible module for inflating."""
+    for name in _ZLIB_BACKENDS:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return zlib
+
+
+@functools.cache
+def zstd_backend() -> ModuleType | None:
+    """Return the installed zstd module, or None if there is none."""
+    for name in _ZSTD_BACKENDS:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return None
+
+
+class _BlockReader(io.RawIOBase):
+    """A raw stream over blocks of decompressed output.
+
+    Subclasses return the next block from _next_block(), and set _position
+    to how far into the raw file the compressed input of the blocks read so
+    far reaches.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._pending = memoryview(b"")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def raw_position(self) -> int:
+        """Return how much of the raw file has been decompressed and read.
+
+        Decompression reads ahead of the reader, so this lags the position
+        of the raw file itself.
+        """
+        return self._position
+
+    def readinto(self, buffer: "memoryview | bytearray") -> int:  # type: ignore[override]
+        """Copy decompressed bytes into buffer, waiting for them if needed."""
+        while not self._pending:
+            block = self._next_block()
+            if block is None:
+                return 0
+            self._pending = memoryview(block)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _next_block(self) -> bytes | None:
+        """Return the next block of output, or None at the end of the file."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class _StreamFormat:
+    """How to decompress a stream of frames of one compression format.
+
+    Attributes:
+        decompressobj: Returns a zlib-style decompression object for one
+            frame, with decompress(), eof, and unused_data.
+        bounded: Whether decompress() takes a max_length, leaving the input
+            it has not used in unconsumed_tail, as zlib's does. Unbounded
+            decompressors inflate their whole input at once.
+        padded: Whether frames may be separated by zero bytes.
+    """
+
+    decompressobj: Callable[[], Any]
+    bounded: bool
+    padded: bool
+
+
+def _gzip_format() -> _StreamFormat:
+    return _StreamFormat(
+        functools.partial(zlib_backend().decompressobj, _GZIP_WBITS),
+        bounded=True,
+        padded=True,
+    )
+
+
+def _decompress_stream(
+    raw: BinaryIO, stream_format: _StreamFormat
+) -> Iterator[tuple[bytes, int]]:
+    """Decompress every frame of raw, one block of input at a time.
+
+    Yields:
+        Blocks of decompressed output, each with the position in raw of the
+        compressed input consumed to produce it.
+
+    Raises:
+        EOFError: If the last frame is incomplete.
+    """
+    decompressor = None
+    data = b""
+    while True:
+        if not data:
+            data = raw.read(_INFLATE_BLOCK_SIZE)
+            if not data:
+                break
+        if decompressor is None:
+            if stream_format.padded:
+                data = data.lstrip(b"\x00")
+                if not data:
+                    continue
+            decompressor = stream_format.decompressobj()
+        if stream_format.bounded:
+            out = decompressor.decompress(data, _INFLATE_BLOCK_SIZE)
+        else:
+            out = decompressor.decompress(data)
+        if decompressor.eof:
+            data = decompressor.unused_data
+            decompressor = None
+        elif stream_format.bounded:
+            data = decompressor.unconsumed_tail
+        else:
+            data = b""
+        if out:
+            yield out, raw.tell() - len(data)
+
+    if decompressor is not None:
+        if stream_format.bounded:
+            out = decompressor.flush()
+            if out:
+                yield out, raw.tell()
+        if not decompressor.eof:
+            raise EOFError(
+                "Compressed file ended before the end-of-stream marker was reached"
+            )
+
+
+class _StreamReader(_BlockReader):
+    """Decompresses a stream of frames on the calling thread."""
+
+    def __init__(self, raw: BinaryIO, stream_format: _StreamFormat) -> None:
+        super().__init__()
+        self._blocks = _decompress_stream(raw, stream_format)
+
+    def _next_block(self) -> bytes | None:
+        block = next(self._blocks, None)
+        if block is None:
+            return None
+        data, self._position = block
+        return data
+
+
+class _ThreadedStreamReader(_BlockReader):
+    """Decompresses a stream of frames on a background thread.
+
+    The thread reads the compressed file, decompresses it, and hands blocks
+    of output to the reader through a bounded queue. zlib and the zstd
+    libraries release the GIL while decompressing, so decompression
+    overlaps with decoding, CSV splitting, and parsing on the main thread.
+    """
+
+    def __init__(self, raw: BinaryIO, stream_format: _StreamFormat) -> None:
+        super().__init__()
+        self._raw = raw
+        self._format = stream_format
+        # Each block is queued with the position in the raw file of the
+        # compressed input consumed to produce it
+        self._blocks: queue.Queue[tuple[bytes, int] | BaseException | None] = (
+            queue.Queue(maxsize=_QUEUE_BLOCKS)
+        )
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(
+            target=self._decompress, name="decompress", daemon=True
+        )
+        self._thread.start()
+
+    def _next_block(self) -> bytes | None:
+        if self._finished:
+            return None
+        block = self._blocks.get()
+        if block is None:
+            self._finished = True
+            return None
+        if isinstance(block, BaseException):
+            self._finished = True
+            raise block
+        data, self._position = block
+        return data
+
+    def close(self) -> None:
+        """Stop the decompression thread and wait for it to exit."""
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+    def _put(self, item: tuple[bytes, int] | BaseException | None) -> bool:
+        """Queue an item, giving up if the reader has been closed."""
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=_PUT_TIMEOUT_SECONDS)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _decompress(self) -> None:
+        """Decompress the raw file onto the queue."""
+        try:
+            for block in _decompress_stream(self._raw, self._format):
+                if not self._put(block):
+                    return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(None)
+
+
+def _decompress_frames(
+    data: bytes, decompressobj: Callable[[], _Decompressor]
+) -> bytes:
+    """Decompress one or more complete frames that follow each other."""
+    out = []
+    while data:
+        decompressor = decompressobj()
+        out.append(decompressor.decompress(data))
+        if not decompressor.eof:
+            raise EOFError(
+                "Compressed frame ended before the end-of-stream marker was reached"
+            )
+        data = decompressor.unused_data
+    return b"".join(out)
+
+
+def _frame_tasks(frames: Sequence[tuple[int, int]]) -> Iterator[tuple[int, int]]:
+    """Group adjacent frames into tasks of up to _FRAME_TASK_SIZE bytes."""
+    task_offset, task_length = frames[0]
+    for offset, length in frames[1:]:
+        if (
+            offset == task_offset + task_length
+            and task_length + length <= _FRAME_TASK_SIZE
+        ):
+            task_length += length
+            continue
+        yield task_offset, task_length
+        task_offset, task_length = offset, length
+    yield task_offset, task_length
+
+
+class _ParallelFrameReader(_BlockReader):
+    """Decompresses the independent frames of a file on a pool of threads.
+
+    The frames are read from the raw file in order and decompressed by up
+    to _FRAME_WORKERS threads at once, and their output is returned in
+    order. zlib and the zstd libraries release the GIL while decompressing,
+    so the frames are decompressed in parallel. At most two tasks per
+    thread are in flight, which bounds the memory used.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        frames: Sequence[tuple[int, int]],
+        decompressobj: Callable[[], _Decompressor],
+    ) -> None:
+        """Start decompressing the first frames.
+
+        Args:
+            raw: The compressed file.
+            frames: The offset and length in raw of every frame, in order.
+            decompressobj: Returns a decompression object for one frame.
+        """
+        super().__init__()
+        self._raw = raw
+        self._tasks = _frame_tasks(frames)
+        self._decompressobj = decompressobj
+        self._executor = ThreadPoolExecutor(
+            max_workers=_FRAME_WORKERS, thread_name_prefix="decompress"
+        )
+        self._running: deque[tuple[Future[bytes], int]] = deque()
+        self._submit()
+
+    def _submit(self) -> None:
+        """Start decompressing frames until enough tasks are in flight."""
+        while len(self._running) < 2 * _FRAME_WORKERS:
+            task = next(self._tasks, None)
+            if task is None:
+                return
+            offset, length = task
+            self._raw.seek(offset)
+            data = self._raw.read(length)
+            future = self._executor.submit(
+                _decompress_frames, data, self._decompressobj
+            )
+            self._running.append((future, offset + length))
+
+    def _next_block(self) -> bytes | None:
+        if not self._running:
+            return None
+        future, end = self._running.popleft()
+        block = future.result()
+        self._position = end
+        self._submit()
+        return block
+
+    def close(self) -> None:
+        """Cancel the frames not yet decompressed and stop the threads."""
+        if not self.closed:
+            for future, _ in self._running:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+        super().close()
+
+
+def _bgzf_members(raw: BinaryIO, size: int) -> list[tuple[int, int]] | None:
+    """Return the offset and length of every member of a BGZF file.
+
+    BGZF files, written by bgzip, are gzip files whose members record their
+    own compressed length in a "BC" extra field. Other gzip files have to
+    be inflated to find where each member ends, so None is returned for
+    them.
+    """
+    members = []
+    offset = 0
+    while offset < size:
+        raw.seek(offset)
+        header = raw.read(12)
+        if (
+            len(header) < 12
+            or header[:3] != _GZIP_MAGIC + b"\x08"
+            or not header[3] & _GZIP_FEXTRA
+        ):
+            return None
+        (extra_length,) = struct.unpack_from("<H", header, 10)
+        extra = raw.read(extra_length)
+        member_length = None
+        position = 0
+        while position + 4 <= len(extra):
+            (field_length,) = struct.unpack_from("<H", extra, position + 2)
+            field = extra[position + 4 : position + 4 + field_length]
+            if extra[position : position + 2] == b"BC" and len(field) == 2:
+                member_length = struct.unpack("<H", field)[0] + 1
+            position += 4 + field_length
+        if member_length is None:
+            return None
+        members.append((offset, member_length))
+        offset += member_length
+    return members if offset == size else None
+
+
+def _zstd_frames(raw: BinaryIO, size: int) -> list[tuple[int, int]] | None:
+    """Return the offset and length of every zstd frame in raw.
+
+    Only the frame and block headers are read. Skippable frames are left
+    out. Returns None if the file is not a sequence of complete frames, in
+    which case it is read as a stream and the decompressor reports the
+    problem, or if a frame does not record its decompressed size or holds
+    more than _MAX_FRAME_CONTENT_SIZE bytes.
+    """
+    frames = []
+    offset = 0
+    while offset < size:
+        raw.seek(offset)
+        header = raw.read(_ZSTD_MAX_HEADER)
+        if len(header) < 8:
+            return None
+        (magic,) = struct.unpack_from("<I", header)
+        if magic & _ZSTD_SKIPPABLE_MASK == _ZSTD_SKIPPABLE_MAGIC:
+            (skip_length,) = struct.unpack_from("<I", header, 4)
+            offset += 8 + skip_length
+            continue
+        if header[:4] != _ZSTD_MAGIC:
+            return None
+
+        descriptor = header[4]
+        content_size_flag = descriptor >> 6
+        single_segment = descriptor >> 5 & 1
+        checksum = descriptor >> 2 & 1
+        size_offset = 5 + (1 - single_segment) + (0, 1, 2, 4)[descriptor & 3]
+        size_length = (single_segment, 2, 4, 8)[content_size_flag]
+        if size_length == 0 or len(header) < size_offset + size_length:
+            return None
+        content_size = int.from_bytes(
+            header[size_offset : size_offset + size_length], "little"
+        )
+        # A two-byte size is stored less 256
+        content_size += 256 if size_length == 2 else 0
+        if content_size > _MAX_FRAME_CONTENT_SIZE:
+            return None
+        position = offset + size_offset + size_length
+        while True:
+            raw.seek(position)
+            block = raw.read(3)
+            if len(block) < 3:
+                return None
+            block_header = int.from_bytes(block, "little")
+            block_type = block_header >> 1 & 3
+            if block_type == _ZSTD_RESERVED_BLOCK:
+                return None
+            block_size = 1 if block_type == _ZSTD_RLE_BLOCK else block_header >> 3
+            position += 3 + block_size
+            if block_header & 1:
+                break
+        position += 4 * checksum
+        if position > size:
+            return None
+        frames.append((offset, position - offset))
+        offset = position
+    return frames if offset == size else None
+
+
+def _zstd_decompressobj(zstd: ModuleType) -> Callable[[], _Decompressor]:
+    """Return a factory of single-frame zstd decompression objects."""
+    if zstd.__name__ == "zstandard":
+        return lambda: zstd.ZstdDecompressor().decompressobj()
+    return zstd.ZstdDecompressor  # type: ignore[no-any-return]
+
+
+def _open_zip_member(raw: BinaryIO, file_name: str) -> IO[bytes]:
+    """Open the only file in a zip archive."""
+    archive = zipfile.ZipFile(raw)
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if len(members) != 1:
+        names = [info.filename for info in members]
+        raise RecordFileError(
+            f"'{file_name}' must contain exactly one file, found {names}"
+        )
+    return archive.open(members[0])
+
+
+def _decompressed(
+    raw: BinaryIO, file_name: str, size: int, threaded: bool
+) -> tuple[IO[bytes] | gzip.GzipFile, Callable[[], int] | None]:
+    """Return the decompressed contents of raw, and their raw position.
+
+    The position is None when the stream tracks the raw file as it reads,
+    so that raw.tell() is already accurate.
+    """
+    magic = raw.read(len(_XZ_MAGIC))
+    raw.seek(0)
+    reader: _BlockReader
+    if magic.startswith(_GZIP_MAGIC):
+        if not threaded:
+            return gzip.GzipFile(fileobj=raw, mode="rb"), None
+        members = _bgzf_members(raw, size)
+        raw.seek(0)
+        if members is not None and len(members) > 1:
+            reader = _ParallelFrameReader(raw, members, _gzip_format().decompressobj)
+        else:
+            reader = _ThreadedStreamReader(raw, _gzip_format())
+    elif magic.startswith(_ZSTD_MAGIC):
+        zstd = zstd_backend()
+        if zstd is None:
+            raise RecordFileError(
+                f"'{file_name}' is compressed with zstd; reading it needs "
+                "Python 3.14 or later, or the zstandard package"
+            )
+        zstd_format = _StreamFormat(
+            _zstd_decompressobj(zstd), bounded=False, padded=False
+        )
+        if not threaded:
+            reader = _StreamReader(raw, zstd_format)
+        else:
+            frames = _zstd_frames(raw, size)
+            raw.seek(0)
+            if frames is not None and len(frames) > 1:
+                reader = _ParallelFrameReader(raw, frames, zstd_format.decompressobj)
+            else:
+                reader = _ThreadedStreamReader(raw, zstd_format)
+    elif magic.startswith(_XZ_MAGIC):
+        return lzma.LZMAFile(raw), None
+    elif magic.startswith(_BZ2_MAGIC):
+        return bz2.BZ2File(raw), None
+    elif magic.startswith(_ZIP_MAGIC):
+        return _open_zip_member(raw, file_name), None
+    else:
+        return raw, None
+    return io.BufferedReader(reader, buffer_size=_INFLATE_BLOCK_SIZE), (
+        reader.raw_position
+    )
+
+
+def _count_quotes(mapped: mmap.mmap, start: int, end: int) -> int:
+    """Count the double quotes between two offsets of a mapped file."""
+    return sum(
+        mapped[i : min(i + _SCAN_BLOCK_SIZE, end)].count(b'"')
+        for i in range(start, end, _SCAN_BLOCK_SIZE)
+    )
+
+
+def is_compressed(file_name: str) -> bool:
+    """Return whether a Record file is in one of the compressed formats read."""
+    with Path(file_name).open("rb") as f:
+        return f.read(len(_XZ_MAGIC)).startswith(_COMPRESSED_MAGICS)
+
+
+def split_record_file(file_name: str, range_size: int) -> list[tuple[int, int]] | None:
+    """Split an uncompressed Record file into byte ranges of whole records.
+
+    The file is memory-mapped and cut at the first newline after every
+    range_size bytes that is outside a quoted field, so a range can be
+    read and parsed on its own. A newline is outside quotes when the number
+    of double quotes before it is even, which holds for files that quote
+    fields as the CHP files do: quotes open and close fields, and quotes
+    inside fields are doubled.
 
     Args:
-        file_name: The name of a file. Gzip files are detected by the
-            two-byte magic number, not the file extension.
-        errors: How to handle Unicode decoding errors (passed to open/gzip.open).
+        file_name: The name of the file.
+        range_size: The approximate number of bytes in each range.
+
+    Returns:
+        The start and end offset of each range, in order. The first range
+        is the header row, after any byte order mark. None if the file is
+        compressed or empty, and so cannot be split.
+
+    Raises:
+        ValueError: If range_size is not positive.
     """
+    if range_size < 1:
+        raise ValueError(f"range_size must be at least 1, got {range_size}")
     path = Path(file_name)
     with path.open("rb") as f:
-        magic = f.read(2)
+        magic = f.read(len(_XZ_MAGIC))
+        if not magic or magic.startswith(_COMPRESSED_MAGICS):
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            start = len(_UTF8_BOM) if magic.startswith(_UTF8_BOM) else 0
+            ranges = []
+            # Quotes are counted once, up to scanned
+            scanned = start
+            quotes = 0
+            # The header is the first range
+            target = start
+            while start < size:
+                end = size
+                newline = mapped.find(b"\n", target)
+                while newline != -1:
+                    quotes += _count_quotes(mapped, scanned, newline)
+                    scanned = newline
+                    if quotes % 2 == 0:
+                        end = newline + 1
+                        break
+                    newline = mapped.find(b"\n", newline + 1)
+                ranges.append((start, end))
+                start = end
+                target = max(start + range_size - 1, scanned + 1)
+    return ranges
+
+
+def read_record_range(
+    file_name: str, start: int, end: int, errors: str | None = None
+) -> io.StringIO:
+    """Return the text of a range of an uncompressed Record file.
+
+    The range is read through a memory map rather than a file buffer, and
+    newlines are translated as they are when reading the whole file.
+
+    Args:
+        file_name: The name of the file.
+        start: The offset of the first byte of the range.
+        end: The offset just past the last byte of the range.
+        errors: How to handle Unicode decoding errors.
+    """
+    with (
+        Path(file_name).open("rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+    ):
+        text = mapped[start:end].decode("utf-8", errors or "strict")
+    return io.StringIO(text, newline=None)
+
 
-    # Use utf-8-sig to automatically handle BOM if present
-    if magic == _GZIP_MAGIC:
-        return gzip.open(file_name, "rt", encoding="utf-8-sig", errors=errors)
-    return path.open(encoding="utf-8-sig", errors=errors)
+class RecordFile(io.TextIOWrapper):
+    """The decoded text of a Record file, which also tracks the raw file.
+
+    Reading the text moves through the file on disk, which for a compressed
+    file is not the same as the position in the text. raw_position() and
+    raw_size let progress through either kind of file be measured.
+
+    Attributes:
+        raw_size: The size of the file on disk in bytes.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        binary: IO[bytes] | gzip.GzipFile,
+        raw_size: int,
+        errors: str | None = None,
+        position: Callable[[], int] | None = None,
+    ) -> None:
+        # Use utf-8-sig to automatically handle BOM if present
+        super().__init__(binary, encoding="utf-8-sig", errors=errors)
+        # CPython's UTF-8 decoder copies runs of ASCII without decoding
+        # them, so larger chunks are all that is needed to make decoding
+        # the nearly all-ASCII files cheap
+        self._CHUNK_SIZE = _TEXT_CHUNK_SIZE
+        self._raw = raw
+        self._position = raw.tell if position is None else position
+        self.raw_size = raw_size
+
+    def raw_position(self) -> int:
+        """Return how many bytes of the file on disk have been read."""
+        return self._position()
+
+    def close(self) -> None:
+        """Close the text, and the file on disk beneath it."""
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def open_record_file(
+    file_name: str, errors: str | None = None, *, threaded: bool = True
+) -> RecordFile:
+    """Open a Record file, detecting compression by magic bytes.
+
+    Files compressed with gzip, zstd, xz, or bzip2, and zip archives holding
+    a single file, are decompressed as they are read, without writing the
+    decompressed file to disk.
+
+    Args:
+        file_name: The name of a file. Compression is detected by the
+            file's magic number, not its extension.
+        errors: How to handle Unicode decoding errors (passed to open/gzip.open).
+        threaded: Decompress on background threads: gzip files are inflated
+            on a thread, using zlib-ng or ISA-L if either is installed, and
+            the independent frames of zstd files and members of BGZF files
+            are decompressed in parallel. If False, every file is read on
+            the calling thread.
+
+    Raises:
+        RecordFileError: If the file is compressed with zstd and no zstd
+            module is installed, or is a zip archive that does not hold
+            exactly one file.
+    """
+    path = Path(file_name)
+    raw = path.open("rb")
+    try:
+        size = path.stat().st_size
+        binary, position = _decompressed(raw, file_name, size, threaded)
+        return RecordFile(raw, binary, size, errors=errors, position=position)
+    except BaseException:
+        raw.close()
+        raise
@@ -0,0 +1,221 @@
+"""Write the converted tables to Parquet files instead of SQLite.
+
+Each table is written to its own file, with the column types of
+arrow_tables. The rows of every table are grouped by the year of their
+collision: collisions by their collision_date, and parties and victims by
+the collision of their case. Each row group holds the rows of one year,
+oldest first, so a reader that filters on year can skip the others.
+
+Rows are parsed in input order, not by year, so each batch is converted to
+Arrow and spilled to an Arrow stream file per year. When the table is
+finished, the year files are read back in order and written out as row
+groups.
+"""
+
+import importlib
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from switrs_to_sqlite.arrow_tables import arrow_schema, record_batch, require_pyarrow
+from switrs_to_sqlite.index_plan import IndexSpec
+from switrs_to_sqlite.parsers import CSVParser
+
+# The most rows in a row group; a year with more rows is split into several
+ROW_GROUP_SIZE = 128 * 1024
+
+# The compression codec of the Parquet files
+COMPRESSION = "zstd"
+
+
+class YearGrouper:
+    """Groups the rows of one table by the year of their collision.
+
+    Collisions are grouped by collision_date, and their years recorded in
+    case_years. A collision whose case_id was already seen is dropped, as
+    the SQLite output keeps only the first row of each case. Parties and
+    victims are grouped by the year recorded for their case, so collisions
+    must be grouped first.
+
+    Attributes:
+        duplicates: The number of collisions dropped so far.
+    """
+
+    def __init__(
+        self, row_parser: CSVParser, case_years: dict[str, int | None]
+    ) -> None:
+        names = [column[0] for column in row_parser.columns]
+        self._case_index = names.index("case_id")
+        self._date_index = (
+            names.index("collision_date") if row_parser.has_primary_column else None
+        )
+        self._case_years = case_years
+        self.duplicates = 0
+
+    def group(self, rows: Sequence[Sequence[Any]]) -> dict[int | None, list[int]]:
+        """Return the positions of the rows of each year, in input order.
+
+        Rows whose collision year is unknown are grouped under None.
+        """
+        groups: dict[int | None, list[int]] = {}
+        case_years = self._case_years
+        case_index = self._case_index
+        date_index = self._date_index
+        for i, row in enumerate(rows):
+            case_id = row[case_index]
+            if date_index is None:
+                year = case_years.get(case_id)
+            else:
+                if case_id in case_years:
+                    self.duplicates += 1
+                    continue
+                date = row[date_index]
+                year = int(date[:4]) if date else None
+                if case_id is not None:
+                    case_years[case_id] = year
+            groups.setdefault(year, []).append(i)
+        return groups
+
+
+def _year_order(year: int | None) -> tuple[bool, int]:
+    """Sort key putting the years in order, and the unknown year last."""
+    return (year is None, year or 0)
+
+
+class ParquetTableWriter:
+    """Writes one table to a Parquet file, in row groups by collision year.
+
+    Args:
+        row_parser: The parser the table's rows come from.
+        path: The Parquet file to write.
+        spill_dir: An existing directory for the per-year stream files,
+            which are removed as they are written out.
+        case_years: The collision year of each case, shared by the writers
+            of every table; see YearGrouper.
+        row_group_size: The most rows in a row group.
+    """
+
+    def __init__(
+        self,
+        row_parser: CSVParser,
+        path: Path,
+        spill_dir: Path,
+        case_years: dict[str, int | None],
+        row_group_size: int = ROW_GROUP_SIZE,
+    ) -> None:
+        self._pa = require_pyarrow("Parquet")
+        self._pq = importlib.import_module("pyarrow.parquet")
+        self._table = row_parser.table_name
+        self._schema = arrow_schema(row_parser)
+        self._grouper = YearGrouper(row_parser, case_years)
+        self._path = path
+        self._spill_dir = spill_dir
+        self._row_group_size = row_group_size
+        # Parties and victims are numbered in input order, as SQLite does
+        self._next_id = None if row_parser.has_primary_column else 1
+        self._spills: dict[int | None, tuple[Any, Any]] = {}
+
+    @property
+    def duplicates(self) -> int:
+        """The number of collisions dropped for repeating a case_id."""
+        return self._grouper.duplicates
+
+    def _spill_path(self, year: int | None) -> Path:
+        return self._spill_dir / f"{self._table}_{year or 'unknown'}.arrows"
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Convert a batch of parsed rows and spill them to their year files."""
+        groups = self._grouper.group(rows)
+        batch = record_batch(self._schema, rows, self._next_id)
+        if self._next_id is not None:
+            self._next_id += len(rows)
+        for year, positions in groups.items():
+            if year not in self._spills:
+                sink = self._pa.OSFile(str(self._spill_path(year)), "wb")
+                self._spills[year] = (sink, self._pa.ipc.new_stream(sink, self._schema))
+            if len(positions) < len(rows):
+                part = batch.take(self._pa.array(positions, type=self._pa.int32()))
+            else:
+                part = batch
+            self._spills[year][1].write_batch(part)
+
+    def close(self) -> None:
+        """Write the spilled rows to the Parquet file, oldest year first."""
+        for sink, stream in self._spills.values():
+            stream.close()
+            sink.close()
+        with self._pq.ParquetWriter(
+            str(self._path), self._schema, compression=COMPRESSION
+        ) as writer:
+            for year in sorted(self._spills, key=_year_order):
+                spill_path = self._spill_path(year)
+                with self._pa.memory_map(str(spill_path)) as source:
+                    self._write_row_groups(writer, self._pa.ipc.open_stream(source))
+                spill_path.unlink()
+        self._spills.clear()
+
+    def _write_row_groups(self, writer: Any, batches: Any) -> None:
+        """Write the batches of one year as row groups of row_group_size rows.
+
+        Only the last row group of the year may be smaller, so row groups
+        never mix years.
+        """
+        size = self._row_group_size
+        pending: list[Any] = []
+        pending_rows = 0
+        for batch in batches:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= size:
+                table = self._pa.Table.from_batches(pending, schema=self._schema)
+                full = pending_rows - pending_rows % size
+                writer.write_table(table.slice(0, full), row_group_size=size)
+                rest = table.slice(full)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+        if pending_rows:
+            table = self._pa.Table.from_batches(pending, schema=self._schema)
+            writer.write_table(table, row_group_size=size)
+
+
+class ParquetSink:
+    """Writes each table to a Parquet file in a new directory.
+
+    The writers share the collision year of each case, and spill their rows
+    to a scratch directory inside the output, which is removed when the sink
+    is closed.
+
+    Args:
+        directory: The directory to create, which must not exist.
+        row_group_size: The most rows in a row group.
+
+    Raises:
+        ValueError: If pyarrow is not installed.
+    """
+
+    def __init__(self, directory: Path, row_group_size: int = ROW_GROUP_SIZE) -> None:
+        require_pyarrow("Parquet")
+        directory.mkdir()
+        self._directory = directory
+        self._spill_dir = tempfile.TemporaryDirectory(prefix=".spill.", dir=directory)
+        self._case_years: dict[str, int | None] = {}
+        self._row_group_size = row_group_size
+
+    def open_table(self, row_parser: CSVParser) -> ParquetTableWriter:
+        """Return the writer of the Parquet file of row_parser's table."""
+        return ParquetTableWriter(
+            row_parser,
+            self._directory / f"{row_parser.table_name}.parquet",
+            Path(self._spill_dir.name),
+            self._case_years,
+            self._row_group_size,
+        )
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Do nothing, as Parquet files have no indexes."""
+        return {}
+
+    def close(self) -> None:
+        """Remove the scratch directory."""
+        self._spill_dir.cleanup()
@@ -1,6 +1,10 @@
-from collections.abc import Sequence
-from typing import Any
+import functools
+import itertools
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any, NamedTuple
 
+from switrs_to_sqlite.converters import convert
 from switrs_to_sqlite.datatypes import DATATYPE_MAP
 from switrs_to_sqlite.row_types import (
     COLLISION_ROW,
@@ -9,6 +13,83 @@ from switrs_to_sqlite.row_types import (
 )
 from switrs_to_sqlite.schema import Column
 
+# Number of distinct raw strings cached per column before the column is
+# treated as high-cardinality (case_id, officer_id, primary_road, ...) and its
+# cache is turned off
+DEFAULT_CACHE_ENTRIES = 1024
+
+# Returned by a cache lookup when the raw string has not been seen yet. A
+# sentinel is needed because None is a valid cached value.
+_MISS = object()
+
+
+class CacheStats(NamedTuple):
+    """Hit-rate statistics for one column's value cache."""
+
+    name: str
+    lookups: int
+    hits: int
+    entries: int
+    enabled: bool
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of lookups answered from the cache."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class ColumnCache:
+    """Memoizes the final value of one column for each raw CSV string.
+
+    Most columns only ever contain a handful of distinct strings, so the
+    converter and mapping only need to run once per string. Once more than
+    max_entries distinct strings have been seen, the column is treated as
+    high-cardinality: the cache is emptied and turned off.
+
+    Attributes:
+        name: The name of the column in the database.
+        values: Maps raw strings to their converted and mapped values.
+        max_entries: The most distinct strings to cache before turning off.
+        misses: The number of lookups that had to run the converter.
+        disabled_after: The number of rows parsed when the cache was turned
+            off, or None while it is on.
+    """
+
+    __slots__ = (
+        "_compute",
+        "_on_overflow",
+        "disabled_after",
+        "max_entries",
+        "misses",
+        "name",
+        "values",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        compute: Callable[[str], Any],
+        max_entries: int,
+        on_overflow: Callable[[], None],
+    ) -> None:
+        self.name = name
+        self.values: dict[str, Any] = {}
+        self.max_entries = max_entries
+        self.misses = 0
+        self.disabled_after: int | None = None
+        self._compute = compute
+        self._on_overflow = on_overflow
+
+    def miss(self, raw: str) -> Any:
+        """Compute the value for a raw string that is not in the cache."""
+        self.misses += 1
+        value = self._compute(raw)
+        if len(self.values) < self.max_entries:
+            self.values[raw] = value
+        else:
+            self._on_overflow()
+        return value
+
 
 class CSVParser:
     """The base class for all parsing classes.
@@ -46,12 +127,18 @@ class CSVParser:
     _resolved_indices: dict[str, int]
     _ordered_indices: list[int]
     _max_index: int
+    _row_function: Callable[[list[str]], list[Any]] | None
+    _row_function_source: str
+    max_cache_entries: int
+    _caches: list[ColumnCache | None]
+    _rows_parsed: int
 
     def __init__(
         self,
         parsing_table: Sequence[Column],
         table_name: str,
         has_primary_column: bool,
+        max_cache_entries: int = DEFAULT_CACHE_ENTRIES,
     ) -> None:
         """Set up the class and parse the CSV row.
 
@@ -64,6 +151,9 @@ class CSVParser:
             parsing_table: A sequence of Column objects defining the schema.
             table_name: The name of the SQLite table.
             has_primary_column: Whether the first column is a primary key.
+            max_cache_entries: The most distinct raw strings to memoize per
+                column in parse_row(). Columns with more are not cached. Set
+                to 0 to turn the cache off.
         """
         self.parsing_table = parsing_table
         self.table_name = table_name
@@ -72,8 +162,11 @@ class CSVParser:
         self._resolved_indices = {}
         self._ordered_indices = []
         self._max_index = 0
-
-        self.__datatype_convert = DATATYPE_MAP
+        self._row_function = None
+        self._row_function_source = ""
+        self.max_cache_entries = max_cache_entries
+        self._caches = []
+        self._rows_parsed = 0
 
         # Set up column names
         self.__set_columns()
@@ -127,6 +220,10 @@ class CSVParser:
         # avoid recalculating max() for every row in multi-million row files)
         self._max_index = max(self._resolved_indices.values())
 
+        # Compile a parse function specialized for this header layout
+        self.__reset_caches()
+        self.__compile_row_function()
+
         return header_map
 
     def parse_row(self, row: list[str]) -> list[Any]:
@@ -141,27 +238,245 @@ class CSVParser:
         Raises:
             RuntimeError: If resolve_indices has not been called first.
         """
-        if not self._resolved_indices:
+        if self._row_function is None:
             raise RuntimeError("resolve_indices must be called before parsing rows")
 
-        extended_row = self.__extend_row(row)
-        return self.__set_values(extended_row)
+        self._rows_parsed += 1
+        return self._row_function(row)
 
-    def __set_values(self, row: list[str]) -> list[Any]:
-        """Build the values list for a single row, ready for SQL insertion."""
-        values: list[Any] = []
+    def cache_stats(self) -> list[CacheStats]:
+        """Return the hit-rate statistics of each column's value cache.
 
-        if self._prepend_null:
-            values.append(None)
+        Only parse_row() uses the caches; parse_batch() already converts
+        each distinct value in a block only once.
+        """
+        stats = []
+        for col, cache in zip(self.parsing_table, self._caches, strict=True):
+            if cache is None:
+                stats.append(CacheStats(col.name, 0, 0, 0, False))
+                continue
+            enabled = cache.disabled_after is None
+            lookups = self._rows_parsed if enabled else cache.disabled_after
+            assert lookups is not None
+            stats.append(
+                CacheStats(
+                    name=cache.name,
+                    lookups=lookups,
+                    hits=lookups - cache.misses,
+                    entries=len(cache.values),
+                    enabled=enabled,
+                )
+            )
+        return stats
+
+    def time_columns(self, row: list[str]) -> list[tuple[str, float]]:
+        """Convert one row column by column, timing each column.
 
+        Each column's converter and mapping run directly, bypassing the value
+        caches, so the timings show what each conversion costs. Used to
+        sample converter time when profiling a conversion.
+
+        Args:
+            row: A CSV row as a list of strings.
+
+        Returns:
+            The name of each column and the seconds spent converting it.
+
+        Raises:
+            RuntimeError: If resolve_indices has not been called first.
+        """
+        if self._row_function is None:
+            raise RuntimeError("resolve_indices must be called before parsing rows")
+
+        width = self._max_index + 1
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+
+        perf_counter = time.perf_counter
+        timings = []
         for col, idx in zip(self.parsing_table, self._ordered_indices, strict=True):
-            dtype = self.__datatype_convert[col.sql_type]
-            val = col.converter(row[idx], dtype, col.nulls)
+            dtype = DATATYPE_MAP[col.sql_type]
+            start = perf_counter()
+            out = col.converter(row[idx], dtype, col.nulls)
             if col.mapping is not None:
-                val = col.mapping.get(val, val)
-            values.append(val)
+                out = col.mapping.get(out, out)
+            timings.append((col.name, perf_counter() - start))
+        return timings
+
+    def __reset_caches(self) -> None:
+        """Create an empty value cache for every column."""
+        self._rows_parsed = 0
+        self._caches = []
+        for i, col in enumerate(self.parsing_table):
+            if self.max_cache_entries <= 0:
+                self._caches.append(None)
+                continue
+            self._caches.append(
+                ColumnCache(
+                    name=col.name,
+                    compute=_cell_function(col),
+                    max_entries=self.max_cache_entries,
+                    on_overflow=functools.partial(self.__disable_cache, i),
+                )
+            )
+
+    def __disable_cache(self, i: int) -> None:
+        """Turn off the cache of a high-cardinality column.
+
+        The parse function is compiled again without the cache lookup, so
+        the column costs nothing extra from then on.
+        """
+        cache = self._caches[i]
+        assert cache is not None
+        cache.values.clear()
+        cache.disabled_after = self._rows_parsed
+        self.__compile_row_function()
+
+    def parse_batch(self, rows: list[list[str]]) -> list[tuple[Any, ...]]:
+        """Parse a block of CSV rows column by column.
+
+        The block is transposed into columns, and each column is dictionary
+        encoded: every distinct raw string is converted and mapped once, and
+        the results are then looked up for each cell. Most SWITRS columns
+        are low-cardinality codes, so this does far less work per value than
+        parsing each row separately. The values are the same as those
+        returned by parse_row().
+
+        Args:
+            rows: A block of CSV rows, each a list of strings.
+
+        Returns:
+            A tuple of converted values for each row, in input order.
+
+        Raises:
+            RuntimeError: If resolve_indices has not been called first.
+        """
+        if self._row_function is None:
+            raise RuntimeError("resolve_indices must be called before parsing rows")
+        if not rows:
+            return []
+
+        # Pad short rows so that every index exists, then transpose. Columns
+        # past the last used index may be ragged, so stop at the shortest.
+        width = self._max_index + 1
+        padded = (
+            row if len(row) >= width else row + [""] * (width - len(row))
+            for row in rows
+        )
+        fields = list(zip(*padded, strict=False))
+
+        columns: list[Iterable[Any]] = []
+        if self._prepend_null:
+            columns.append(itertools.repeat(None, len(rows)))
 
-        return values
+        for col, idx in zip(self.parsing_table, self._ordered_indices, strict=True):
+            raw = fields[idx]
+            dtype = DATATYPE_MAP[col.sql_type]
+            lookup: dict[str, Any] = {}
+            for val in dict.fromkeys(raw):
+                out = col.converter(val, dtype, col.nulls)
+                if col.mapping is not None:
+                    out = col.mapping.get(out, out)
+                lookup[val] = out
+            columns.append(map(lookup.__getitem__, raw))
+
+        return list(zip(*columns, strict=True))
+
+    def __compile_row_function(self) -> None:
+        """Generate a straight-line parse function for the resolved indices.
+
+        Looping over parsing_table for every row means looking up the dtype,
+        calling the converter, and checking for a mapping once per column per
+        row. Instead, this writes out one statement per column with the
+        index, dtype, nulls, and mapping bound as constants, and compiles it
+        once. The common convert() converter is inlined.
+
+        Columns with a value cache look the raw string up first and only
+        convert it on a miss.
+
+        The generated source is kept in _row_function_source for debugging.
+        """
+        namespace: dict[str, Any] = {"MISS": _MISS}
+        lines = [
+            "def parse_row(row):",
+            # Some rows in the CSV are incomplete and are missing columns at
+            # the end, so pad them with "" which maps to NULL. The +1
+            # converts the final index to a length.
+            f"    missing = {self._max_index + 1} - len(row)",
+            "    if missing > 0:",
+            '        row = row + [""] * missing',
+        ]
+        names = ["None"] if self._prepend_null else []
+
+        for i, (col, idx) in enumerate(
+            zip(self.parsing_table, self._ordered_indices, strict=True)
+        ):
+            dtype = DATATYPE_MAP[col.sql_type]
+            value = f"v{i}"
+            cache = self._caches[i] if self._caches else None
+            if cache is not None and cache.disabled_after is None:
+                # The cached value is final, so the mapping is skipped too
+                namespace[f"k{i}"] = cache.values.get
+                namespace[f"x{i}"] = cache.miss
+                lines.append(f"    {value} = k{i}(row[{idx}], MISS)")
+                lines.append(f"    if {value} is MISS:")
+                lines.append(f"        {value} = x{i}(row[{idx}])")
+                names.append(value)
+                continue
+            if col.converter is convert:
+                lines.extend(self.__inline_convert(i, idx, dtype, col, namespace))
+            else:
+                namespace[f"c{i}"] = col.converter
+                namespace[f"d{i}"] = dtype
+                namespace[f"n{i}"] = col.nulls
+                lines.append(f"    {value} = c{i}(row[{idx}], d{i}, n{i})")
+
+            if col.mapping is not None:
+                namespace[f"m{i}"] = col.mapping
+                lines.append(f"    {value} = m{i}.get({value}, {value})")
+            names.append(value)
+
+        lines.append(f"    return [{', '.join(names)}]")
+        source = "\n".join(lines) + "\n"
+
+        code = compile(source, f"<{self.table_name} row parser>", "exec")
+        exec(code, namespace)
+        self._row_function = namespace["parse_row"]
+        self._row_function_source = source
+
+    @staticmethod
+    def __inline_convert(
+        i: int,
+        idx: int,
+        dtype: type[int] | type[float] | type[str] | None,
+        col: Column,
+        namespace: dict[str, Any],
+    ) -> list[str]:
+        """Return source lines equivalent to convert(row[idx], dtype, nulls)."""
+        value = f"v{i}"
+        lines = [f"    {value} = row[{idx}].strip()"]
+        # str() of a str is itself, so only int and float need a cast
+        needs_cast = dtype is int or dtype is float
+        indent = "    "
+        if col.nulls is not None:
+            namespace[f"n{i}"] = col.nulls
+            lines.append(f"    if {value} in n{i}:")
+            lines.append(f"        {value} = None")
+            if needs_cast:
+                lines.append("    else:")
+                indent = "        "
+
+        if needs_cast:
+            namespace[f"d{i}"] = dtype
+            lines.extend(
+                [
+                    f"{indent}try:",
+                    f"{indent}    {value} = d{i}({value})",
+                    f"{indent}except ValueError:",
+                    f"{indent}    {value} = None",
+                ]
+            )
+        return lines
 
     def __set_columns(self) -> None:
         """Creates a list of column names and types for the SQLite table."""
@@ -183,32 +498,35 @@ class CSVParser:
             # Add the entry
             self.columns.append(entry)
 
+        self._insert_sql = self.__build_insert(self.table_name)
+
+    def __build_insert(self, table_name: str) -> str:
+        """Build the INSERT statement for a table with these columns."""
         col_names = ", ".join(tup[0] for tup in self.columns)
         placeholders = ", ".join("?" * len(self.columns))
         conflict = " OR IGNORE" if self.has_primary_column else ""
-        self._insert_sql = f"INSERT{conflict} INTO {self.table_name} ({col_names}) VALUES ({placeholders})"
+        return (
+            f"INSERT{conflict} INTO {table_name} ({col_names}) VALUES ({placeholders})"
+        )
 
-    def __extend_row(self, row: list[str]) -> list[str]:
-        """Extend the length of the row attribute with NULL fields.
-
-        Some rows in the CSV are incomplete and are missing columns at the end.
-        This function pads these rows with NULLs so they parse correctly.
+    def insert_statement(self, table_name: str | None = None) -> str:
+        """Returns the INSERT statement for this table.
 
+        Args:
+            table_name: Insert into this table, which may be schema-qualified,
+                instead of table_name. The statement for table_name itself is
+                precomputed.
         """
-        # The CSV file is malformed, not every row is the same length, so we
-        # extend it with "" which maps to null in the conversion. The +1
-        # converts the final index to length.
-        # Uses pre-calculated _max_index from resolve_indices() for performance.
-        extend = (self._max_index + 1) - len(row)
-        if extend > 0:
-            return row + [""] * extend
-        return row
-
-    def insert_statement(self) -> str:
-        """Returns the precomputed INSERT statement for this table."""
-        return self._insert_sql
-
-    def create_table_statement(self) -> str:
+        if table_name is None:
+            return self._insert_sql
+        return self.__build_insert(table_name)
+
+    def create_table_statement(
+        self,
+        table_name: str | None = None,
+        primary_key: bool = True,
+        types: Mapping[str, str] | None = None,
+    ) -> str:
         """Creates a string that can be used to create the correct table in SQLite.
 
         Use as follows:
@@ -218,9 +536,42 @@ class CSVParser:
                 c = RowClass(row)
                 cursor.execute(c.create_table_statement())
 
+        Args:
+            table_name: Create this table, which may be schema-qualified,
+                instead of table_name.
+            primary_key: If False, the first column is not made the PRIMARY
+                KEY, so duplicate values are allowed. Without
+                has_primary_column, that column is the id, which SQLite
+                then no longer numbers itself.
+            types: Replacements for the SQLite type names, for databases
+                where they mean something else, such as {'REAL': 'DOUBLE'}.
         """
-        cols = ", ".join(" ".join(tup) for tup in self.columns)
-        return f"CREATE TABLE {self.table_name} ({cols})"
+        columns = self.columns
+        if not primary_key:
+            columns = [columns[0][:2], *columns[1:]]
+        if types is not None:
+            columns = [
+                (name, types.get(sql_type, sql_type), *rest)
+                for name, sql_type, *rest in columns
+            ]
+        cols = ", ".join(" ".join(tup) for tup in columns)
+        return f"CREATE TABLE {table_name or self.table_name} ({cols})"
+
+
+def _cell_function(col: Column) -> Callable[[str], Any]:
+    """Return a function that converts and maps one raw value of a column."""
+    converter = col.converter
+    dtype = DATATYPE_MAP[col.sql_type]
+    nulls = col.nulls
+    mapping = col.mapping
+
+    def cell(raw: str) -> Any:
+        value = converter(raw, dtype, nulls)
+        if mapping is not None:
+            value = mapping.get(value, value)
+        return value
+
+    return cell
 
 
 def make_collision_parser() -> CSVParser:
@@ -0,0 +1,133 @@
+"""Write the converted tables as PostgreSQL COPY files, with their DDL.
+
+Each table is written to two files as its rows are parsed: {table}.sql
+holds its CREATE TABLE statement, built from CSVParser.columns with
+INTEGER and REAL widened to BIGINT and DOUBLE PRECISION as SQLite stores
+them, and {table}.copy holds its rows in the text format of COPY. Once
+every table is written, indexes.sql holds the indexes of the plan, to be
+created after the rows are copied in. A table is loaded with, in psql:
+
+    \\i collisions.sql
+    \\copy collisions FROM 'collisions.copy'
+
+The values are those the SQLite output stores: flags are 1 or 0, parties
+and victims are numbered from 1 in input order, and only the first
+collision of each case_id is kept, so the primary keys hold.
+"""
+
+import re
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from switrs_to_sqlite.arrow_tables import DICTIONARY, column_types, first_cases
+from switrs_to_sqlite.index_plan import IndexSpec
+from switrs_to_sqlite.parsers import CSVParser
+
+# PostgreSQL's INTEGER and REAL are only 32 bits wide
+POSTGRES_TYPES = {"INTEGER": "BIGINT", "REAL": "DOUBLE PRECISION"}
+
+# How COPY's text format writes NULL
+COPY_NULL = "\\N"
+
+# Characters that COPY's text format escapes with a backslash
+_SPECIAL = re.compile(r"[\\\t\n\r]")
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_escape(value: str) -> str:
+    """Escape a string for COPY's text format."""
+    if _SPECIAL.search(value) is None:
+        return value
+    return value.translate(_ESCAPES)
+
+
+def _flag_text(value: bool) -> str:
+    return "1" if value else "0"
+
+
+class PostgresTableWriter:
+    """Writes one table's DDL, and its rows in COPY's text format.
+
+    Args:
+        row_parser: The parser the table's rows come from.
+        directory: The directory to write {table}.sql and {table}.copy to.
+
+    Attributes:
+        duplicates: The number of collisions dropped so far.
+    """
+
+    def __init__(self, row_parser: CSVParser, directory: Path) -> None:
+        table = row_parser.table_name
+        ddl = row_parser.create_table_statement(types=POSTGRES_TYPES)
+        (directory / f"{table}.sql").write_text(f"{ddl};\n", encoding="utf-8")
+        formats: dict[str, Callable[[Any], str]] = {
+            "string": copy_escape,
+            DICTIONARY: copy_escape,
+            "bool": _flag_text,
+        }
+        self._formatters = [
+            formats.get(type_name, str) for _, type_name in column_types(row_parser)
+        ]
+        # The case_ids seen so far, for collisions
+        self._cases: set[Any] | None = set() if row_parser.has_primary_column else None
+        self._next_id = 1
+        self.duplicates = 0
+        self._file = (directory / f"{table}.copy").open(
+            "w", encoding="utf-8", newline=""
+        )
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Write a batch of parsed rows, a line each."""
+        if self._cases is not None:
+            first_rows = first_cases(rows, self._cases)
+            self.duplicates += len(rows) - len(first_rows)
+            rows = first_rows
+        formatters = self._formatters
+        lines = []
+        for row in rows:
+            values = [
+                COPY_NULL if value is None else format_value(value)
+                for format_value, value in zip(formatters, row, strict=True)
+            ]
+            if self._cases is None:
+                values[0] = str(self._next_id)
+                self._next_id += 1
+            lines.append("\t".join(values) + "\n")
+        self._file.writelines(lines)
+
+    def close(self) -> None:
+        """Close the COPY file."""
+        self._file.close()
+
+
+class PostgresSink:
+    """Writes each table's DDL and COPY file to a new directory.
+
+    The sink holds no open files, so the tables may be written in
+    processes of their own.
+
+    Args:
+        directory: The directory to create, which must not exist.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        directory.mkdir()
+        self._directory = directory
+
+    def open_table(self, row_parser: CSVParser) -> PostgresTableWriter:
+        """Write the DDL of row_parser's table, and return its writer."""
+        return PostgresTableWriter(row_parser, self._directory)
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Write the indexes in the plan to indexes.sql, for after loading.
+
+        Returns:
+            An empty dict, as no index is built here.
+        """
+        statements = "".join(f"{spec.create_statement()};\n" for spec in plan)
+        (self._directory / "indexes.sql").write_text(statements, encoding="utf-8")
+        return {}
+
+    def close(self) -> None:
+        """Do nothing; each file is closed with its table."""
@@ -0,0 +1,176 @@
+"""Stage-level timings of a conversion, collected with --profile."""
+
+import json
+import time
+from collections.abc import Generator, Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TextIO
+
+from switrs_to_sqlite.parsers import CSVParser
+
+# The stages of loading a table, in pipeline order
+STAGES = ("read", "csv", "parse", "sample", "insert", "dedupe")
+
+STAGE_DESCRIPTIONS = {
+    "read": "reading, decompressing, and decoding the file",
+    "csv": "splitting lines into fields with csv.reader",
+    "parse": "converting rows (waiting on workers if there are any)",
+    "sample": "timing the sampled rows column by column",
+    "insert": "inserting rows into SQLite, or writing them to the other outputs",
+    "dedupe": "copying unique rows out of the staging table",
+}
+
+# Number of raw CSV rows between two rows whose columns are timed
+DEFAULT_SAMPLE_EVERY = 1000
+
+
+@dataclass
+class ColumnTiming:
+    """Converter time measured for one column on the sampled rows.
+
+    Attributes:
+        samples: The number of sampled rows.
+        seconds: The total time spent converting the column on them.
+    """
+
+    samples: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class TableProfile:
+    """Time spent in each stage of loading one table.
+
+    Attributes:
+        table: The name of the table.
+        sample_every: Every sample_every-th row is also converted one column
+            at a time to time each converter.
+        rows: The number of rows read from the file.
+        stages: Seconds spent in each stage, keyed by the names in STAGES.
+        columns: Converter timings of each column on the sampled rows.
+    """
+
+    table: str
+    sample_every: int = DEFAULT_SAMPLE_EVERY
+    rows: int = 0
+    stages: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    columns: dict[str, ColumnTiming] = field(default_factory=dict)
+
+    def timed_lines(self, f: TextIO) -> Generator[str, None, None]:
+        """Yield the lines of f, adding the time taken to the read stage."""
+        stages = self.stages
+        perf_counter = time.perf_counter
+        lines = iter(f)
+        while True:
+            start = perf_counter()
+            line = next(lines, None)
+            stages["read"] += perf_counter() - start
+            if line is None:
+                return
+            yield line
+
+    def timed_rows(
+        self, reader: Iterator[list[str]], row_parser: CSVParser
+    ) -> Generator[list[str], None, None]:
+        """Yield the rows of reader, timing csv.reader and sampling columns.
+
+        reader must read its lines from timed_lines(), whose time is taken
+        out of the csv stage once the reader is exhausted.
+        """
+        stages = self.stages
+        perf_counter = time.perf_counter
+        read_before = stages["read"]
+        csv_seconds = 0.0
+        count = 0
+        try:
+            while True:
+                start = perf_counter()
+                row = next(reader, None)
+                csv_seconds += perf_counter() - start
+                if row is None:
+                    return
+                count += 1
+                if count % self.sample_every == 0:
+                    start = perf_counter()
+                    self.sample_columns(row_parser, row)
+                    stages["sample"] += perf_counter() - start
+                yield row
+        finally:
+            stages["csv"] += csv_seconds - (stages["read"] - read_before)
+
+    def sample_columns(self, row_parser: CSVParser, row: list[str]) -> None:
+        """Time each column's converter on one row."""
+        for name, seconds in row_parser.time_columns(row):
+            timing = self.columns.get(name)
+            if timing is None:
+                timing = self.columns[name] = ColumnTiming()
+            timing.samples += 1
+            timing.seconds += seconds
+
+    def estimated_column_seconds(self) -> dict[str, float]:
+        """Estimate each column's converter time over every row of the table."""
+        return {
+            name: timing.seconds / timing.samples * self.rows
+            for name, timing in self.columns.items()
+            if timing.samples
+        }
+
+
+@dataclass
+class ConversionProfile:
+    """Timings of a whole conversion.
+
+    Attributes:
+        sample_every: Every sample_every-th row of each table was timed
+            column by column.
+        tables: The profile of each table, in load order.
+        indexes: Seconds spent building each index.
+        total_seconds: Wall-clock time of the whole conversion.
+    """
+
+    sample_every: int = DEFAULT_SAMPLE_EVERY
+    tables: list[TableProfile] = field(default_factory=list)
+    indexes: dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+
+    def report_lines(self, top_columns: int = 10) -> list[str]:
+        """Return a report of the slowest stages and columns, slowest first."""
+        steps = [
+            (f"{profile.table} {stage}", seconds)
+            for profile in self.tables
+            for stage, seconds in profile.stages.items()
+            if seconds > 0
+        ]
+        steps.extend(
+            (f"index {name}", seconds) for name, seconds in self.indexes.items()
+        )
+        steps.sort(key=lambda step: step[1], reverse=True)
+
+        lines = [f"Profile ({self.total_seconds:,.1f}s total), slowest stages first:"]
+        for name, seconds in steps:
+            share = seconds / self.total_seconds if self.total_seconds > 0 else 0.0
+            lines.append(f"  {name:<40} {seconds:>9,.2f}s {share:>6.1%}")
+
+        estimates = [
+            (f"{profile.table}.{name}", seconds)
+            for profile in self.tables
+            for name, seconds in profile.estimated_column_seconds().items()
+        ]
+        if estimates:
+            estimates.sort(key=lambda est: est[1], reverse=True)
+            lines.append(
+                f"Slowest column converters (estimated from one row in every "
+                f"{self.sample_every:,}):"
+            )
+            for name, seconds in estimates[:top_columns]:
+                lines.append(f"  {name:<40} {seconds:>9,.3f}s")
+        return lines
+
+    def write_json(self, file_name: str) -> None:
+        """Write the raw timings to a JSON file."""
+        data = asdict(self)
+        data["stage_descriptions"] = STAGE_DESCRIPTIONS
+        with Path(file_name).open("w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
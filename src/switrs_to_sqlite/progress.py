@@ -0,0 +1,319 @@
+"""Progress, throughput, and ETA reporting while tables are converted.
+
+Progress is always printed to stderr for people watching the conversion.
+It can also be written in a machine-readable format for job runners and
+monitoring: JSON lines, one object per update, or a Prometheus textfile
+that is rewritten on every update for the node exporter's textfile
+collector to pick up.
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from pathlib import Path
+from queue import Queue
+from typing import Any, Protocol, TextIO
+
+METRICS_FORMATS = ("jsonl", "prometheus")
+
+_METRIC_PREFIX = "switrs_to_sqlite"
+
+
+@dataclass(frozen=True)
+class ProgressSample:
+    """The progress of one table at one moment.
+
+    Attributes:
+        table: The name of the table.
+        rows: The number of rows converted so far.
+        elapsed_seconds: The time since the table was started.
+        input_bytes: How far into the input file on disk the reader is. For
+            a gzipped file this is the position in the compressed file.
+        input_total_bytes: The size of the input file on disk.
+        done: Whether the table is finished.
+        timestamp: The Unix time of the sample.
+    """
+
+    table: str
+    rows: int
+    elapsed_seconds: float
+    input_bytes: int
+    input_total_bytes: int
+    done: bool
+    timestamp: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """The average number of rows converted per second."""
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def input_bytes_per_second(self) -> float:
+        """The average number of input bytes read per second."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.input_bytes / self.elapsed_seconds
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """The estimated time left for this table, or None if unknown."""
+        if self.done:
+            return 0.0
+        rate = self.input_bytes_per_second
+        if rate <= 0:
+            return None
+        return max(self.input_total_bytes - self.input_bytes, 0) / rate
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the sample and its derived rates as a JSON-ready dict."""
+        data = asdict(self)
+        data["rows_per_second"] = self.rows_per_second
+        data["input_bytes_per_second"] = self.input_bytes_per_second
+        data["eta_seconds"] = self.eta_seconds
+        return data
+
+
+class MetricsWriter(Protocol):
+    """Somewhere to send progress samples."""
+
+    def emit(self, sample: ProgressSample) -> None:
+        """Record one progress sample."""
+
+    def close(self) -> None:
+        """Flush and release any open files."""
+
+
+class JsonLinesWriter:
+    """Writes each progress sample as one line of JSON."""
+
+    def __init__(self, file_name: str | None = None) -> None:
+        """Open the output.
+
+        Args:
+            file_name: The file to append lines to. None or '-' writes to
+                stdout.
+        """
+        self._file: TextIO
+        if file_name is None or file_name == "-":
+            self._file = sys.stdout
+            self._owned = False
+        else:
+            self._file = Path(file_name).open("a")  # noqa: SIM115
+            self._owned = True
+
+    def emit(self, sample: ProgressSample) -> None:
+        """Write the sample as a single line."""
+        self._file.write(json.dumps(sample.to_dict()) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the output file unless it is stdout."""
+        if self._owned:
+            self._file.close()
+
+
+class PrometheusWriter:
+    """Keeps a Prometheus textfile up to date with the latest samples.
+
+    The file holds the latest sample of every table seen so far, and is
+    replaced atomically so that a scrape never sees a partial file.
+    """
+
+    # Name, type, help text, and the value of each metric for a sample
+    _METRICS: tuple[tuple[str, str, str, Callable[[ProgressSample], float]], ...] = (
+        ("rows_total", "counter", "Rows converted.", lambda s: s.rows),
+        (
+            "rows_per_second",
+            "gauge",
+            "Average rows converted per second.",
+            lambda s: s.rows_per_second,
+        ),
+        (
+            "input_bytes_total",
+            "counter",
+            "Bytes of the input file read from disk.",
+            lambda s: s.input_bytes,
+        ),
+        (
+            "input_size_bytes",
+            "gauge",
+            "Size of the input file on disk.",
+            lambda s: s.input_total_bytes,
+        ),
+        (
+            "input_bytes_per_second",
+            "gauge",
+            "Average bytes of the input file read per second.",
+            lambda s: s.input_bytes_per_second,
+        ),
+        (
+            "eta_seconds",
+            "gauge",
+            "Estimated seconds until the table is converted.",
+            lambda s: s.eta_seconds if s.eta_seconds is not None else float("nan"),
+        ),
+        ("done", "gauge", "1 once the table is converted.", lambda s: int(s.done)),
+        (
+            "last_update_timestamp_seconds",
+            "gauge",
+            "Unix time of the latest update.",
+            lambda s: s.timestamp,
+        ),
+    )
+
+    def __init__(self, file_name: str) -> None:
+        self._path = Path(file_name)
+        self._latest: dict[str, ProgressSample] = {}
+
+    def emit(self, sample: ProgressSample) -> None:
+        """Record the sample and rewrite the textfile."""
+        self._latest[sample.table] = sample
+        lines = []
+        for name, metric_type, help_text, value in self._METRICS:
+            metric = f"{_METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for table, latest in self._latest.items():
+                lines.append(f'{metric}{{table="{table}"}} {value(latest)}')
+
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        tmp_path.write_text("\n".join(lines) + "\n")
+        tmp_path.replace(self._path)
+
+    def close(self) -> None:
+        """Nothing to close; the file is written in full on every update."""
+
+
+class QueueWriter:
+    """Sends samples to another process, which writes them.
+
+    Used by the processes that build tables in parallel, so that a single
+    writer owns the metrics output.
+    """
+
+    def __init__(self, queue: "Queue[ProgressSample]") -> None:
+        self._queue = queue
+
+    def emit(self, sample: ProgressSample) -> None:
+        """Put the sample on the queue."""
+        self._queue.put(sample)
+
+    def close(self) -> None:
+        """Nothing to close; the receiving process owns the output."""
+
+
+def open_metrics_writer(metrics_format: str, file_name: str | None) -> MetricsWriter:
+    """Return a writer for the given format.
+
+    Args:
+        metrics_format: One of METRICS_FORMATS.
+        file_name: Where to write the metrics. JSON lines go to stdout if
+            this is None; a Prometheus textfile needs a file name.
+
+    Raises:
+        ValueError: If the format is unknown, or a Prometheus textfile has
+            no file name.
+    """
+    if metrics_format == "jsonl":
+        return JsonLinesWriter(file_name)
+    if metrics_format == "prometheus":
+        if file_name is None:
+            raise ValueError("Prometheus metrics need a file to write to")
+        return PrometheusWriter(file_name)
+    raise ValueError(
+        f"metrics format must be one of {METRICS_FORMATS}, got '{metrics_format}'"
+    )
+
+
+def _format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "unknown"
+    return str(timedelta(seconds=round(seconds)))
+
+
+class ProgressMeter:
+    """Counts the converted rows of one table and reports its progress.
+
+    The loop that converts rows adds to count, and calls report() once
+    count reaches next_report, so that checking costs a single comparison
+    per row.
+
+    Attributes:
+        table: The name of the table.
+        count: The number of rows converted so far.
+        next_report: The row count at which to report progress next.
+        interval: The number of rows between reports.
+    """
+
+    __slots__ = (
+        "_position",
+        "_start",
+        "_total_bytes",
+        "_writer",
+        "count",
+        "interval",
+        "next_report",
+        "table",
+    )
+
+    def __init__(
+        self,
+        table: str,
+        position: Callable[[], int],
+        total_bytes: int,
+        interval: int,
+        writer: MetricsWriter | None = None,
+    ) -> None:
+        """Start timing a table.
+
+        Args:
+            table: The name of the table.
+            position: Returns how many bytes of the input file have been
+                read.
+            total_bytes: The size of the input file.
+            interval: The number of rows between reports.
+            writer: Also send every report here, if given.
+        """
+        self.table = table
+        self.count = 0
+        self.interval = interval
+        self.next_report = interval
+        self._position = position
+        self._total_bytes = total_bytes
+        self._writer = writer
+        self._start = time.perf_counter()
+
+    def sample(self, done: bool = False) -> ProgressSample:
+        """Return the current progress."""
+        return ProgressSample(
+            table=self.table,
+            rows=self.count,
+            elapsed_seconds=time.perf_counter() - self._start,
+            input_bytes=self._total_bytes if done else self._position(),
+            input_total_bytes=self._total_bytes,
+            done=done,
+            timestamp=time.time(),
+        )
+
+    def report(self) -> None:
+        """Print the progress to stderr and send it to the metrics writer."""
+        while self.next_report <= self.count:
+            self.next_report += self.interval
+        sample = self.sample()
+        print(
+            f"  {sample.rows:,} rows ({sample.rows_per_second:,.0f} rows/s, "
+            f"{sample.input_bytes_per_second / 1e6:,.1f} MB/s, "
+            f"ETA {_format_duration(sample.eta_seconds)})",
+            file=sys.stderr,
+            flush=True,
+        )
+        if self._writer is not None:
+            self._writer.emit(sample)
+
+    def finish(self) -> None:
+        """Send the final progress of the table to the metrics writer."""
+        if self._writer is not None:
+            self._writer.emit(self.sample(done=True))
@@ -0,0 +1,250 @@
+"""Outputs that the parsed rows of every table are written to.
+
+A sink is one output, such as a SQLite database or a directory of CSV files.
+convert_files() parses each record file once and hands every batch of rows
+to the table writer of each sink, so several outputs are written from a
+single pass over the input.
+
+A sink is driven in three steps. open_table() creates a table from the
+schema of its parser and returns a TableWriter, which takes the batches of
+parsed rows with write() and finishes the table with close(). Once every
+table is written, finish() builds the indexes of the output. close()
+releases the sink whether or not it finished.
+"""
+
+import csv
+import sqlite3
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+from switrs_to_sqlite.arrow_output import ArrowSink
+from switrs_to_sqlite.arrow_tables import column_types, first_cases
+from switrs_to_sqlite.database import configure_connection
+from switrs_to_sqlite.duckdb_output import DuckDBSink
+from switrs_to_sqlite.index_plan import IndexSpec, build_indexes
+from switrs_to_sqlite.load_profiles import LoadProfile
+from switrs_to_sqlite.parquet_output import ROW_GROUP_SIZE, ParquetSink
+from switrs_to_sqlite.parsers import CSVParser
+from switrs_to_sqlite.postgres_output import PostgresSink
+
+OUTPUT_FORMATS = ("sqlite", "csv", "parquet", "arrow", "postgres", "duckdb")
+
+# Formats whose sinks write each table to files of its own, and hold no open
+# files or connections, so each table can be written in its own process
+PARALLEL_TABLE_FORMATS = ("csv", "arrow", "postgres")
+
+# Where each output is written if no output file is given
+DEFAULT_OUTPUTS = {
+    "sqlite": "switrs.sqlite3",
+    "csv": "switrs_csv",
+    "parquet": "switrs_parquet",
+    "arrow": "switrs_arrow",
+    "postgres": "switrs_postgres",
+    "duckdb": "switrs.duckdb",
+}
+
+
+class TableWriter(Protocol):
+    """Writes the parsed rows of one table to an output."""
+
+    @property
+    def duplicates(self) -> int:
+        """The number of collisions dropped for repeating a case_id."""
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Write a batch of parsed rows, which must not be changed."""
+
+    def close(self) -> None:
+        """Finish the table once every row is written."""
+
+
+class Sink(Protocol):
+    """An output that every table is written to."""
+
+    def open_table(self, row_parser: CSVParser) -> TableWriter:
+        """Create the table of row_parser, and return its writer."""
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Build the indexes in the plan, once every table is written.
+
+        Returns:
+            The seconds spent building each index, keyed by index name.
+        """
+
+    def close(self) -> None:
+        """Release the output, whether or not it was finished."""
+
+
+class SQLiteTableWriter:
+    """Inserts batches of rows into one table, a transaction per batch.
+
+    Args:
+        con: The connection to the database, which has the table.
+        row_parser: The parser the table's rows come from.
+
+    Attributes:
+        duplicates: The number of rows ignored for repeating a case_id,
+            known once the writer is closed.
+    """
+
+    def __init__(self, con: sqlite3.Connection, row_parser: CSVParser) -> None:
+        self._con = con
+        self._table = row_parser.table_name
+        self._insert_sql = row_parser.insert_statement()
+        self._keyed = row_parser.has_primary_column
+        self._rows = 0
+        self.duplicates = 0
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Insert a batch of parsed rows in one transaction."""
+        self._con.execute("BEGIN")
+        self._con.executemany(self._insert_sql, rows)
+        self._con.commit()
+        self._rows += len(rows)
+
+    def close(self) -> None:
+        """Count the collisions INSERT OR IGNORE left out."""
+        if self._keyed:
+            cursor = self._con.execute(f"SELECT COUNT(*) FROM {self._table}")
+            self.duplicates = self._rows - cursor.fetchone()[0]
+
+
+class SQLiteSink:
+    """Writes the tables to a new SQLite database.
+
+    Unlike a SQLite output written on its own, the database has no
+    checkpoints, so its conversion cannot be resumed.
+
+    Args:
+        file_name: The database file to create.
+        profile: The load profile, whose pragmas are set on the database.
+    """
+
+    def __init__(self, file_name: str, profile: LoadProfile) -> None:
+        self._con = sqlite3.connect(file_name)
+        configure_connection(self._con, profile)
+
+    def open_table(self, row_parser: CSVParser) -> SQLiteTableWriter:
+        """Create the table of row_parser, and return its writer."""
+        self._con.execute(row_parser.create_table_statement())
+        return SQLiteTableWriter(self._con, row_parser)
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Build the indexes in the plan; see build_indexes()."""
+        return build_indexes(self._con, plan)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._con.close()
+
+
+class CSVTableWriter:
+    """Writes one table to a CSV file, with a header row of column names.
+
+    The values are those the SQLite output stores: flags are written as 1
+    or 0, parties and victims are numbered from 1 in input order, and only
+    the first collision of each case_id is kept. NULL is written as an
+    empty field.
+
+    Args:
+        row_parser: The parser the table's rows come from.
+        path: The CSV file to write.
+
+    Attributes:
+        duplicates: The number of collisions dropped so far.
+    """
+
+    def __init__(self, row_parser: CSVParser, path: Path) -> None:
+        types = column_types(row_parser)
+        self._bool_columns = [i for i, (_, kind) in enumerate(types) if kind == "bool"]
+        # The case_ids seen so far, for collisions
+        self._cases: set[Any] | None = set() if row_parser.has_primary_column else None
+        self._next_id = 1
+        self.duplicates = 0
+        self._file = path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in types])
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Write a batch of parsed rows."""
+        if self._cases is not None:
+            first_rows = first_cases(rows, self._cases)
+            self.duplicates += len(rows) - len(first_rows)
+            rows = first_rows
+        bool_columns = self._bool_columns
+        lines = []
+        for row in rows:
+            values = list(row)
+            if self._cases is None:
+                values[0] = self._next_id
+                self._next_id += 1
+            for i in bool_columns:
+                if values[i] is not None:
+                    values[i] = int(values[i])
+            lines.append(values)
+        self._writer.writerows(lines)
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+
+class CSVSink:
+    """Writes each table to a CSV file in a new directory.
+
+    Args:
+        directory: The directory to create, which must not exist.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        directory.mkdir()
+        self._directory = directory
+
+    def open_table(self, row_parser: CSVParser) -> CSVTableWriter:
+        """Create the CSV file of row_parser's table, and return its writer."""
+        path = self._directory / f"{row_parser.table_name}.csv"
+        return CSVTableWriter(row_parser, path)
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        """Do nothing, as CSV files have no indexes."""
+        return {}
+
+    def close(self) -> None:
+        """Do nothing; each file is closed with its table."""
+
+
+def open_sink(
+    output_format: str,
+    output_file: str,
+    profile: LoadProfile,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> Sink:
+    """Create an output of one of OUTPUT_FORMATS.
+
+    Args:
+        output_format: The format of the output.
+        output_file: The database file, or the directory of per-table files,
+            to create.
+        profile: The load profile of a SQLite output.
+        row_group_size: The most rows in a Parquet row group.
+
+    Raises:
+        ValueError: If the format is unknown, or needs a package that is
+            not installed.
+    """
+    if output_format == "sqlite":
+        return SQLiteSink(output_file, profile)
+    if output_format == "csv":
+        return CSVSink(Path(output_file))
+    if output_format == "parquet":
+        return ParquetSink(Path(output_file), row_group_size)
+    if output_format == "arrow":
+        return ArrowSink(Path(output_file))
+    if output_format == "postgres":
+        return PostgresSink(Path(output_file))
+    if output_format == "duckdb":
+        return DuckDBSink(output_file)
+    raise ValueError(
+        f"output_format must be one of {OUTPUT_FORMATS}, got '{output_format}'"
+    )
@@ -0,0 +1,322 @@
+"""Generate synthetic SWITRS record files for testing and benchmarking.
+
+The real CHP files are several gigabytes and cannot be shipped with the
+repository. The generator writes collision, party, and victim files with
+the same headers, quoting, and linked case IDs, drawing each column's values
+from the schema in row_types: mapped columns use the codes in value_maps and
+make_map, every column includes its null values, and the remaining columns
+use plausible numbers, dates, times, and free text.
+
+Values are drawn a block of rows at a time, one column at a time, so that
+tens of millions of rows can be generated in reasonable time.
+"""
+
+import gzip
+import random
+import string
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import TextIO
+
+import switrs_to_sqlite.value_maps as vm
+from switrs_to_sqlite.converters import string_to_bool
+from switrs_to_sqlite.datatypes import DataType
+from switrs_to_sqlite.row_types import COLLISION_ROW, PARTY_ROW, VICTIM_ROW
+from switrs_to_sqlite.schema import Column
+
+# The share of values in each column drawn from its null set
+NULL_FRACTION = 0.03
+
+# The number of collisions generated and written at a time
+_BLOCK_SIZE = 10_000
+
+# Number of parties per collision and victims per party, with their weights
+_PARTIES_PER_COLLISION = ((1, 2, 3, 4), (20, 60, 15, 5))
+_VICTIMS_PER_PARTY = ((0, 1, 2), (60, 30, 10))
+
+# Columns filled in from the links between the tables, not drawn at random
+_LINKED_HEADERS = frozenset({"case_id", "party_number", "party_count"})
+
+
+@dataclass(frozen=True)
+class _ValuePool:
+    """The values of one column and their cumulative weights.
+
+    Attributes:
+        values: The raw CSV values the column can take.
+        cum_weights: The cumulative weight of each value.
+        quoted: Whether the column is written inside double quotes, as the
+            CHP files do for every column that is not purely numeric.
+    """
+
+    values: list[str]
+    cum_weights: list[float]
+    quoted: bool
+
+    def draw(self, rng: random.Random, k: int) -> list[str]:
+        """Return k values drawn at random."""
+        return rng.choices(self.values, cum_weights=self.cum_weights, k=k)
+
+
+@dataclass(frozen=True)
+class SyntheticFiles:
+    """The files written by generate_records() and their row counts.
+
+    Attributes:
+        collision_file: The path of the collision records.
+        party_file: The path of the party records.
+        victim_file: The path of the victim records.
+        collisions: The number of collision rows.
+        parties: The number of party rows.
+        victims: The number of victim rows.
+    """
+
+    collision_file: Path
+    party_file: Path
+    victim_file: Path
+    collisions: int
+    parties: int
+    victims: int
+
+
+def _dates(rng: random.Random) -> list[str]:
+    start = date(2001, 1, 1)
+    days = (date(2022, 1, 1) - start).days
+    return [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range(days)]
+
+
+def _times(rng: random.Random) -> list[str]:
+    # Unknown times are recorded as 2500, and some early times lose their
+    # leading zero
+    times = [f"{hour:02d}{minute:02d}" for hour in range(24) for minute in range(60)]
+    return [*times, "2500", "815", "930"]
+
+
+def _decimals(
+    low: float, high: float, places: int, count: int
+) -> Callable[[random.Random], list[str]]:
+    def make(rng: random.Random) -> list[str]:
+        return [f"{rng.uniform(low, high):.{places}f}" for _ in range(count)]
+
+    return make
+
+
+def _integers(low: int, high: int) -> Callable[[random.Random], list[str]]:
+    return lambda rng: [str(i) for i in range(low, high + 1)]
+
+
+def _county_city_locations(rng: random.Random) -> list[str]:
+    return [f"{county}{city:02d}" for county in vm.COUNTIES for city in range(20)]
+
+
+def _words(rng: random.Random) -> list[str]:
+    alphabet = string.ascii_uppercase + string.digits
+    return ["".join(rng.choices(alphabet, k=rng.randint(1, 12))) for _ in range(1000)]
+
+
+# Text columns written without quotes
+_UNQUOTED_TEXT = frozenset({"collision_date", "collision_time", "proc_date"})
+
+# Value generators for the columns whose values cannot be inferred from the
+# schema alone
+_SPECIAL_VALUES: dict[str, Callable[[random.Random], list[str]]] = {
+    "collision_date": _dates,
+    "proc_date": _dates,
+    "collision_time": _times,
+    "cnty_city_loc": _county_city_locations,
+    "latitude": _decimals(32.5, 42.0, 5, 10_000),
+    "longitude": _decimals(114.1, 124.4, 5, 10_000),
+    "distance": _decimals(0, 5_000, 2, 1_000),
+    "postmile": _decimals(0, 300, 3, 1_000),
+    "juris": _integers(100, 9_999),
+    "caltrans_district": _integers(1, 12),
+    "state_route": _integers(1, 999),
+    "pcf_violation": _integers(20_001, 23_999),
+    "party_age": _integers(0, 99),
+    "victim_age": _integers(0, 99),
+    "vehicle_year": _integers(1970, 2021),
+    # Converted by non_standard_str_to_bool(), which only knows these codes
+    "sp_info_1": lambda rng: ["A"],
+    "sp_info_3": lambda rng: ["E"],
+}
+
+
+def _value_pool(columns: Sequence[Column], rng: random.Random) -> _ValuePool:
+    """Build the value pool for the columns read from one CSV header."""
+    header = columns[0].header
+    nulls = sorted(set().union(*(col.nulls or () for col in columns)))
+    mappings = [col.mapping for col in columns if col.mapping is not None]
+
+    values: list[str]
+    shuffle = True
+    if header in _SPECIAL_VALUES:
+        values = _SPECIAL_VALUES[header](rng)
+    elif mappings:
+        values = sorted(set().union(*mappings))
+    elif any(col.converter is string_to_bool for col in columns):
+        values = ["Y", "N"]
+    elif columns[0].sql_type is DataType.INTEGER:
+        # Mostly counts, which are small and most often zero
+        values = [str(i) for i in range(10)]
+        shuffle = False
+    elif columns[0].sql_type is DataType.REAL:
+        values = _decimals(0, 100, 2, 1_000)(rng)
+    else:
+        values = _words(rng)
+
+    # The CHP files quote text, but not numbers, dates, or times; a missing
+    # number is an empty field
+    numeric = all(v.replace(".", "", 1).isdigit() for v in values)
+    quoted = not numeric or (
+        columns[0].sql_type is DataType.TEXT and header not in _UNQUOTED_TEXT
+    )
+    if not quoted:
+        nulls = sorted({null if null.isdigit() else "" for null in nulls})
+
+    # Skewed weights, so that like the real data a few values are common
+    weights = [1 / (rank + 1) for rank in range(len(values))]
+    if shuffle:
+        rng.shuffle(values)
+    if nulls:
+        null_weight = sum(weights) * NULL_FRACTION / (1 - NULL_FRACTION)
+        values.extend(nulls)
+        weights.extend([null_weight / len(nulls)] * len(nulls))
+
+    return _ValuePool(values, list(accumulate(weights)), quoted)
+
+
+class _TableWriter:
+    """Writes the rows of one table, drawing values one column at a time."""
+
+    def __init__(self, file: TextIO, row_type: Sequence[Column], rng: random.Random):
+        grouped: dict[str, list[Column]] = {}
+        for col in row_type:
+            grouped.setdefault(col.header, []).append(col)
+
+        self.headers = list(grouped)
+        self.pools = {
+            header: _value_pool(cols, rng)
+            for header, cols in grouped.items()
+            if header not in _LINKED_HEADERS
+        }
+        self.file = file
+        self.rng = rng
+        self.rows = 0
+        file.write(",".join(h.upper() for h in self.headers) + "\n")
+
+    def write(self, linked: dict[str, list[str]], count: int) -> None:
+        """Write count rows, taking the linked columns from linked."""
+        columns = []
+        for header in self.headers:
+            if header == "case_id":
+                columns.append([f'"{v}"' for v in linked[header]])
+                continue
+            if header in linked:
+                columns.append(linked[header])
+                continue
+            pool = self.pools[header]
+            values = pool.draw(self.rng, count)
+            columns.append([f'"{v}"' for v in values] if pool.quoted else values)
+
+        self.file.writelines(",".join(row) + "\n" for row in zip(*columns, strict=True))
+        self.rows += count
+
+
+def _open_output(path: Path, compress: bool) -> TextIO:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return path.open("w", encoding="utf-8")
+
+
+def generate_records(
+    directory: str | Path,
+    collisions: int,
+    *,
+    seed: int = 0,
+    compress: bool = False,
+) -> SyntheticFiles:
+    """Write synthetic collision, party, and victim record files.
+
+    Every collision has one to four parties and every party up to two
+    victims, linked by case_id and party_number as in the real files, and
+    each collision's party_count matches its parties.
+
+    Args:
+        directory: The directory to write CollisionRecords.txt,
+            PartyRecords.txt, and VictimRecords.txt to.
+        collisions: The number of collisions to generate.
+        seed: The random seed; the same seed always writes the same files.
+        compress: Gzip the files, adding a .gz suffix to their names.
+
+    Returns:
+        The paths of the files and the number of rows in each.
+
+    Raises:
+        ValueError: If collisions is negative.
+    """
+    if collisions < 0:
+        raise ValueError(f"collisions must not be negative, got {collisions}")
+
+    rng = random.Random(seed)
+    suffix = ".gz" if compress else ""
+    out_dir = Path(directory)
+    paths = [
+        out_dir / f"{name}Records.txt{suffix}"
+        for name in ("Collision", "Party", "Victim")
+    ]
+
+    with (
+        _open_output(paths[0], compress) as collision_out,
+        _open_output(paths[1], compress) as party_out,
+        _open_output(paths[2], compress) as victim_out,
+    ):
+        tables = [
+            _TableWriter(collision_out, COLLISION_ROW, rng),
+            _TableWriter(party_out, PARTY_ROW, rng),
+            _TableWriter(victim_out, VICTIM_ROW, rng),
+        ]
+
+        for first in range(0, collisions, _BLOCK_SIZE):
+            count = min(_BLOCK_SIZE, collisions - first)
+            case_ids = [f"{i:09d}" for i in range(first + 1, first + count + 1)]
+            party_counts = rng.choices(*_PARTIES_PER_COLLISION, k=count)
+
+            party_case_ids: list[str] = []
+            party_numbers: list[str] = []
+            for case_id, parties in zip(case_ids, party_counts, strict=True):
+                party_case_ids.extend([case_id] * parties)
+                party_numbers.extend(str(n) for n in range(1, parties + 1))
+
+            victim_counts = rng.choices(*_VICTIMS_PER_PARTY, k=len(party_numbers))
+            victim_case_ids: list[str] = []
+            victim_party_numbers: list[str] = []
+            for case_id, party_number, victims in zip(
+                party_case_ids, party_numbers, victim_counts, strict=True
+            ):
+                victim_case_ids.extend([case_id] * victims)
+                victim_party_numbers.extend([party_number] * victims)
+
+            tables[0].write(
+                {"case_id": case_ids, "party_count": list(map(str, party_counts))},
+                count,
+            )
+            tables[1].write(
+                {"case_id": party_case_ids, "party_number": party_numbers},
+                len(party_numbers),
+            )
+            tables[2].write(
+                {"case_id": victim_case_ids, "party_number": victim_party_numbers},
+                len(victim_party_numbers),
+            )
+
+    return SyntheticFiles(
+        collision_file=paths[0],
+        party_file=paths[1],
+        victim_file=paths[2],
+        collisions=tables[0].rows,
+        parties=tables[1].rows,
+        victims=tables[2].rows,
+    )
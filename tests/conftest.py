@@ -1,5 +1,12 @@
 """Shared test fixtures for SWITRS-to-SQLite tests."""
 
+import contextlib
+import csv
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
 import pytest
 
 from switrs_to_sqlite.parsers import (
@@ -8,6 +15,10 @@ from switrs_to_sqlite.parsers import (
     make_party_parser,
     make_victim_parser,
 )
+from switrs_to_sqlite.synthetic import generate_records
+
+# Reads a table of a database, in rowid order
+SQLiteRows = Callable[[Path, str], list[tuple[Any, ...]]]
 
 # Headers matching the actual SWITRS CSV files. These are in the order they
 # appear in the actual SWITRS data files from CHP.
@@ -172,3 +183,35 @@ def victim_parser() -> CSVParser:
     p = make_victim_parser()
     p.resolve_indices(VICTIM_HEADER.copy())
     return p
+
+
+@pytest.fixture()
+def synthetic_inputs(tmp_path: Path) -> list[str]:
+    """Write synthetic record files and return their paths.
+
+    The first collision's officer_id holds a backslash and a tab, which
+    every output must escape or store as is, and the first two cases are
+    repeated at the end with a new officer, so only the originals are kept.
+    """
+    files = generate_records(tmp_path, 200, seed=11)
+    with files.collision_file.open(newline="") as f:
+        rows = list(csv.reader(f))
+    officer = [name.upper() for name in rows[0]].index("OFFICER_ID")
+    rows[1][officer] = "A\\B\tC"
+    duplicates = [row.copy() for row in rows[1:3]]
+    for row in duplicates:
+        row[officer] = "DUPLICATE"
+    with files.collision_file.open("w", newline="") as f:
+        csv.writer(f).writerows([*rows, *duplicates])
+    return [str(files.collision_file), str(files.party_file), str(files.victim_file)]
+
+
+@pytest.fixture()
+def sqlite_rows() -> SQLiteRows:
+    """Return a function that reads a table of a database in rowid order."""
+
+    def read(db_path: Path, table: str) -> list[tuple[Any, ...]]:
+        with contextlib.closing(sqlite3.connect(db_path)) as con:
+            return con.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+
+    return read
@@ -0,0 +1,83 @@
+"""Tests for writing the converted tables to Arrow IPC files."""
+
+from pathlib import Path
+
+import pytest
+from conftest import SQLiteRows
+
+from switrs_to_sqlite.arrow_tables import DictionaryEncoder, arrow_backend
+from switrs_to_sqlite.main import main
+
+TABLES = ("collisions", "parties", "victims")
+
+
+def test_dictionary_encoder_extends_its_dictionary() -> None:
+    encoder = DictionaryEncoder()
+
+    assert encoder.encode(["b", None, "a", "b"]) == [0, None, 1, 0]
+    assert encoder.encode(["c", "a"]) == [2, 1]
+    # Earlier values keep their indices, so each dictionary extends the last
+    assert encoder.values == ["b", "a", "c"]
+    assert encoder.encode([]) == []
+
+
+def test_arrow_matches_sqlite(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    synthetic_inputs: list[str],
+    sqlite_rows: SQLiteRows,
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+    feather = pytest.importorskip("pyarrow.feather")
+    inputs = synthetic_inputs
+    db_path = tmp_path / "switrs.sqlite3"
+    arrow_dir = tmp_path / "arrow"
+    main([*inputs, "-o", str(db_path)])
+    capsys.readouterr()
+
+    main([*inputs, "--format", "arrow", "-o", str(arrow_dir), "--batch-size", "50"])
+
+    assert "2 duplicate case_id rows skipped in collisions" in capsys.readouterr().err
+    assert sorted(path.name for path in arrow_dir.iterdir()) == [
+        f"{table}.arrow" for table in TABLES
+    ]
+    for table in TABLES:
+        path = arrow_dir / f"{table}.arrow"
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            assert reader.num_record_batches > 1
+            data = reader.read_all()
+        rows = [tuple(row.values()) for row in data.to_pylist()]
+        # SQLite stores booleans as integers, and True == 1
+        assert rows == sqlite_rows(db_path, table)
+        assert feather.read_table(str(path), memory_map=True).equals(data)
+
+    schema = feather.read_table(str(arrow_dir / "victims.arrow")).schema
+    assert str(schema.field("victim_role").type).startswith("dictionary<values=string")
+    assert str(schema.field("victim_age").type) == "int64"
+    assert str(schema.field("id").type) == "int64"
+
+
+def test_arrow_output_of_an_empty_file(
+    tmp_path: Path, synthetic_inputs: list[str]
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+    collisions, parties, victims = synthetic_inputs
+    Path(victims).write_text("")
+    arrow_dir = tmp_path / "arrow"
+
+    main([collisions, parties, victims, "--format", "arrow", "-o", str(arrow_dir)])
+
+    with pa.memory_map(str(arrow_dir / "victims.arrow")) as source:
+        data = pa.ipc.open_file(source).read_all()
+    assert data.num_rows == 0
+    assert data.schema.names[:2] == ["id", "case_id"]
+
+
+@pytest.mark.skipif(arrow_backend() is not None, reason="pyarrow is installed")
+def test_arrow_needs_pyarrow(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(SystemExit):
+        main(["c.txt", "p.txt", "v.txt", "-o", str(tmp_path), "--format", "arrow"])
+    assert "Arrow output needs the pyarrow package" in capsys.readouterr().err
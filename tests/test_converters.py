@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
+from datetime import date, datetime, timedelta
+
 from switrs_to_sqlite.converters import (
     cellphone_use_to_bool,
     convert,
+    convert_date,
+    convert_time,
     county_city_location_to_county,
     negative,
     non_standard_str_to_bool,
@@ -168,3 +172,103 @@ def test_non_standard_str_to_bool() -> None:
     )
     for val, dtype, nulls, res in convert_vals:
         assert non_standard_str_to_bool(val, dtype, nulls) == res
+
+
+def _strptime_date(val: str) -> str | None:
+    """Reference convert_date() that always uses strptime."""
+    sval = val.strip()
+    if len(sval) != 8:
+        return None
+    try:
+        return datetime.strptime(sval, "%Y%m%d").date().isoformat()
+    except ValueError:
+        return None
+
+
+def _strptime_time(val: str) -> str | None:
+    """Reference convert_time() that always uses strptime."""
+    sval = val.strip()
+    if not sval or sval == "2500":
+        return None
+    if len(sval) == 3:
+        sval = "0" + sval
+    try:
+        return datetime.strptime(sval, "%H%M").time().isoformat()
+    except ValueError:
+        return None
+
+
+def test_convert_date() -> None:
+    convert_vals = (
+        ("20200101", "2020-01-01"),
+        (" 20201231 ", "2020-12-31"),
+        ("20200229", "2020-02-29"),
+        ("20000229", "2000-02-29"),
+        # Not leap years
+        ("20190229", None),
+        ("19000229", None),
+        # Out of range
+        ("00000101", None),
+        ("20201301", None),
+        ("20200001", None),
+        ("20200100", None),
+        ("20200431", None),
+        # Wrong length or not a number
+        ("2020011", None),
+        ("202001011", None),
+        ("not-date", None),
+        ("", None),
+    )
+    for val, res in convert_vals:
+        assert convert_date(val) == res
+    assert convert_date("-", None, {"-"}) is None
+
+
+def test_convert_date_matches_strptime() -> None:
+    day = date(1999, 12, 1)
+    while day < date(2005, 3, 1):
+        raw = day.strftime("%Y%m%d")
+        assert convert_date(raw) == _strptime_date(raw) == day.isoformat()
+        day += timedelta(days=1)
+
+    # Unusual strings go through strptime, which accepts a space-padded day
+    # and non-ASCII digits
+    odd_vals = (
+        "202011 1",
+        "2020 101",
+        "\uff12\uff10\uff12\uff10\uff10\uff11\uff10\uff11",
+        "2020-1-1",
+        "99999999",
+    )
+    for raw in odd_vals:
+        assert convert_date(raw) == _strptime_date(raw)
+    assert convert_date("202011 1") == "2020-11-01"
+
+
+def test_convert_time() -> None:
+    convert_vals = (
+        ("0000", "00:00:00"),
+        ("1430", "14:30:00"),
+        ("2359", "23:59:00"),
+        # Not zero-padded
+        ("900", "09:00:00"),
+        # Sentinel for unknown time
+        ("2500", None),
+        ("2400", None),
+        ("0960", None),
+        ("", None),
+        ("abcd", None),
+    )
+    for val, res in convert_vals:
+        assert convert_time(val) == res
+    assert convert_time("-", None, {"-"}) is None
+
+
+def test_convert_time_matches_strptime() -> None:
+    for number in range(10_000):
+        for raw in {str(number), f"{number:04d}"}:
+            assert convert_time(raw) == _strptime_time(raw), raw
+
+    odd_vals = ("1", "12", "99", "12345", "1 30", "\uff11\uff12\uff13\uff10", "12:30")
+    for raw in odd_vals:
+        assert convert_time(raw) == _strptime_time(raw), raw
@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 
+import csv
+from pathlib import Path
+from typing import Any
+
 import pytest
 
 from switrs_to_sqlite.converters import convert, string_to_bool
-from switrs_to_sqlite.datatypes import DataType
+from switrs_to_sqlite.datatypes import DATATYPE_MAP, DataType
 from switrs_to_sqlite.parsers import CSVParser
 from switrs_to_sqlite.schema import Column
 
 TEST_HEADER = ["first", "second", "third", "forth", "blank"]
 
+DATA_DIR = Path(__file__).parent / "data"
+
 
 @pytest.fixture(scope="module")
 def row() -> list[str]:
@@ -143,6 +149,24 @@ def test_create_table_statement_with_has_primary_column(
     )
 
 
+def test_create_table_statement_with_other_types(parser: CSVParser) -> None:
+    statement = parser.create_table_statement(
+        types={"INTEGER": "BIGINT", "REAL": "DOUBLE"}
+    )
+    assert (
+        statement
+        == "CREATE TABLE Test (id BIGINT PRIMARY KEY, first BIGINT, second TEXT, third DOUBLE, forth BIGINT, blank BIGINT)"
+    )
+
+
+def test_create_table_statement_without_primary_key(parser: CSVParser) -> None:
+    statement = parser.create_table_statement("scratch.Test", primary_key=False)
+    assert (
+        statement
+        == "CREATE TABLE scratch.Test (id INTEGER, first INTEGER, second TEXT, third REAL, forth INTEGER, blank INTEGER)"
+    )
+
+
 def test_resolve_indices_raises_on_duplicate_headers(
     parsing_table: tuple[Column, ...],
 ) -> None:
@@ -163,3 +187,173 @@ def test_resolve_indices_raises_on_duplicate_headers(
         ValueError, match=r"Duplicate column header 'FIRST' at indices 0 and 4"
     ):
         parser.resolve_indices(duplicate_header)
+
+
+def _interpret_row(parser: CSVParser, row: list[str]) -> list[Any]:
+    """Parse a row by looping over the parsing table, one column at a time."""
+    row = row + [""] * (parser._max_index + 1 - len(row))
+    values: list[Any] = [] if parser.has_primary_column else [None]
+    for col in parser.parsing_table:
+        val = col.converter(
+            row[parser._resolved_indices[col.header]],
+            DATATYPE_MAP[col.sql_type],
+            col.nulls,
+        )
+        if col.mapping is not None:
+            val = col.mapping.get(val, val)
+        values.append(val)
+    return values
+
+
+@pytest.mark.parametrize(
+    ("parser_name", "data_file"),
+    [
+        ("collision_parser", "test_collisions.txt"),
+        ("party_parser", "test_parties.txt"),
+        ("victim_parser", "test_victims.txt"),
+    ],
+)
+def test_compiled_row_function_matches_column_loop(
+    parser_name: str, data_file: str, request: pytest.FixtureRequest
+) -> None:
+    parser: CSVParser = request.getfixturevalue(parser_name)
+    with (DATA_DIR / data_file).open() as f:
+        rows = list(csv.reader(f))
+    assert rows
+    for row in rows:
+        assert parser.parse_row(row) == _interpret_row(parser, row)
+
+
+def test_compiled_row_function_applies_mapping_and_cast_failures() -> None:
+    parser = CSVParser(
+        parsing_table=(
+            Column(header="a", name="a", sql_type=DataType.INTEGER, converter=convert),
+            Column(
+                header="b",
+                name="b",
+                sql_type=DataType.TEXT,
+                nulls={"-"},
+                converter=convert,
+                mapping={"1": "one", "2": None},
+            ),
+        ),
+        table_name="Test",
+        has_primary_column=True,
+    )
+    parser.resolve_indices(["b", "a"])
+    assert parser.parse_row(["1", "x"]) == [None, "one"]
+    assert parser.parse_row(["2", " 7 "]) == [7, None]
+    assert parser.parse_row(["-", "7"]) == [7, None]
+    assert parser.parse_row(["3"]) == [None, "3"]
+
+
+def test_parse_row_before_resolve_indices_raises(
+    parsing_table: tuple[Column, ...],
+) -> None:
+    parser = CSVParser(
+        parsing_table=parsing_table, table_name="Test", has_primary_column=False
+    )
+    with pytest.raises(RuntimeError, match="resolve_indices"):
+        parser.parse_row(["9"])
+
+
+@pytest.mark.parametrize(
+    ("parser_name", "data_file"),
+    [
+        ("collision_parser", "test_collisions.txt"),
+        ("party_parser", "test_parties.txt"),
+        ("victim_parser", "test_victims.txt"),
+    ],
+)
+def test_parse_batch_matches_parse_row(
+    parser_name: str, data_file: str, request: pytest.FixtureRequest
+) -> None:
+    parser: CSVParser = request.getfixturevalue(parser_name)
+    with (DATA_DIR / data_file).open() as f:
+        rows = list(csv.reader(f))
+    # Include short and empty rows, which are padded with NULLs
+    rows += [rows[0][:3], []]
+    assert parser.parse_batch(rows) == [tuple(parser.parse_row(r)) for r in rows]
+
+
+def test_parse_batch_empty_block(parser: CSVParser) -> None:
+    assert parser.parse_batch([]) == []
+
+
+def test_parse_batch_before_resolve_indices_raises(
+    parsing_table: tuple[Column, ...],
+) -> None:
+    parser = CSVParser(
+        parsing_table=parsing_table, table_name="Test", has_primary_column=False
+    )
+    with pytest.raises(RuntimeError, match="resolve_indices"):
+        parser.parse_batch([["9"]])
+
+
+def test_time_columns(parser: CSVParser, row: list[str]) -> None:
+    # The short row is padded, as in parse_row()
+    timings = parser.time_columns(row)
+    assert [name for name, _ in timings] == TEST_HEADER
+    assert all(seconds >= 0 for _, seconds in timings)
+
+
+def test_time_columns_before_resolve_indices_raises(
+    parsing_table: tuple[Column, ...],
+) -> None:
+    parser = CSVParser(
+        parsing_table=parsing_table, table_name="Test", has_primary_column=False
+    )
+    with pytest.raises(RuntimeError, match="resolve_indices"):
+        parser.time_columns(["9"])
+
+
+def test_cache_stats_count_hits_and_turn_off_high_cardinality_columns(
+    parsing_table: tuple[Column, ...],
+) -> None:
+    parser = CSVParser(
+        parsing_table=parsing_table,
+        table_name="Test",
+        has_primary_column=True,
+        max_cache_entries=2,
+    )
+    parser.resolve_indices(TEST_HEADER.copy())
+    rows = [
+        ["1", "a", "1.", "Y", ""],
+        ["2", "a", "1.", "N", ""],
+        ["3", "a", "1.", "Y", ""],
+        ["4", "a", "1.", "Y", ""],
+    ]
+    values = [parser.parse_row(row) for row in rows]
+    assert values == [
+        [1, "a", 1.0, True, None],
+        [2, "a", 1.0, False, None],
+        [3, "a", 1.0, True, None],
+        [4, "a", 1.0, True, None],
+    ]
+
+    stats = {st.name: st for st in parser.cache_stats()}
+    # The third distinct value overflows the cache of "first"
+    assert not stats["first"].enabled
+    assert stats["first"].lookups == 3
+    assert stats["first"].entries == 0
+    assert stats["second"].enabled
+    assert (stats["second"].hits, stats["second"].lookups) == (3, 4)
+    assert stats["second"].hit_rate == 0.75
+    assert (stats["forth"].hits, stats["forth"].entries) == (2, 2)
+    assert "k0" not in parser._row_function_source
+
+    # Values are still converted correctly once the cache is off
+    assert parser.parse_row(["5", "b", "2.", "N", "7"]) == [5, "b", 2.0, False, 7]
+
+
+def test_cache_can_be_turned_off(parsing_table: tuple[Column, ...]) -> None:
+    parser = CSVParser(
+        parsing_table=parsing_table,
+        table_name="Test",
+        has_primary_column=True,
+        max_cache_entries=0,
+    )
+    parser.resolve_indices(TEST_HEADER.copy())
+    assert parser.parse_row(["9", "a", "1.", "Y"]) == [9, "a", 1.0, True, None]
+    assert not any(st.enabled for st in parser.cache_stats())
+    assert parser.cache_stats()[0].hit_rate == 0.0
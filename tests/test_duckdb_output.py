@@ -0,0 +1,106 @@
+"""Tests for loading the converted tables into DuckDB."""
+
+import contextlib
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from switrs_to_sqlite.duckdb_output import duckdb_backend
+from switrs_to_sqlite.main import main
+
+TABLES = ("collisions", "parties", "victims")
+
+
+def _sorted_rows(con: Any, table: str) -> list[tuple[Any, ...]]:
+    key = "case_id" if table == "collisions" else "id"
+    rows = con.execute(f"SELECT * FROM {table} ORDER BY {key}").fetchall()
+    return [tuple(row) for row in rows]
+
+
+def test_duckdb_matches_sqlite(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], synthetic_inputs: list[str]
+) -> None:
+    duckdb = pytest.importorskip("duckdb")
+    pytest.importorskip("pyarrow")
+    inputs = synthetic_inputs
+    db_path = tmp_path / "switrs.sqlite3"
+    duckdb_path = tmp_path / "switrs.duckdb"
+    main([*inputs, "-o", str(db_path)])
+    capsys.readouterr()
+
+    main([*inputs, "-o", str(duckdb_path), "--format", "duckdb", "--batch-size", "50"])
+
+    err = capsys.readouterr().err
+    assert "Warning: 2 duplicate case_id rows skipped in collisions." in err
+    with (
+        contextlib.closing(sqlite3.connect(db_path)) as expected,
+        contextlib.closing(duckdb.connect(str(duckdb_path), read_only=True)) as con,
+    ):
+        for table in TABLES:
+            # SQLite stores the flags as 0 and 1, as does the BIGINT column
+            assert _sorted_rows(con, table) == _sorted_rows(expected, table)
+        assert not con.execute(
+            "SELECT 1 FROM collisions WHERE officer_id = 'DUPLICATE'"
+        ).fetchall()
+
+        types = dict(
+            con.execute(
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_name = 'collisions'"
+            ).fetchall()
+        )
+        assert types["latitude"] == "DOUBLE"
+        assert types["killed_victims"] == "BIGINT"
+        assert types["tow_away"] == "BIGINT"
+        assert types["weather_1"] == "VARCHAR"
+
+        indexes = con.execute("SELECT index_name FROM duckdb_indexes()").fetchall()
+        assert sorted(indexes) == [("idx_parties_case_id",), ("idx_victims_case_id",)]
+        keys = con.execute(
+            "SELECT table_name, constraint_column_names FROM duckdb_constraints() "
+            "WHERE constraint_type = 'PRIMARY KEY' ORDER BY table_name"
+        ).fetchall()
+        assert keys == [
+            ("collisions", ["case_id"]),
+            ("parties", ["id"]),
+            ("victims", ["id"]),
+        ]
+
+
+def test_duckdb_output_must_not_exist(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], synthetic_inputs: list[str]
+) -> None:
+    pytest.importorskip("duckdb")
+    pytest.importorskip("pyarrow")
+    inputs = synthetic_inputs
+    output = tmp_path / "switrs.duckdb"
+    output.write_bytes(b"")
+
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(output), "--format", "duckdb"])
+    assert "already exists" in capsys.readouterr().err
+
+
+def test_duckdb_needs_version_1_2(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    # Older versions cannot add the primary key once the rows are loaded
+    monkeypatch.setattr(
+        "switrs_to_sqlite.duckdb_output.duckdb_backend",
+        lambda: SimpleNamespace(__version__="1.1.3"),
+    )
+    with pytest.raises(SystemExit):
+        main(["c.txt", "p.txt", "v.txt", "-o", "out.duckdb", "--format", "duckdb"])
+    assert "needs duckdb 1.2 or later, found 1.1.3" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(duckdb_backend() is not None, reason="duckdb is installed")
+def test_duckdb_needs_duckdb(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(SystemExit):
+        main(["c.txt", "p.txt", "v.txt", "-o", str(tmp_path), "--format", "duckdb"])
+    assert "DuckDB output needs the duckdb package" in capsys.readouterr().err
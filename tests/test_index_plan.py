@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import contextlib
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from test_integration import _write_inputs
+
+from switrs_to_sqlite.index_plan import (
+    DEFAULT_INDEX_PLAN,
+    IndexSpec,
+    load_index_plan,
+    order_index_plan,
+    validate_index_plan,
+)
+from switrs_to_sqlite.main import main
+
+TABLES = {
+    "collisions": ["case_id", "collision_date"],
+    "parties": ["id", "case_id", "party_number"],
+    "victims": ["id", "case_id", "party_number"],
+}
+
+
+def _index_names(db_path: Path) -> set[str]:
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        rows = con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ).fetchall()
+    return {name for (name,) in rows}
+
+
+def test_create_statement() -> None:
+    spec = IndexSpec("idx_x", "parties", ("case_id", "party_number"), unique=True)
+    assert spec.create_statement() == (
+        "CREATE UNIQUE INDEX idx_x ON parties (case_id, party_number)"
+    )
+
+
+def test_load_index_plan(tmp_path: Path) -> None:
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        json.dumps(
+            [
+                {"name": "idx_a", "table": "collisions", "columns": ["collision_date"]},
+                {
+                    "name": "idx_b",
+                    "table": "parties",
+                    "columns": ["case_id", "party_number"],
+                    "unique": True,
+                },
+            ]
+        )
+    )
+    assert load_index_plan(str(plan_file)) == [
+        IndexSpec("idx_a", "collisions", ("collision_date",)),
+        IndexSpec("idx_b", "parties", ("case_id", "party_number"), unique=True),
+    ]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json",
+        '{"name": "idx_a"}',
+        '["idx_a"]',
+        '[{"name": "idx_a", "table": "parties"}]',
+        '[{"name": "idx_a", "table": "parties", "columns": "case_id"}]',
+        '[{"name": "idx_a", "table": "parties", "columns": [], "where": "x"}]',
+    ],
+)
+def test_load_index_plan_rejects_bad_files(tmp_path: Path, content: str) -> None:
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(content)
+    with pytest.raises(ValueError):
+        load_index_plan(str(plan_file))
+
+
+@pytest.mark.parametrize(
+    "plan",
+    [
+        [IndexSpec("idx_a; DROP TABLE parties", "parties", ("case_id",))],
+        [IndexSpec("idx_a", "parties", ("case_id",))] * 2,
+        [IndexSpec("idx_a", "people", ("case_id",))],
+        [IndexSpec("idx_a", "parties", ())],
+        [IndexSpec("idx_a", "parties", ("collision_date",))],
+    ],
+)
+def test_validate_index_plan_rejects(plan: list[IndexSpec]) -> None:
+    with pytest.raises(ValueError):
+        validate_index_plan(plan, TABLES)
+
+
+def test_validate_default_plan() -> None:
+    validate_index_plan(DEFAULT_INDEX_PLAN, TABLES)
+
+
+def test_order_groups_by_table_then_columns() -> None:
+    plan = [
+        IndexSpec("idx_v", "victims", ("case_id",)),
+        IndexSpec("idx_p2", "parties", ("party_number",)),
+        IndexSpec("idx_c", "collisions", ("collision_date",)),
+        IndexSpec("idx_p1", "parties", ("case_id", "party_number")),
+        IndexSpec("idx_p0", "parties", ("case_id",)),
+    ]
+    ordered = order_index_plan(plan, ["collisions", "parties", "victims"])
+    assert [spec.name for spec in ordered] == [
+        "idx_c",
+        "idx_p0",
+        "idx_p1",
+        "idx_p2",
+        "idx_v",
+    ]
+
+
+def test_index_plan_option(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        json.dumps(
+            [{"name": "idx_date", "table": "collisions", "columns": ["collision_date"]}]
+        )
+    )
+    db_path = tmp_path / "out.sqlite3"
+    main([*_write_inputs(tmp_path), "-o", str(db_path), "--index-plan", str(plan_file)])
+
+    assert _index_names(db_path) == {
+        "idx_date",
+        "idx_parties_case_id",
+        "idx_victims_case_id",
+    }
+    err = capsys.readouterr().err
+    assert "Building indexes..." in err
+    assert "  idx_date: " in err
+
+
+def test_no_index(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    db_path = tmp_path / "out.sqlite3"
+    main([*_write_inputs(tmp_path), "-o", str(db_path), "--no-index"])
+
+    assert _index_names(db_path) == set()
+    assert "Building indexes" not in capsys.readouterr().err
+
+
+def test_no_index_with_an_index_plan_exits(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text("[]")
+    db_path = tmp_path / "out.sqlite3"
+    with pytest.raises(SystemExit):
+        main(
+            [
+                *_write_inputs(tmp_path),
+                *("-o", str(db_path), "--no-index", "--index-plan", str(plan_file)),
+            ]
+        )
+    assert "--no-index and --index-plan cannot be combined" in capsys.readouterr().err
+    assert not db_path.exists()
+
+
+def test_invalid_index_plan_exits(tmp_path: Path) -> None:
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(
+        '[{"name": "idx_a", "table": "collisions", "columns": ["no_such_column"]}]'
+    )
+    db_path = tmp_path / "out.sqlite3"
+    with pytest.raises(SystemExit):
+        main(
+            [
+                *_write_inputs(tmp_path),
+                "-o",
+                str(db_path),
+                "--index-plan",
+                str(plan_file),
+            ]
+        )
+    assert not db_path.exists()
@@ -4,15 +4,53 @@ Tests end-to-end conversion of raw SWITRS CSV data to SQLite database,
 comparing output against a golden snapshot file.
 """
 
+import bz2
+import contextlib
+import csv
 import gzip
 import json
+import lzma
+import multiprocessing
+import os
 import sqlite3
+import subprocess
+import sys
+import zipfile
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
-
-from conftest import COLLISIONS_HEADER_CSV, PARTIES_HEADER_CSV, VICTIMS_HEADER_CSV
-
-from switrs_to_sqlite.main import main
+from unittest.mock import Mock
+
+import pytest
+from conftest import (
+    COLLISION_HEADER,
+    COLLISIONS_HEADER_CSV,
+    PARTIES_HEADER_CSV,
+    VICTIMS_HEADER_CSV,
+)
+
+import switrs_to_sqlite.main as main_module
+from switrs_to_sqlite.checkpoints import (
+    InputIdentity,
+    read_checkpoints,
+    record_progress,
+)
+from switrs_to_sqlite.database import table_columns
+from switrs_to_sqlite.index_plan import IndexSpec
+from switrs_to_sqlite.main import (
+    _LoadOptions,
+    _write_tables,
+    convert_files,
+    main,
+)
+from switrs_to_sqlite.open_record import _ThreadedStreamReader
+from switrs_to_sqlite.parsers import (
+    CSVParser,
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+from switrs_to_sqlite.synthetic import generate_records
 
 # Paths
 DATA_DIR = Path(__file__).parent / "data"
@@ -192,3 +230,714 @@ def test_parse_error_replace(tmp_path: Path) -> None:
     )
 
     assert db_path.exists()
+
+
+def _write_inputs(tmp_path: Path) -> list[str]:
+    """Write the test CSVs with headers and return their paths."""
+    paths = []
+    for name, header in (
+        ("collisions", COLLISIONS_HEADER_CSV),
+        ("parties", PARTIES_HEADER_CSV),
+        ("victims", VICTIMS_HEADER_CSV),
+    ):
+        path = tmp_path / f"{name}.txt"
+        data = (DATA_DIR / f"test_{name}.txt").read_text()
+        path.write_text(header + "\n" + data)
+        paths.append(str(path))
+    return paths
+
+
+def test_workers_output_is_byte_identical(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A process-pool build writes exactly the same file as a serial build."""
+    # Use tiny chunks so the rows are spread over many worker tasks
+    monkeypatch.setattr("switrs_to_sqlite.main._CHUNK_SIZE", 3)
+    inputs = _write_inputs(tmp_path)
+    serial_db = tmp_path / "serial.sqlite3"
+    pooled_db = tmp_path / "pooled.sqlite3"
+
+    main([*inputs, "-o", str(serial_db)])
+    main([*inputs, "-o", str(pooled_db), "--workers", "2"])
+
+    assert pooled_db.read_bytes() == serial_db.read_bytes()
+
+
+def test_mmap_workers_output_is_byte_identical(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Workers reading their own byte ranges write the same file as serial."""
+    # Use tiny ranges so the rows are spread over many worker tasks
+    monkeypatch.setattr("switrs_to_sqlite.main._RANGE_SIZE", 500)
+    inputs = _write_inputs(tmp_path)
+    # A compressed file cannot be split, and is read by the main process
+    gzipped = tmp_path / "victims.txt.gz"
+    gzipped.write_bytes(gzip.compress(Path(inputs[2]).read_bytes()))
+    serial_db = tmp_path / "serial.sqlite3"
+    mmap_db = tmp_path / "mmap.sqlite3"
+
+    main([*inputs, "-o", str(serial_db)])
+    main([*inputs[:2], str(gzipped), "-o", str(mmap_db), "-w", "2", "--mmap"])
+
+    assert mmap_db.read_bytes() == serial_db.read_bytes()
+
+
+def test_mmap_needs_workers(tmp_path: Path) -> None:
+    inputs = _write_inputs(tmp_path)
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(tmp_path / "out.sqlite3"), "--mmap"])
+
+
+def test_workers_must_be_positive(tmp_path: Path) -> None:
+    inputs = _write_inputs(tmp_path)
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(tmp_path / "out.sqlite3"), "--workers", "0"])
+
+
+def test_parallel_tables_matches_serial_build(tmp_path: Path) -> None:
+    """Per-table shards merge into the same rows and indexes as a serial build."""
+    inputs = _write_inputs(tmp_path)
+    serial_db = tmp_path / "serial.sqlite3"
+    sharded_db = tmp_path / "sharded.sqlite3"
+
+    main([*inputs, "-o", str(serial_db)])
+    main([*inputs, "-o", str(sharded_db), "--parallel-tables"])
+
+    with (
+        contextlib.closing(sqlite3.connect(serial_db)) as serial,
+        contextlib.closing(sqlite3.connect(sharded_db)) as sharded,
+    ):
+        schema_sql = "SELECT type, name, sql FROM sqlite_master ORDER BY name"
+        assert (
+            sharded.execute(schema_sql).fetchall()
+            == serial.execute(schema_sql).fetchall()
+        )
+        for table in ("collisions", "parties", "victims"):
+            rows_sql = f"SELECT * FROM {table} ORDER BY rowid"
+            assert (
+                sharded.execute(rows_sql).fetchall()
+                == serial.execute(rows_sql).fetchall()
+            )
+
+    # The temporary shard databases are cleaned up
+    assert sorted(p.name for p in tmp_path.glob("*.sqlite3")) == [
+        "serial.sqlite3",
+        "sharded.sqlite3",
+    ]
+    assert not list(tmp_path.glob(".sharded.sqlite3.*"))
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--workers", "2"]])
+def test_columnar_engine_output_is_byte_identical(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, extra_args: list[str]
+) -> None:
+    """The columnar engine writes exactly the same file as the row engine."""
+    monkeypatch.setattr("switrs_to_sqlite.main._BATCH_SIZE", 4)
+    monkeypatch.setattr("switrs_to_sqlite.main._CHUNK_SIZE", 3)
+    inputs = _write_inputs(tmp_path)
+    row_db = tmp_path / "row.sqlite3"
+    columnar_db = tmp_path / "columnar.sqlite3"
+
+    main([*inputs, "-o", str(row_db)])
+    main([*inputs, "-o", str(columnar_db), "--engine", "columnar", *extra_args])
+
+    assert columnar_db.read_bytes() == row_db.read_bytes()
+
+
+def test_cache_stats_are_reported(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    main([*inputs, "-o", str(tmp_path / "out.sqlite3"), "--cache-stats"])
+
+    err = capsys.readouterr().err
+    for table in ("collisions", "parties", "victims"):
+        assert f"{table} cache hit rates:" in err
+    assert "weather_1" in err
+
+
+def test_cache_stats_need_the_serial_row_engine(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    main(
+        [
+            *inputs,
+            "-o",
+            str(tmp_path / "out.sqlite3"),
+            "--cache-stats",
+            "--engine",
+            "columnar",
+        ]
+    )
+
+    assert "only collected by the row engine" in capsys.readouterr().err
+
+
+def test_defer_unique_keeps_first_row_of_each_case_id(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Deferred uniqueness keeps the same rows and reports the same duplicates."""
+    inputs = _write_inputs(tmp_path)
+    collisions_path = Path(inputs[0])
+    with collisions_path.open(newline="") as f:
+        rows = list(csv.reader(f))
+    # Repeat two cases with a different officer ID; the first copy must win
+    officer_idx = COLLISION_HEADER.index("OFFICER_ID")
+    duplicates = [row.copy() for row in rows[1:3]]
+    for row in duplicates:
+        row[officer_idx] = "DUPLICATE"
+    with collisions_path.open("a", newline="") as f:
+        csv.writer(f).writerows(duplicates)
+
+    direct_db = tmp_path / "direct.sqlite3"
+    deferred_db = tmp_path / "deferred.sqlite3"
+    main([*inputs, "-o", str(direct_db)])
+    direct_err = capsys.readouterr().err
+    main([*inputs, "-o", str(deferred_db), "--defer-unique"])
+    deferred_err = capsys.readouterr().err
+
+    assert "Warning: 2 duplicate case_id rows skipped in collisions." in direct_err
+    assert "Warning: 2 duplicate case_id rows skipped in collisions." in deferred_err
+
+    with (
+        contextlib.closing(sqlite3.connect(direct_db)) as direct,
+        contextlib.closing(sqlite3.connect(deferred_db)) as deferred,
+    ):
+        schema_sql = "SELECT type, name, sql FROM sqlite_master ORDER BY name"
+        assert (
+            deferred.execute(schema_sql).fetchall()
+            == direct.execute(schema_sql).fetchall()
+        )
+        rows_sql = "SELECT * FROM collisions ORDER BY case_id"
+        assert (
+            deferred.execute(rows_sql).fetchall() == direct.execute(rows_sql).fetchall()
+        )
+        assert not deferred.execute(
+            "SELECT 1 FROM collisions WHERE officer_id = 'DUPLICATE'"
+        ).fetchall()
+        # The rows are stored in case_id order rather than input order
+        order_sql = "SELECT case_id FROM collisions ORDER BY rowid"
+        stored = [row[0] for row in deferred.execute(order_sql)]
+        loaded = [row[0] for row in direct.execute(order_sql)]
+        assert stored == sorted(loaded)
+        assert stored != loaded
+        # The scratch table lived in its own file, so nothing was freed here
+        # beyond the page of the dropped checkpoint table
+        freelist_sql = "PRAGMA freelist_count"
+        assert deferred.execute(freelist_sql).fetchone()[0] == 1
+        assert direct.execute(freelist_sql).fetchone()[0] == 1
+
+    assert not list(tmp_path.glob(".switrs-staging.*"))
+
+
+def test_mixed_compression_matches_plain_build(tmp_path: Path) -> None:
+    """xz, zip, and bzip2 inputs convert to the same database as plain text."""
+    inputs = _write_inputs(tmp_path)
+    plain_db = tmp_path / "plain.sqlite3"
+    main([*inputs, "-o", str(plain_db)])
+
+    collisions, parties, victims = (Path(p) for p in inputs)
+    compressed = [tmp_path / "collisions.txt.xz", tmp_path / "parties.zip"]
+    compressed[0].write_bytes(lzma.compress(collisions.read_bytes()))
+    with zipfile.ZipFile(compressed[1], "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.write(parties, "PartyRecords.txt")
+    compressed.append(tmp_path / "victims.txt.bz2")
+    compressed[2].write_bytes(bz2.compress(victims.read_bytes()))
+    compressed_db = tmp_path / "compressed.sqlite3"
+    main([*map(str, compressed), "-o", str(compressed_db)])
+
+    assert compressed_db.read_bytes() == plain_db.read_bytes()
+
+
+def test_workers_are_not_forked_while_a_file_is_inflated(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Workers parsing a gzipped file start before it is inflated."""
+    inputs = _write_inputs(tmp_path)
+    plain_db = tmp_path / "plain.sqlite3"
+    main([*inputs, "-o", str(plain_db)])
+    gzipped = []
+    for name in inputs:
+        path = Path(f"{name}.gz")
+        path.write_bytes(gzip.compress(Path(name).read_bytes()))
+        gzipped.append(str(path))
+
+    # The inflating thread may hold a lock that a forked child would inherit
+    readers: list[_ThreadedStreamReader] = []
+    open_at_fork: list[_ThreadedStreamReader] = []
+    init = _ThreadedStreamReader.__init__
+    fork = os.fork
+
+    def recording_init(self: _ThreadedStreamReader, *args: Any) -> None:
+        init(self, *args)
+        readers.append(self)
+
+    def recording_fork() -> int:
+        open_at_fork.extend(reader for reader in readers if not reader.closed)
+        return fork()
+
+    monkeypatch.setattr(_ThreadedStreamReader, "__init__", recording_init)
+    monkeypatch.setattr("os.fork", recording_fork)
+    gzipped_db = tmp_path / "gzipped.sqlite3"
+    main([*gzipped, "-o", str(gzipped_db), "--workers", "2"])
+
+    assert gzipped_db.read_bytes() == plain_db.read_bytes()
+    assert len(readers) == 3
+    assert not open_at_fork
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="scripts must guard their entry point unless workers are forked",
+)
+def test_workers_run_from_a_script_without_a_main_guard(tmp_path: Path) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    output = tmp_path / "out.sqlite3"
+    script = tmp_path / "convert.py"
+    script.write_text(
+        "from switrs_to_sqlite.main import convert_files\n"
+        f"convert_files({collisions!r}, {parties!r}, {victims!r}, "
+        f"{str(output)!r}, workers=2)\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, check=False
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert output.exists()
+
+
+def test_unreadable_archive_exits_with_error(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    archive_path = tmp_path / "collisions.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.write(inputs[0], "CollisionRecords.txt")
+        archive.write(inputs[1], "PartyRecords.txt")
+
+    with pytest.raises(SystemExit):
+        main([str(archive_path), *inputs[1:], "-o", str(tmp_path / "out.sqlite3")])
+    assert "exactly one file" in capsys.readouterr().err
+
+
+def test_convert_files_mmap_needs_workers(tmp_path: Path) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    output = str(tmp_path / "out.sqlite3")
+    with pytest.raises(ValueError, match="worker"):
+        convert_files(collisions, parties, victims, output, mmap=True)
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        ({"workers": 0}, "workers must be at least 1"),
+        ({"append": True, "resume": True}, "cannot be combined"),
+        ({"engine": "vector"}, "engine must be one of"),
+        ({"row_group_size": 0}, "row_group_size must be at least 1"),
+        ({"batch_size": 0}, "batch_size must be at least 1"),
+        ({"profile_sample_every": 0}, "profile_sample_every must be at least 1"),
+        ({"metrics_format": "csv"}, "metrics_format must be one of"),
+        ({"metrics_format": "prometheus"}, "metrics_file is needed"),
+    ],
+)
+def test_convert_files_rejects_invalid_arguments(
+    tmp_path: Path, options: dict[str, Any], message: str
+) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    output = tmp_path / "out.sqlite3"
+    with pytest.raises(ValueError, match=message):
+        convert_files(collisions, parties, victims, str(output), **options)
+    assert not output.exists()
+
+
+def test_convert_files_needs_every_input(tmp_path: Path) -> None:
+    collisions, parties, _ = _write_inputs(tmp_path)
+    missing = str(tmp_path / "missing.txt")
+    with pytest.raises(FileNotFoundError, match="Input file not found"):
+        convert_files(collisions, parties, missing, str(tmp_path / "out.sqlite3"))
+
+
+class _RecordingWriter:
+    """Keeps the rows written to it, in place of the writer of a real sink."""
+
+    def __init__(self, row_parser: CSVParser) -> None:
+        self.table = row_parser.table_name
+        self.rows: list[Sequence[Any]] = []
+        self.closed = False
+        self.duplicates = 0
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        self.rows.extend(rows)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _RecordingSink:
+    """Opens a _RecordingWriter for each table."""
+
+    def __init__(self) -> None:
+        self.writers: list[_RecordingWriter] = []
+
+    def open_table(self, row_parser: CSVParser) -> _RecordingWriter:
+        self.writers.append(_RecordingWriter(row_parser))
+        return self.writers[-1]
+
+    def finish(self, plan: Sequence[IndexSpec]) -> dict[str, float]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        _LoadOptions(),
+        _LoadOptions(workers=2, engine="columnar"),
+        _LoadOptions(sample_every=2, cache_stats=True),
+    ],
+    ids=["serial", "workers", "profiled"],
+)
+def test_write_tables_passes_every_parsed_row(
+    tmp_path: Path, options: _LoadOptions
+) -> None:
+    """Every sink gets the rows SQLite stores, in input order."""
+    collisions, parties, victims = _write_inputs(tmp_path)
+    Path(victims).write_text("")
+    db_path = tmp_path / "out.sqlite3"
+    convert_files(collisions, parties, victims, str(db_path))
+    sinks = [_RecordingSink(), _RecordingSink()]
+
+    profiles = _write_tables(
+        (
+            (make_collision_parser, collisions),
+            (make_party_parser, parties),
+            (make_victim_parser, victims),
+        ),
+        options,
+        sinks,
+    )
+
+    writers = sinks[0].writers
+    assert [writer.table for writer in writers] == ["collisions", "parties", "victims"]
+    # Both sinks are fed from the one pass
+    assert [writer.rows for writer in sinks[1].writers] == [
+        writer.rows for writer in writers
+    ]
+    assert all(writer.closed for writer in writers)
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        assert [tuple(row) for row in writers[0].rows] == con.execute(
+            "SELECT * FROM collisions ORDER BY rowid"
+        ).fetchall()
+        # SQLite numbers the parties, which are written without an id
+        assert [(None, *row[1:]) for row in writers[1].rows] == [
+            (None, *row[1:]) for row in con.execute("SELECT * FROM parties ORDER BY id")
+        ]
+    assert writers[2].rows == []
+    if options.sample_every is None:
+        assert profiles == [None, None, None]
+    else:
+        assert [profile.rows for profile in profiles if profile is not None] == [
+            len(writers[0].rows),
+            len(writers[1].rows),
+            0,
+        ]
+
+
+def _cases(db_path: Path) -> dict[str, tuple[Any, list[Any], list[Any]]]:
+    """Return each case's collision row and its party and victim rows.
+
+    The id column of parties and victims is left out, as it depends on the
+    order in which rows were loaded. Parties and victims without a collision
+    are kept under a collision row of None.
+    """
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        cases: dict[str, tuple[Any, list[Any], list[Any]]] = {
+            row[0]: (row, [], [])
+            for row in con.execute("SELECT * FROM collisions ORDER BY case_id")
+        }
+        for position, table in ((1, "parties"), (2, "victims")):
+            for row in con.execute(f"SELECT * FROM {table} ORDER BY id"):
+                case = cases.setdefault(row[1], (None, [], []))
+                case[position].append(row[1:])
+    return cases
+
+
+def _synthetic_snapshot(directory: Path, collisions: int, seed: int) -> list[str]:
+    directory.mkdir()
+    files = generate_records(directory, collisions, seed=seed)
+    return [str(files.collision_file), str(files.party_file), str(files.victim_file)]
+
+
+def test_append_keeps_the_latest_version_of_each_case(tmp_path: Path) -> None:
+    """Appending matches picking each case from the snapshot processed last."""
+    old_inputs = _synthetic_snapshot(tmp_path / "old", 300, seed=1)
+    new_inputs = _synthetic_snapshot(tmp_path / "new", 500, seed=2)
+    old_db = tmp_path / "old.sqlite3"
+    new_db = tmp_path / "new.sqlite3"
+    appended_db = tmp_path / "appended.sqlite3"
+    main([*old_inputs, "-o", str(old_db)])
+    main([*new_inputs, "-o", str(new_db)])
+    main([*old_inputs, "-o", str(appended_db), "--no-index"])
+
+    main([*new_inputs, "-o", str(appended_db), "--append"])
+
+    old_cases, new_cases = _cases(old_db), _cases(new_db)
+    process_date = table_columns()["collisions"].index("process_date")
+    expected = {}
+    for case_id, new_case in new_cases.items():
+        old_case = old_cases.get(case_id)
+        new_date, old_date = (
+            case[0][process_date] if case is not None else None
+            for case in (new_case, old_case)
+        )
+        newer = new_date is not None and (old_date is None or new_date > old_date)
+        expected[case_id] = new_case if old_case is None or newer else old_case
+    # Cases 1 to 300 are in both snapshots, with random process dates
+    replaced = sum(expected[case_id] is new_cases[case_id] for case_id in old_cases)
+    assert 0 < replaced < len(old_cases)
+    assert _cases(appended_db) == expected
+
+    with contextlib.closing(sqlite3.connect(appended_db)) as con:
+        indexes = {
+            row[0]
+            for row in con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+        }
+        assert con.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert indexes == {"idx_parties_case_id", "idx_victims_case_id"}
+
+
+def test_append_twice_changes_nothing(tmp_path: Path) -> None:
+    inputs = _write_inputs(tmp_path)
+    db_path = tmp_path / "switrs.sqlite3"
+    main([*inputs, "-o", str(db_path)])
+    before = _cases(db_path)
+
+    main([*inputs, "-o", str(db_path), "--append", "--workers", "2"])
+
+    assert _cases(db_path) == before
+    assert not list(tmp_path.glob(".switrs.sqlite3.*"))
+
+
+@pytest.mark.parametrize(
+    ("existing", "message"),
+    [
+        (None, "nothing to append to"),
+        (b"not a database" * 100, "not a SQLite database"),
+        (b"", "no collisions table"),
+    ],
+)
+def test_append_needs_a_converted_database(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    existing: bytes | None,
+    message: str,
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    db_path = tmp_path / "switrs.sqlite3"
+    if existing is not None:
+        db_path.write_bytes(existing)
+
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(db_path), "--append"])
+    assert message in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    ("extra_args", "resume_args"),
+    [
+        ([], []),
+        (["--workers", "2"], ["--workers", "2"]),
+        ([], ["--parallel-tables"]),
+    ],
+)
+def test_resume_after_an_interrupted_conversion(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    extra_args: list[str],
+    resume_args: list[str],
+) -> None:
+    """A resumed conversion writes the same database as an uninterrupted one."""
+    inputs = _write_inputs(tmp_path)
+    expected_db = tmp_path / "expected.sqlite3"
+    db_path = tmp_path / "switrs.sqlite3"
+    main([*inputs, "-o", str(expected_db)])
+
+    # Fail while committing the third batch of parties
+    def interrupted(
+        con: sqlite3.Connection, table: str, rows: int, offset: int
+    ) -> None:
+        if table == "parties" and rows > 10:
+            raise KeyboardInterrupt
+        record_progress(con, table, rows, offset)
+
+    monkeypatch.setattr("switrs_to_sqlite.main.record_progress", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        main([*inputs, "-o", str(db_path), "--batch-size", "5", *extra_args])
+    monkeypatch.undo()
+
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        checkpoints = read_checkpoints(con)
+    assert checkpoints is not None
+    assert set(checkpoints) == {"collisions", "parties"}
+    assert checkpoints["collisions"].done
+    assert not checkpoints["parties"].done
+    assert checkpoints["parties"].rows == 10
+    assert checkpoints["parties"].source == InputIdentity.of(inputs[1])
+
+    # Without a journal, a crash can leave rows of the failed batch behind
+    with contextlib.closing(sqlite3.connect(db_path)) as con, con:
+        con.execute("INSERT INTO parties (case_id) VALUES ('uncommitted')")
+
+    main([*inputs, "-o", str(db_path), "--batch-size", "5", "--resume", *resume_args])
+
+    with (
+        contextlib.closing(sqlite3.connect(expected_db)) as expected,
+        contextlib.closing(sqlite3.connect(db_path)) as resumed,
+    ):
+        assert list(resumed.iterdump()) == list(expected.iterdump())
+
+
+def test_resume_starts_a_new_conversion(tmp_path: Path) -> None:
+    inputs = _write_inputs(tmp_path)
+    expected_db = tmp_path / "expected.sqlite3"
+    db_path = tmp_path / "switrs.sqlite3"
+    main([*inputs, "-o", str(expected_db)])
+
+    main([*inputs, "-o", str(db_path), "--resume"])
+
+    assert db_path.read_bytes() == expected_db.read_bytes()
+
+
+def test_resume_needs_the_same_input_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    db_path = tmp_path / "switrs.sqlite3"
+    monkeypatch.setattr(
+        "switrs_to_sqlite.main.build_indexes", Mock(side_effect=KeyboardInterrupt)
+    )
+    with pytest.raises(KeyboardInterrupt):
+        main([*inputs, "-o", str(db_path)])
+    monkeypatch.undo()
+
+    with Path(inputs[2]).open("a") as f:
+        f.write("\n")
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(db_path), "--resume"])
+    assert "is not the file victims was loaded from" in capsys.readouterr().err
+
+
+def test_resume_a_finished_conversion(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    db_path = tmp_path / "switrs.sqlite3"
+    main([*inputs, "-o", str(db_path)])
+    finished = db_path.read_bytes()
+
+    # Resuming a finished conversion does nothing, and succeeds
+    main([*inputs, "-o", str(db_path), "--resume"])
+    assert "is already complete" in capsys.readouterr().err
+    assert db_path.read_bytes() == finished
+
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(db_path), "--resume", "--append"])
+
+    db_path.unlink()
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        con.execute("CREATE TABLE other (x)")
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(db_path), "--resume"])
+    assert "has no collisions table" in capsys.readouterr().err
+
+    db_path.write_bytes(b"not a database" * 100)
+    with pytest.raises(SystemExit):
+        main([*inputs, "-o", str(db_path), "--resume"])
+    assert "not a SQLite database" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_build_elsewhere_then_write_out(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, in_memory: bool
+) -> None:
+    """A database built in memory or a build directory matches one built in place."""
+    inputs = _write_inputs(tmp_path)
+    expected_db = tmp_path / "expected.sqlite3"
+    db_path = tmp_path / "switrs.sqlite3"
+    build_dir = tmp_path / "tmpfs"
+    build_dir.mkdir()
+    main([*inputs, "-o", str(expected_db)])
+    # The shards of a database built in RAM go to shared memory
+    monkeypatch.setattr("switrs_to_sqlite.main._SHARED_MEMORY_DIR", build_dir)
+    shard_dirs = []
+    load_from_shards = main_module._load_tables_from_shards
+
+    def spy(con: Any, pairs: Any, output_path: Path, options: Any) -> Any:
+        shard_dirs.append(output_path.parent)
+        return load_from_shards(con, pairs, output_path, options)
+
+    monkeypatch.setattr(main_module, "_load_tables_from_shards", spy)
+
+    build_args = ["--in-memory"] if in_memory else ["--build-dir", str(build_dir)]
+    main([*inputs, "-o", str(db_path), "--parallel-tables", *build_args])
+
+    # The shards were written where the database was built
+    assert len(shard_dirs) == 1
+    assert shard_dirs[0].parent == build_dir
+    assert not list(build_dir.iterdir())
+
+    with (
+        contextlib.closing(sqlite3.connect(expected_db)) as expected,
+        contextlib.closing(sqlite3.connect(db_path)) as built,
+    ):
+        assert list(built.iterdump()) == list(expected.iterdump())
+        page_size_sql = "PRAGMA page_size"
+        assert (
+            built.execute(page_size_sql).fetchone()
+            == expected.execute(page_size_sql).fetchone()
+        )
+    # The build directory and the partial copy are cleaned up
+    assert not list(build_dir.iterdir())
+    assert not list(tmp_path.glob(".*"))
+
+
+def test_build_in_memory_falls_back_when_short(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    expected_db = tmp_path / "expected.sqlite3"
+    db_path = tmp_path / "switrs.sqlite3"
+    main([*inputs, "-o", str(expected_db)])
+    monkeypatch.setattr("switrs_to_sqlite.main.available_memory", lambda: 1000)
+    capsys.readouterr()
+
+    main([*inputs, "-o", str(db_path), "--in-memory"])
+
+    err = capsys.readouterr().err
+    assert "building it in place instead" in err
+    assert "Writing the database" not in err
+    assert db_path.read_bytes() == expected_db.read_bytes()
+
+
+def test_build_in_memory_needs_a_new_database(tmp_path: Path) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    output = str(tmp_path / "out.sqlite3")
+    with pytest.raises(ValueError, match="build_in"):
+        convert_files(
+            collisions, parties, victims, output, build_in=":memory:", resume=True
+        )
+    with pytest.raises(FileNotFoundError, match="Build directory"):
+        convert_files(
+            collisions, parties, victims, output, build_in=str(tmp_path / "missing")
+        )
+    with pytest.raises(SystemExit):
+        main([collisions, parties, victims, "-o", output, "--in-memory", "--append"])
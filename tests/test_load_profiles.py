@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import contextlib
+import sqlite3
+from pathlib import Path
+
+import pytest
+from test_integration import _write_inputs
+
+from switrs_to_sqlite.load_profiles import LOAD_PROFILES
+from switrs_to_sqlite.main import convert_files, main
+
+
+def _table_rows(db_path: Path) -> dict[str, list[tuple[object, ...]]]:
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        return {
+            table: con.execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+            for table in ("collisions", "parties", "victims")
+        }
+
+
+def test_pragmas_set_page_size_before_journal_mode() -> None:
+    for profile in LOAD_PROFILES.values():
+        pragmas = profile.pragmas()
+        assert pragmas[0] == f"PRAGMA page_size = {profile.page_size}"
+        assert pragmas[1].startswith("PRAGMA journal_mode")
+
+
+@pytest.mark.parametrize("profile_name", sorted(LOAD_PROFILES))
+def test_every_profile_loads_the_same_rows(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], profile_name: str
+) -> None:
+    inputs = _write_inputs(tmp_path)
+    reference_db = tmp_path / "reference.sqlite3"
+    profile_db = tmp_path / "profile.sqlite3"
+    main([*inputs, "-o", str(reference_db)])
+    capsys.readouterr()
+
+    # A tiny batch size spreads each table over several transactions
+    main(
+        [
+            *inputs,
+            "-o",
+            str(profile_db),
+            "--load-profile",
+            profile_name,
+            "--batch-size",
+            "7",
+        ]
+    )
+
+    err = capsys.readouterr().err
+    assert f"Load profile {profile_name}: " in err
+    assert "batch_size=7\n" in err
+    assert "rows/s" in err
+    assert _table_rows(profile_db) == _table_rows(reference_db)
+
+    with contextlib.closing(sqlite3.connect(profile_db)) as con:
+        page_size = con.execute("PRAGMA page_size").fetchone()[0]
+    assert page_size == LOAD_PROFILES[profile_name].page_size
+
+
+def test_invalid_profile_and_batch_size(tmp_path: Path) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    output = str(tmp_path / "out.sqlite3")
+    with pytest.raises(ValueError, match="load_profile"):
+        convert_files(collisions, parties, victims, output, load_profile="turbo")
+    with pytest.raises(ValueError, match="batch_size"):
+        convert_files(collisions, parties, victims, output, batch_size=0)
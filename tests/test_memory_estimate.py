@@ -0,0 +1,51 @@
+"""Tests for estimating the size of the database before an in-memory build."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from switrs_to_sqlite import memory_estimate
+from switrs_to_sqlite.memory_estimate import (
+    COMPRESSION_RATIO,
+    DATABASE_BYTES_PER_INPUT_BYTE,
+    available_memory,
+    available_space,
+    estimate_database_bytes,
+)
+
+
+def test_estimate_scales_the_input_sizes(tmp_path: Path) -> None:
+    plain = tmp_path / "CollisionRecords.txt"
+    plain.write_bytes(b"CASE_ID\n" * 1000)
+    compressed = tmp_path / "PartyRecords.txt.gz"
+    compressed.write_bytes(gzip.compress(b"CASE_ID\n" * 1000))
+
+    expected = (
+        plain.stat().st_size + compressed.stat().st_size * COMPRESSION_RATIO
+    ) * DATABASE_BYTES_PER_INPUT_BYTE
+    assert estimate_database_bytes([str(plain), str(compressed)]) == int(expected)
+
+
+def test_available_memory_reads_meminfo(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text(
+        "MemTotal:        8000000 kB\nMemFree:          100000 kB\n"
+        "MemAvailable:     2000000 kB\n"
+    )
+    monkeypatch.setattr(memory_estimate, "_MEMINFO", meminfo)
+    assert available_memory() == 2_000_000 * 1024
+
+
+def test_available_memory_without_meminfo(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(memory_estimate, "_MEMINFO", tmp_path / "missing")
+    memory = available_memory()
+    assert memory is None or memory > 0
+
+
+def test_available_space(tmp_path: Path) -> None:
+    assert available_space(str(tmp_path)) > 0
@@ -0,0 +1,152 @@
+"""Tests for merging snapshot databases with switrs-merge."""
+
+import contextlib
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from switrs_to_sqlite.main import main as convert_main
+from switrs_to_sqlite.merge import SourceCounts, main, merge_databases
+from switrs_to_sqlite.synthetic import generate_records
+
+
+def _snapshot(tmp_path: Path, name: str, collisions: int, seed: int) -> str:
+    """Convert a synthetic release into a snapshot database."""
+    directory = tmp_path / name
+    directory.mkdir()
+    files = generate_records(directory, collisions, seed=seed)
+    db_path = tmp_path / f"{name}.sqlite3"
+    convert_main(
+        [
+            str(files.collision_file),
+            str(files.party_file),
+            str(files.victim_file),
+            "-o",
+            str(db_path),
+        ]
+    )
+    return str(db_path)
+
+
+def _rows_by_case(db_path: str, table: str) -> dict[str, list[tuple[object, ...]]]:
+    """Return the rows of a table grouped by case_id, without the id column."""
+    rows: dict[str, list[tuple[object, ...]]] = {}
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        if table == "collisions":
+            query = "SELECT * FROM collisions"
+        else:
+            query = f"SELECT * FROM {table} ORDER BY id"
+        for row in con.execute(query):
+            if table != "collisions":
+                row = row[1:]
+            rows.setdefault(row[0], []).append(row)
+    return rows
+
+
+def test_newest_snapshot_wins(tmp_path: Path) -> None:
+    # Cases 1-100 are in every snapshot, 101-150 only in the two newest,
+    # and 151-200 only in the newest
+    snapshots = [
+        _snapshot(tmp_path, "2016", 100, seed=1),
+        _snapshot(tmp_path, "2018", 150, seed=2),
+        _snapshot(tmp_path, "2020", 200, seed=3),
+    ]
+    output = str(tmp_path / "merged.sqlite3")
+
+    # Listing the 2016 snapshot last makes it the newest, so 2018 loses
+    # every case and 2020 keeps only those 2016 does not have
+    counts = merge_databases([snapshots[1], snapshots[2], snapshots[0]], output)
+
+    assert [count.collisions for count in counts] == [0, 100, 100]
+    newest_cases = set(_rows_by_case(snapshots[0], "collisions"))
+    for table in ("collisions", "parties", "victims"):
+        newest = _rows_by_case(snapshots[0], table)
+        others = {
+            case_id: rows
+            for case_id, rows in _rows_by_case(snapshots[2], table).items()
+            if case_id not in newest_cases
+        }
+        assert _rows_by_case(output, table) == {**others, **newest}
+        assert [getattr(count, table) for count in counts] == [
+            0,
+            sum(map(len, others.values())),
+            sum(map(len, newest.values())),
+        ]
+
+    with contextlib.closing(sqlite3.connect(output)) as con:
+        indexes = {
+            row[0]
+            for row in con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            )
+        }
+        assert con.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert indexes == {"idx_parties_case_id", "idx_victims_case_id"}
+
+
+def test_cli_reports_rows_per_snapshot(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    old = _snapshot(tmp_path, "old", 20, seed=1)
+    new = _snapshot(tmp_path, "new", 30, seed=2)
+    output = tmp_path / "merged.sqlite3"
+    capsys.readouterr()
+
+    main([old, new, "-o", str(output), "--no-index"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"Rows taken from each snapshot into '{output}':"
+    assert lines[2].split()[:2] == [old, "0"]
+    assert lines[3].split()[:2] == [new, "30"]
+    with contextlib.closing(sqlite3.connect(output)) as con:
+        assert con.execute("SELECT COUNT(*) FROM collisions").fetchone() == (30,)
+        assert not con.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'idx_%'"
+        ).fetchall()
+
+
+def test_many_snapshots(tmp_path: Path) -> None:
+    """More snapshots than SQLite can attach at once can be merged."""
+    snapshot = _snapshot(tmp_path, "snapshot", 10, seed=1)
+    output = str(tmp_path / "merged.sqlite3")
+
+    counts = merge_databases([snapshot] * 12, output, indexes=())
+
+    assert counts[:-1] == [SourceCounts(snapshot, 0, 0, 0)] * 11
+    assert counts[-1].collisions == 10
+
+
+@pytest.mark.parametrize(
+    ("contents", "message"),
+    [
+        (None, "not found"),
+        (b"not a database" * 100, "not a SQLite database"),
+        (b"", "no collisions table"),
+    ],
+    ids=["missing", "not a database", "empty"],
+)
+def test_bad_snapshot_exits_with_error(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    contents: bytes | None,
+    message: str,
+) -> None:
+    snapshot = tmp_path / "snapshot.sqlite3"
+    if contents is not None:
+        snapshot.write_bytes(contents)
+
+    with pytest.raises(SystemExit):
+        main([str(snapshot), "-o", str(tmp_path / "merged.sqlite3")])
+    assert message in capsys.readouterr().err
+
+
+def test_output_must_not_exist(tmp_path: Path) -> None:
+    snapshot = _snapshot(tmp_path, "snapshot", 5, seed=1)
+    with pytest.raises(FileExistsError):
+        merge_databases([snapshot], snapshot)
+
+
+def test_needs_a_snapshot(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="at least one"):
+        merge_databases([], str(tmp_path / "merged.sqlite3"))
@@ -1,10 +1,27 @@
 #!/usr/bin/env python3
 
+import bz2
+import csv
 import gzip
+import itertools
+import lzma
+import random
+import struct
+import sys
+import zipfile
+import zlib
 from pathlib import Path
 from typing import Any
 
-from switrs_to_sqlite.open_record import open_record_file
+import pytest
+
+from switrs_to_sqlite import open_record
+from switrs_to_sqlite.open_record import (
+    RecordFileError,
+    open_record_file,
+    read_record_range,
+    split_record_file,
+)
 
 
 def test_read_gzipped_file(tmpdir: Any) -> None:
@@ -28,3 +45,316 @@ def test_read_normal_file(tmpdir: Any) -> None:
     # Read back the file
     with open_record_file(str(file_path)) as f:
         assert f.read() == contents
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_raw_position_of_gzipped_file(tmpdir: Any, threaded: bool) -> None:
+    # Random lines compress poorly, so that the compressed file is larger
+    # than one block of the decompression thread
+    rng = random.Random(0)
+    contents = "".join(f"{rng.getrandbits(64):016x}\n" for _ in range(300_000))
+    file_path = Path(tmpdir) / "test.csv.gz"
+    with gzip.open(file_path, "wt") as f:
+        f.write(contents)
+
+    with open_record_file(str(file_path), threaded=threaded) as f:
+        assert f.raw_size == file_path.stat().st_size
+        assert f.raw_position() == 0
+        f.readline()
+        # Only part of the compressed file has been read
+        assert 0 < f.raw_position() < f.raw_size
+        f.read()
+        assert f.raw_position() == f.raw_size
+
+
+def test_read_multi_member_gzipped_file(tmpdir: Any) -> None:
+    # Concatenated gzip members, with zero padding between two of them
+    file_path = Path(tmpdir) / "test.csv.gz"
+    file_path.write_bytes(
+        gzip.compress(b"first\n")
+        + gzip.compress(b"second\n")
+        + b"\x00" * 8
+        + gzip.compress(b"third\n")
+    )
+
+    for threaded in (True, False):
+        with open_record_file(str(file_path), threaded=threaded) as f:
+            assert f.read() == "first\nsecond\nthird\n"
+
+
+def test_read_large_gzipped_file_in_order(tmpdir: Any) -> None:
+    # Larger than the queue between the threads holds, and highly compressed
+    # so that one block of input inflates to several blocks of output
+    contents = "".join(f"{i},SAME TEXT ON EVERY LINE\n" for i in range(1_000_000))
+    file_path = Path(tmpdir) / "test.csv.gz"
+    with gzip.open(file_path, "wt") as f:
+        f.write(contents)
+
+    with open_record_file(str(file_path)) as f:
+        assert f.read() == contents
+
+
+def test_close_gzipped_file_before_the_end(tmpdir: Any) -> None:
+    contents = "".join(f"{i}\n" for i in range(2_000_000))
+    file_path = Path(tmpdir) / "test.csv.gz"
+    with gzip.open(file_path, "wt") as f:
+        f.write(contents)
+
+    with open_record_file(str(file_path)) as f:
+        assert f.readline() == "0\n"
+    assert f.closed
+
+
+def test_truncated_gzipped_file(tmpdir: Any) -> None:
+    file_path = Path(tmpdir) / "test.csv.gz"
+    file_path.write_bytes(gzip.compress(b"Test contents\n" * 1000)[:-20])
+
+    with open_record_file(str(file_path)) as f, pytest.raises(EOFError):
+        f.read()
+
+
+def test_corrupt_gzipped_file(tmpdir: Any) -> None:
+    data = bytearray(gzip.compress(b"Test contents\n" * 1000))
+    data[20:30] = b"\xff" * 10
+    file_path = Path(tmpdir) / "test.csv.gz"
+    file_path.write_bytes(bytes(data))
+
+    error = open_record.zlib_backend().error
+    with open_record_file(str(file_path)) as f, pytest.raises(error):
+        f.read()
+
+
+def test_zlib_backend_falls_back_to_zlib(monkeypatch: pytest.MonkeyPatch) -> None:
+    open_record.zlib_backend.cache_clear()
+    try:
+        # A None entry in sys.modules makes the import fail
+        for name in ("zlib_ng", "zlib_ng.zlib_ng", "isal", "isal.isal_zlib"):
+            monkeypatch.setitem(sys.modules, name, None)
+        assert open_record.zlib_backend() is zlib
+    finally:
+        open_record.zlib_backend.cache_clear()
+
+
+CONTENTS = "".join(f'"{i:09d}",{i % 7},"TEXT"\n' for i in range(20_000))
+
+
+def _bgzf_member(data: bytes) -> bytes:
+    """Compress data as one BGZF member, which records its own length."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+    trailer = struct.pack("<II", zlib.crc32(data), len(data))
+    # Header, 6 bytes of extra field, deflated data, and trailer
+    length = 12 + 6 + len(deflated) + len(trailer)
+    header = b"\x1f\x8b\x08\x04" + b"\x00" * 4 + b"\x00\xff" + struct.pack("<H", 6)
+    extra = b"BC" + struct.pack("<HH", 2, length - 1)
+    return header + extra + deflated + trailer
+
+
+@pytest.mark.parametrize(
+    "compress",
+    [
+        pytest.param(lzma.compress, id="xz"),
+        pytest.param(bz2.compress, id="bz2"),
+        pytest.param(gzip.compress, id="gzip"),
+    ],
+)
+def test_read_compressed_file(tmpdir: Any, compress: Any) -> None:
+    file_path = Path(tmpdir) / "test.csv.compressed"
+    file_path.write_bytes(compress(CONTENTS.encode()))
+
+    with open_record_file(str(file_path)) as f:
+        assert f.read() == CONTENTS
+        assert f.raw_position() == f.raw_size
+
+
+def test_read_zip_file(tmpdir: Any) -> None:
+    file_path = Path(tmpdir) / "test.zip"
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("CollisionRecords.txt", CONTENTS)
+
+    with open_record_file(str(file_path)) as f:
+        assert f.read() == CONTENTS
+
+
+def test_zip_file_with_several_members(tmpdir: Any) -> None:
+    file_path = Path(tmpdir) / "test.zip"
+    with zipfile.ZipFile(file_path, "w") as archive:
+        archive.writestr("CollisionRecords.txt", CONTENTS)
+        archive.writestr("PartyRecords.txt", CONTENTS)
+
+    with pytest.raises(RecordFileError, match="exactly one file"):
+        open_record_file(str(file_path))
+
+
+def test_read_bgzf_file_in_parallel(tmpdir: Any) -> None:
+    data = CONTENTS.encode()
+    members = [_bgzf_member(data[i : i + 50_000]) for i in range(0, len(data), 50_000)]
+    # bgzip ends its files with an empty member
+    members.append(_bgzf_member(b""))
+    file_path = Path(tmpdir) / "test.csv.gz"
+    file_path.write_bytes(b"".join(members))
+
+    with open_record_file(str(file_path)) as f:
+        assert isinstance(f.buffer.raw, open_record._ParallelFrameReader)  # type: ignore[attr-defined]
+        assert f.read() == CONTENTS
+        assert f.raw_position() == f.raw_size
+
+
+def test_gzip_without_member_lengths_is_read_sequentially(tmpdir: Any) -> None:
+    file_path = Path(tmpdir) / "test.csv.gz"
+    file_path.write_bytes(gzip.compress(b"first\n") + gzip.compress(b"second\n"))
+
+    with file_path.open("rb") as raw:
+        assert open_record._bgzf_members(raw, file_path.stat().st_size) is None
+
+
+def test_read_zstd_file_in_parallel(tmpdir: Any) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor(write_checksum=True)
+    data = CONTENTS.encode()
+    frames = [
+        compressor.compress(data[i : i + 50_000]) for i in range(0, len(data), 50_000)
+    ]
+    # A skippable frame, as written by pzstd, between two data frames
+    skippable = struct.pack("<II", 0x184D2A50, 4) + b"skip"
+    file_path = Path(tmpdir) / "test.csv.zst"
+    file_path.write_bytes(frames[0] + skippable + b"".join(frames[1:]))
+
+    with file_path.open("rb") as raw:
+        found = open_record._zstd_frames(raw, file_path.stat().st_size)
+    assert found is not None and len(found) == len(frames)
+
+    for threaded in (True, False):
+        with open_record_file(str(file_path), threaded=threaded) as f:
+            assert f.read() == CONTENTS
+
+
+def test_read_single_frame_zstd_file(tmpdir: Any) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    file_path = Path(tmpdir) / "test.csv.zst"
+    file_path.write_bytes(zstandard.ZstdCompressor().compress(CONTENTS.encode()))
+
+    with open_record_file(str(file_path)) as f:
+        assert f.read() == CONTENTS
+
+
+@pytest.mark.parametrize("content_size", [True, False])
+def test_large_zstd_frames_are_read_as_a_stream(
+    tmpdir: Any, monkeypatch: pytest.MonkeyPatch, content_size: bool
+) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    monkeypatch.setattr(open_record, "_MAX_FRAME_CONTENT_SIZE", 60_000)
+    compressor = zstandard.ZstdCompressor(write_content_size=content_size)
+    data = CONTENTS.encode()
+    # Without a recorded size even small frames are read as a stream
+    chunk = 100_000 if content_size else 50_000
+    frames = [
+        compressor.compress(data[i : i + chunk]) for i in range(0, len(data), chunk)
+    ]
+    file_path = Path(tmpdir) / "test.csv.zst"
+    file_path.write_bytes(b"".join(frames))
+
+    with file_path.open("rb") as raw:
+        assert open_record._zstd_frames(raw, file_path.stat().st_size) is None
+    with open_record_file(str(file_path)) as f:
+        assert isinstance(f.buffer.raw, open_record._ThreadedStreamReader)  # type: ignore[attr-defined]
+        assert f.read() == CONTENTS
+
+
+def test_truncated_zstd_file(tmpdir: Any) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    data = compressor.compress(b"first\n" * 1000) + compressor.compress(b"second\n")
+    file_path = Path(tmpdir) / "test.csv.zst"
+    file_path.write_bytes(data[:-3])
+
+    with file_path.open("rb") as raw:
+        assert open_record._zstd_frames(raw, file_path.stat().st_size) is None
+    for threaded in (True, False):
+        with (
+            open_record_file(str(file_path), threaded=threaded) as f,
+            pytest.raises(EOFError),
+        ):
+            f.read()
+
+
+def test_zstd_file_without_zstd_module(
+    tmpdir: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(open_record, "zstd_backend", lambda: None)
+    file_path = Path(tmpdir) / "test.csv.zst"
+    file_path.write_bytes(b"\x28\xb5\x2f\xfd" + b"\x00" * 10)
+
+    with pytest.raises(RecordFileError, match="zstandard"):
+        open_record_file(str(file_path))
+
+
+@pytest.mark.parametrize(
+    ("errors", "expected"),
+    [("strict", None), ("replace", "caf�\n"), ("ignore", "caf\n")],
+)
+def test_decoding_errors_after_the_first_chunk(
+    tmpdir: Any, errors: str, expected: str | None
+) -> None:
+    # A long ASCII prefix, so that the bad byte is decoded in a later chunk
+    # than the first, and a good multibyte character split across chunks
+    prefix = "A" * (4 * open_record._TEXT_CHUNK_SIZE - 1) + "\n"
+    good = "é" * 10 + "\n"
+    file_path = Path(tmpdir) / "test.csv"
+    file_path.write_bytes(prefix.encode() + good.encode() + b"caf\xe9\n")
+
+    with open_record_file(str(file_path), errors=errors) as f:
+        if expected is None:
+            with pytest.raises(UnicodeDecodeError):
+                f.read()
+        else:
+            assert f.read() == prefix + good + expected
+
+
+def test_split_record_file_keeps_quoted_newlines_together(tmpdir: Any) -> None:
+    header = "CASE_ID,NOTE\r\n"
+    rows = [
+        f'"{i:04d}","line one\r\nline ""two""{chr(10) * (i % 3)}"\r\n'
+        for i in range(200)
+    ]
+    file_path = Path(tmpdir) / "test.csv"
+    file_path.write_bytes(b"\xef\xbb\xbf" + (header + "".join(rows)).encode())
+
+    ranges = split_record_file(str(file_path), 50)
+    assert ranges is not None
+    assert ranges[0] == (3, 3 + len(header))
+    # Ranges are contiguous and cover the whole file
+    assert all(a[1] == b[0] for a, b in itertools.pairwise(ranges))
+    assert ranges[-1][1] == file_path.stat().st_size
+
+    with open_record_file(str(file_path)) as f:
+        expected = list(csv.reader(f))
+    parsed = [
+        row
+        for start, end in ranges
+        for row in csv.reader(read_record_range(str(file_path), start, end))
+    ]
+    assert parsed == expected
+    # The rows were split over many ranges, yet none were cut
+    assert len(ranges) > 10
+
+
+def test_split_record_file_of_compressed_or_empty_file(tmpdir: Any) -> None:
+    gzipped = Path(tmpdir) / "test.csv.gz"
+    gzipped.write_bytes(gzip.compress(b"CASE_ID\n1\n"))
+    empty = Path(tmpdir) / "empty.csv"
+    empty.write_bytes(b"")
+
+    assert split_record_file(str(gzipped), 10) is None
+    assert split_record_file(str(empty), 10) is None
+    with pytest.raises(ValueError, match="range_size"):
+        split_record_file(str(empty), 0)
+
+
+def test_read_record_range_decoding_errors(tmpdir: Any) -> None:
+    file_path = Path(tmpdir) / "test.csv"
+    file_path.write_bytes(b"A\ncaf\xe9\n")
+
+    assert read_record_range(str(file_path), 2, 7, "replace").read() == "caf�\n"
+    with pytest.raises(UnicodeDecodeError):
+        read_record_range(str(file_path), 2, 7)
@@ -0,0 +1,190 @@
+"""Tests for writing the converted tables to Parquet."""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from conftest import SQLiteRows
+
+from switrs_to_sqlite.arrow_tables import DICTIONARY, arrow_backend, column_types
+from switrs_to_sqlite.main import convert_files, main
+from switrs_to_sqlite.parquet_output import YearGrouper
+from switrs_to_sqlite.parsers import (
+    make_collision_parser,
+    make_party_parser,
+    make_victim_parser,
+)
+from switrs_to_sqlite.synthetic import generate_records
+
+TABLES = ("collisions", "parties", "victims")
+
+
+def test_column_types_follow_the_sql_types() -> None:
+    types = dict(column_types(make_collision_parser()))
+
+    assert types["case_id"] == "string"
+    assert types["jurisdiction"] == "int64"
+    assert types["latitude"] == "double"
+    assert types["weather_1"] == DICTIONARY
+    assert types["tow_away"] == "bool"
+    party_types = column_types(make_party_parser())
+    assert party_types[0] == ("id", "int64")
+    assert dict(party_types)["cellphone_in_use"] == "bool"
+    assert dict(party_types)["hazardous_materials"] == "bool"
+
+
+def test_mapped_columns_are_dictionaries() -> None:
+    for parser_factory in (
+        make_collision_parser,
+        make_party_parser,
+        make_victim_parser,
+    ):
+        row_parser = parser_factory()
+        types = dict(column_types(row_parser))
+        assert [
+            name for name, type_name in types.items() if type_name == DICTIONARY
+        ] == [col.name for col in row_parser.parsing_table if col.mapping is not None]
+        assert [name for name, _ in column_types(row_parser)] == [
+            column[0] for column in row_parser.columns
+        ]
+
+
+def _collision(case_id: str | None, date: str | None) -> list[Any]:
+    names = [column[0] for column in make_collision_parser().columns]
+    row: list[Any] = [None] * len(names)
+    row[names.index("case_id")] = case_id
+    row[names.index("collision_date")] = date
+    return row
+
+
+def test_rows_are_grouped_by_collision_year() -> None:
+    case_years: dict[str, int | None] = {}
+    collisions = YearGrouper(make_collision_parser(), case_years)
+    parties = YearGrouper(make_party_parser(), case_years)
+
+    groups = collisions.group(
+        [
+            _collision("1", "2016-03-01"),
+            _collision("2", "2015-12-31"),
+            _collision("1", "2001-01-01"),
+            _collision("3", "2016-07-04"),
+            _collision("4", None),
+        ]
+    )
+
+    assert groups == {2016: [0, 3], 2015: [1], None: [4]}
+    assert collisions.duplicates == 1
+    assert case_years == {"1": 2016, "2": 2015, "3": 2016, "4": None}
+    # Parties follow their case, and a case without a collision is unknown
+    party_rows = [[None, case_id] for case_id in ("2", "1", "5", "3")]
+    assert parties.group(party_rows) == {2015: [0], 2016: [1, 3], None: [2]}
+    assert parties.duplicates == 0
+
+
+@pytest.mark.parametrize(
+    "option", ["append", "resume", "parallel_tables", "defer_unique"]
+)
+def test_sqlite_only_options_are_rejected(tmp_path: Path, option: str) -> None:
+    options: dict[str, Any] = {option: True}
+    with pytest.raises(ValueError, match=f"{option} only applies to a SQLite output"):
+        convert_files(
+            "c.txt",
+            "p.txt",
+            "v.txt",
+            str(tmp_path / "out"),
+            output_format="parquet",
+            **options,
+        )
+
+
+def test_unknown_format_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="output_format"):
+        convert_files(
+            "c.txt", "p.txt", "v.txt", str(tmp_path / "out"), output_format="orc"
+        )
+
+
+@pytest.mark.skipif(arrow_backend() is not None, reason="pyarrow is installed")
+def test_parquet_needs_pyarrow(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(SystemExit):
+        main(["c.txt", "p.txt", "v.txt", "-o", str(tmp_path), "--format", "parquet"])
+    assert "Parquet output needs the pyarrow package" in capsys.readouterr().err
+
+
+def test_parquet_matches_sqlite(tmp_path: Path, sqlite_rows: SQLiteRows) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    files = generate_records(tmp_path, 300, seed=4)
+    inputs = [str(files.collision_file), str(files.party_file), str(files.victim_file)]
+    db_path = tmp_path / "switrs.sqlite3"
+    parquet_dir = tmp_path / "parquet"
+    main([*inputs, "-o", str(db_path)])
+
+    convert_files(
+        str(files.collision_file),
+        str(files.party_file),
+        str(files.victim_file),
+        str(parquet_dir),
+        output_format="parquet",
+        row_group_size=7,
+    )
+
+    assert sorted(path.name for path in parquet_dir.iterdir()) == [
+        f"{table}.parquet" for table in TABLES
+    ]
+    # Rows without a collision date come last
+    case_years: dict[str, str] = {}
+    for table in TABLES:
+        parquet_file = pq.ParquetFile(parquet_dir / f"{table}.parquet")
+        data = parquet_file.read()
+        rows = [tuple(row.values()) for row in data.to_pylist()]
+        # SQLite stores booleans as integers, and True == 1
+        assert sorted(rows, key=lambda row: str(row[0])) == sorted(
+            sqlite_rows(db_path, table), key=lambda row: str(row[0])
+        )
+        assert str(data.schema.field("case_id").type) == "string"
+
+        # Each row group holds at most 7 rows of a single year, in order
+        years = []
+        for i in range(parquet_file.num_row_groups):
+            group = parquet_file.read_row_group(i, columns=["case_id"]).to_pylist()
+            if table == "collisions":
+                dates = parquet_file.read_row_group(i, columns=["collision_date"])
+                for row, date in zip(group, dates.to_pylist(), strict=True):
+                    date = date["collision_date"]
+                    case_years[row["case_id"]] = date[:4] if date else "unknown"
+                group_years = {case_years[row["case_id"]] for row in group}
+            else:
+                group_years = {case_years[row["case_id"]] for row in group}
+            assert len(group) <= 7
+            assert len(group_years) == 1
+            years.append(group_years.pop())
+        assert years == sorted(years)
+        assert len(set(years)) > 1
+
+
+def test_parquet_dictionary_encodes_mapped_columns(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    files = generate_records(tmp_path, 20, seed=1)
+    output = tmp_path / "parquet"
+
+    main(
+        [
+            str(files.collision_file),
+            str(files.party_file),
+            str(files.victim_file),
+            "--format",
+            "parquet",
+            "-o",
+            str(output),
+        ]
+    )
+
+    schema = pq.read_schema(output / "victims.parquet")
+    assert str(schema.field("victim_role").type).startswith("dictionary<values=string")
+    assert str(schema.field("victim_age").type) == "int64"
+    metadata = pq.ParquetFile(output / "victims.parquet").metadata
+    role = schema.get_field_index("victim_role")
+    assert "RLE_DICTIONARY" in metadata.row_group(0).column(role).encodings
+    assert not list(output.glob(".spill.*"))
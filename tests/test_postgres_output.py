@@ -0,0 +1,139 @@
+"""Tests for writing the converted tables as PostgreSQL COPY files."""
+
+import re
+from pathlib import Path
+
+import pytest
+from conftest import SQLiteRows
+
+from switrs_to_sqlite.index_plan import DEFAULT_INDEX_PLAN
+from switrs_to_sqlite.main import convert_files, main
+from switrs_to_sqlite.parsers import make_collision_parser, make_party_parser
+from switrs_to_sqlite.postgres_output import POSTGRES_TYPES, copy_escape
+
+TABLES = ("collisions", "parties", "victims")
+
+# The backslash sequences of COPY's text format that copy_escape() writes
+_UNESCAPES = {"\\\\": "\\", "\\t": "\t", "\\n": "\n", "\\r": "\r"}
+
+
+def _copy_values(line: str) -> list[str | None]:
+    """Split a line of COPY's text format into its values, as PostgreSQL does."""
+    assert line.endswith("\n")
+    values: list[str | None] = []
+    for field in line[:-1].split("\t"):
+        if field == "\\N":
+            values.append(None)
+            continue
+        # Any other backslash would start a sequence PostgreSQL reads
+        # differently, such as an octal escape
+        assert re.fullmatch(r"(?:[^\\]|\\[\\tnr])*", field), field
+        values.append(re.sub(r"\\.", lambda m: _UNESCAPES[m.group()], field))
+    return values
+
+
+def test_copy_escape() -> None:
+    assert copy_escape("plain text") == "plain text"
+    assert copy_escape("a\\b\tc\nd\re") == "a\\\\b\\tc\\nd\\re"
+    assert _copy_values(copy_escape("a\\b\tc\nd\re") + "\t\\N\n") == [
+        "a\\b\tc\nd\re",
+        None,
+    ]
+
+
+def test_copy_files_match_sqlite(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    synthetic_inputs: list[str],
+    sqlite_rows: SQLiteRows,
+) -> None:
+    inputs = synthetic_inputs
+    db_path = tmp_path / "switrs.sqlite3"
+    output = tmp_path / "postgres"
+    main([*inputs, "-o", str(db_path)])
+    capsys.readouterr()
+
+    main([*inputs, "--format", "postgres", "-o", str(output), "--batch-size", "50"])
+
+    assert "2 duplicate case_id rows skipped in collisions" in capsys.readouterr().err
+    assert sorted(path.name for path in output.iterdir()) == [
+        "collisions.copy",
+        "collisions.sql",
+        "indexes.sql",
+        "parties.copy",
+        "parties.sql",
+        "victims.copy",
+        "victims.sql",
+    ]
+    for table in TABLES:
+        with (output / f"{table}.copy").open(encoding="utf-8", newline="") as f:
+            rows = [_copy_values(line) for line in f]
+        # Flags are 0 and 1, as SQLite stores them
+        expected = sqlite_rows(db_path, table)
+        assert rows == [
+            [None if value is None else str(value) for value in row] for row in expected
+        ]
+        if table == "collisions":
+            assert "A\\B\tC" in expected[0]
+
+
+def test_ddl_comes_from_the_parser_columns(
+    tmp_path: Path, synthetic_inputs: list[str]
+) -> None:
+    collisions, parties, victims = synthetic_inputs
+    output = tmp_path / "postgres"
+
+    convert_files(collisions, parties, victims, str(output), output_format="postgres")
+
+    ddl = (output / "collisions.sql").read_text()
+    assert ddl == (
+        make_collision_parser().create_table_statement(types=POSTGRES_TYPES) + ";\n"
+    )
+    assert ddl.startswith("CREATE TABLE collisions (case_id TEXT PRIMARY KEY, ")
+    assert "latitude DOUBLE PRECISION" in ddl
+    assert "killed_victims BIGINT" in ddl
+    assert (output / "parties.sql").read_text() == (
+        make_party_parser().create_table_statement(types=POSTGRES_TYPES) + ";\n"
+    )
+    assert (output / "indexes.sql").read_text().splitlines() == [
+        f"{spec.create_statement()};" for spec in DEFAULT_INDEX_PLAN
+    ]
+
+
+def test_parallel_tables_write_the_same_files(
+    tmp_path: Path, synthetic_inputs: list[str]
+) -> None:
+    inputs = synthetic_inputs
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    metrics_file = tmp_path / "metrics.jsonl"
+    main([*inputs, "--format", "postgres", "-o", str(serial)])
+
+    main(
+        [
+            *inputs,
+            *("--format", "postgres", "--format", "csv"),
+            *("-o", str(parallel), "-o", str(tmp_path / "csv")),
+            "--parallel-tables",
+            *("--metrics", "jsonl", "--metrics-file", str(metrics_file)),
+        ]
+    )
+
+    for path in serial.iterdir():
+        assert (parallel / path.name).read_bytes() == path.read_bytes()
+    assert (tmp_path / "csv" / "victims.csv").exists()
+    metrics = metrics_file.read_text()
+    for table in TABLES:
+        assert f'"table": "{table}"' in metrics
+
+
+def test_parallel_tables_need_per_table_files(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="parallel_tables only applies"):
+        convert_files(
+            "c.txt",
+            "p.txt",
+            "v.txt",
+            str(tmp_path / "out.sqlite3"),
+            extra_outputs=[("postgres", str(tmp_path / "postgres"))],
+            parallel_tables=True,
+        )
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import json
+from pathlib import Path
+
+import pytest
+from test_integration import _write_inputs
+
+from switrs_to_sqlite.main import convert_files, main
+from switrs_to_sqlite.profiling import (
+    STAGES,
+    ColumnTiming,
+    ConversionProfile,
+    TableProfile,
+)
+
+
+def test_profile_report_and_json(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    profile_file = tmp_path / "profile.json"
+    main(
+        [
+            *_write_inputs(tmp_path),
+            "-o",
+            str(tmp_path / "out.sqlite3"),
+            "--profile",
+            str(profile_file),
+            "--profile-sample",
+            "2",
+        ]
+    )
+
+    err = capsys.readouterr().err
+    assert "slowest stages first:" in err
+    assert "collisions parse" in err
+    assert "index idx_parties_case_id" in err
+    assert "Slowest column converters (estimated from one row in every 2):" in err
+
+    data = json.loads(profile_file.read_text())
+    assert data["sample_every"] == 2
+    assert set(data["indexes"]) == {"idx_parties_case_id", "idx_victims_case_id"}
+    assert [table["table"] for table in data["tables"]] == [
+        "collisions",
+        "parties",
+        "victims",
+    ]
+    for table in data["tables"]:
+        assert set(table["stages"]) == set(STAGES)
+        assert table["stages"]["parse"] > 0
+        assert table["stages"]["insert"] > 0
+        assert table["columns"]["case_id"]["samples"] == table["rows"] // 2
+    assert data["total_seconds"] > 0
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"parallel_tables": True},
+        {"workers": 2, "engine": "columnar"},
+        {"defer_unique": True},
+    ],
+)
+def test_profile_other_load_paths(tmp_path: Path, options: dict[str, bool]) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    profile_file = tmp_path / "profile.json"
+    convert_files(
+        collisions,
+        parties,
+        victims,
+        str(tmp_path / "out.sqlite3"),
+        profile_file=str(profile_file),
+        profile_sample_every=1,
+        **options,  # type: ignore[arg-type]
+    )
+
+    data = json.loads(profile_file.read_text())
+    assert len(data["tables"]) == 3
+    assert all(table["rows"] > 0 for table in data["tables"])
+    if options.get("defer_unique"):
+        assert data["tables"][0]["stages"]["dedupe"] > 0
+
+
+def test_profile_sample_must_be_positive(tmp_path: Path) -> None:
+    collisions, parties, victims = _write_inputs(tmp_path)
+    with pytest.raises(ValueError, match="profile_sample_every"):
+        convert_files(
+            collisions,
+            parties,
+            victims,
+            str(tmp_path / "out.sqlite3"),
+            profile_file=str(tmp_path / "profile.json"),
+            profile_sample_every=0,
+        )
+
+
+def test_report_ranks_stages_and_columns() -> None:
+    fast = TableProfile("fast", sample_every=10, rows=100)
+    fast.stages["insert"] = 1.0
+    slow = TableProfile("slow", sample_every=10, rows=100)
+    slow.stages["parse"] = 3.0
+    slow.columns["cheap"] = ColumnTiming(samples=10, seconds=0.1)
+    slow.columns["costly"] = ColumnTiming(samples=10, seconds=0.5)
+    profile = ConversionProfile(
+        sample_every=10, tables=[fast, slow], indexes={"idx": 2.0}, total_seconds=6.0
+    )
+
+    lines = profile.report_lines()
+    assert lines[0] == "Profile (6.0s total), slowest stages first:"
+    assert [line.split()[:2] for line in lines[1:4]] == [
+        ["slow", "parse"],
+        ["index", "idx"],
+        ["fast", "insert"],
+    ]
+    assert "50.0%" in lines[1]
+    # Columns are ranked by their time per sample times the table's rows
+    assert lines[4].startswith("Slowest column converters")
+    assert lines[5].split() == ["slow.costly", "5.000s"]
+    assert lines[6].split() == ["slow.cheap", "1.000s"]
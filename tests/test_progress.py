@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+import gzip
+import json
+import math
+from pathlib import Path
+
+import pytest
+from test_integration import _write_inputs
+
+import switrs_to_sqlite.main as main_module
+from switrs_to_sqlite.main import main
+from switrs_to_sqlite.progress import (
+    JsonLinesWriter,
+    ProgressMeter,
+    ProgressSample,
+    PrometheusWriter,
+    open_metrics_writer,
+)
+
+
+def _sample(**changes: object) -> ProgressSample:
+    values: dict[str, object] = {
+        "table": "parties",
+        "rows": 1000,
+        "elapsed_seconds": 2.0,
+        "input_bytes": 250,
+        "input_total_bytes": 1000,
+        "done": False,
+        "timestamp": 1.0,
+    }
+    values.update(changes)
+    return ProgressSample(**values)  # type: ignore[arg-type]
+
+
+class _ListWriter:
+    def __init__(self) -> None:
+        self.samples: list[ProgressSample] = []
+
+    def emit(self, sample: ProgressSample) -> None:
+        self.samples.append(sample)
+
+    def close(self) -> None:
+        pass
+
+
+def test_sample_rates_and_eta() -> None:
+    sample = _sample()
+    assert sample.rows_per_second == 500
+    assert sample.input_bytes_per_second == 125
+    # 750 bytes left at 125 bytes/s
+    assert sample.eta_seconds == 6
+    assert _sample(input_bytes=0).eta_seconds is None
+    assert _sample(elapsed_seconds=0).rows_per_second == 0
+    assert _sample(done=True).eta_seconds == 0
+    assert _sample().to_dict()["eta_seconds"] == 6
+
+
+def test_meter_reports_every_interval(capsys: pytest.CaptureFixture[str]) -> None:
+    writer = _ListWriter()
+    meter = ProgressMeter("parties", lambda: 10, 100, interval=5, writer=writer)
+
+    # Chunks can step over several intervals at once
+    meter.count += 12
+    assert meter.count >= meter.next_report
+    meter.report()
+    assert meter.next_report == 15
+    meter.finish()
+
+    assert [(s.rows, s.input_bytes, s.done) for s in writer.samples] == [
+        (12, 10, False),
+        (12, 100, True),
+    ]
+    assert capsys.readouterr().err.startswith("  12 rows (")
+
+
+def test_json_lines_writer(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    out_file = tmp_path / "metrics.jsonl"
+    writer = JsonLinesWriter(str(out_file))
+    writer.emit(_sample())
+    writer.emit(_sample(rows=2000))
+    writer.close()
+    lines = [json.loads(line) for line in out_file.read_text().splitlines()]
+    assert [line["rows"] for line in lines] == [1000, 2000]
+
+    stdout_writer = JsonLinesWriter("-")
+    stdout_writer.emit(_sample())
+    stdout_writer.close()
+    assert json.loads(capsys.readouterr().out)["table"] == "parties"
+
+
+def test_prometheus_writer_keeps_latest_sample_per_table(tmp_path: Path) -> None:
+    out_file = tmp_path / "switrs.prom"
+    writer = PrometheusWriter(str(out_file))
+    writer.emit(_sample(table="collisions", done=True))
+    writer.emit(_sample(rows=1))
+    writer.emit(_sample(rows=2, input_bytes=0))
+    writer.close()
+
+    text = out_file.read_text()
+    assert 'switrs_to_sqlite_rows_total{table="collisions"} 1000' in text
+    assert 'switrs_to_sqlite_rows_total{table="parties"} 2' in text
+    assert 'switrs_to_sqlite_done{table="collisions"} 1' in text
+    eta = text.split('switrs_to_sqlite_eta_seconds{table="parties"} ')[1]
+    assert math.isnan(float(eta.split()[0]))
+    assert "# TYPE switrs_to_sqlite_rows_total counter" in text
+    assert list(tmp_path.iterdir()) == [out_file]
+
+
+def test_open_metrics_writer_errors() -> None:
+    with pytest.raises(ValueError, match="file"):
+        open_metrics_writer("prometheus", None)
+    with pytest.raises(ValueError, match="metrics format"):
+        open_metrics_writer("csv", None)
+
+
+def test_jsonl_metrics_track_gzipped_input(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    inputs = []
+    for name in _write_inputs(tmp_path):
+        gz_path = Path(name + ".gz")
+        gz_path.write_bytes(gzip.compress(Path(name).read_bytes()))
+        inputs.append(str(gz_path))
+    metrics_file = tmp_path / "metrics.jsonl"
+    monkeypatch.setattr(main_module, "_PROGRESS_INTERVAL", 3)
+
+    main(
+        [
+            *inputs,
+            "-o",
+            str(tmp_path / "out.sqlite3"),
+            "--metrics",
+            "jsonl",
+            "--metrics-file",
+            str(metrics_file),
+        ]
+    )
+
+    samples = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    done = {s["table"]: s for s in samples if s["done"]}
+    assert set(done) == {"collisions", "parties", "victims"}
+    for sample in samples:
+        # Positions are in the compressed file, so never past its size
+        assert 0 < sample["input_bytes"] <= sample["input_total_bytes"]
+    sizes = {Path(name).stat().st_size for name in inputs}
+    assert {s["input_total_bytes"] for s in done.values()} == sizes
+    assert any(not s["done"] for s in samples)
+
+
+def test_prometheus_metrics_with_parallel_tables(tmp_path: Path) -> None:
+    metrics_file = tmp_path / "switrs.prom"
+    main(
+        [
+            *_write_inputs(tmp_path),
+            "-o",
+            str(tmp_path / "out.sqlite3"),
+            "--parallel-tables",
+            "--metrics",
+            "prometheus",
+            "--metrics-file",
+            str(metrics_file),
+        ]
+    )
+
+    text = metrics_file.read_text()
+    for table in ("collisions", "parties", "victims"):
+        assert f'switrs_to_sqlite_done{{table="{table}"}} 1' in text
+
+
+def test_prometheus_metrics_need_a_file(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        main(
+            [
+                *_write_inputs(tmp_path),
+                "-o",
+                str(tmp_path / "out.sqlite3"),
+                "--metrics",
+                "prometheus",
+            ]
+        )
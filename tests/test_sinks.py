@@ -0,0 +1,187 @@
+"""Tests for writing several outputs from one pass over the record files."""
+
+import contextlib
+import csv
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+from conftest import SQLiteRows
+
+from switrs_to_sqlite.load_profiles import DEFAULT_LOAD_PROFILE, LOAD_PROFILES
+from switrs_to_sqlite.main import convert_files, main
+from switrs_to_sqlite.sinks import open_sink
+
+TABLES = ("collisions", "parties", "victims")
+
+
+def test_one_pass_writes_every_output(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    synthetic_inputs: list[str],
+    sqlite_rows: SQLiteRows,
+) -> None:
+    inputs = synthetic_inputs
+    expected_db = tmp_path / "expected.sqlite3"
+    main([*inputs, "-o", str(expected_db)])
+    capsys.readouterr()
+
+    first_db = tmp_path / "first.sqlite3"
+    second_db = tmp_path / "second.sqlite3"
+    csv_dir = tmp_path / "csv"
+    main(
+        [
+            *inputs,
+            "--format",
+            "sqlite",
+            "--format",
+            "csv",
+            "--format",
+            "sqlite",
+            "-o",
+            str(first_db),
+            "-o",
+            str(csv_dir),
+            "-o",
+            str(second_db),
+            "--batch-size",
+            "50",
+        ]
+    )
+
+    err = capsys.readouterr().err
+    assert err.count("Converting collisions...") == 1
+    assert err.count("Warning: 2 duplicate case_id rows skipped in collisions.") == 1
+    for table in TABLES:
+        expected = sqlite_rows(expected_db, table)
+        assert sqlite_rows(first_db, table) == expected
+        assert sqlite_rows(second_db, table) == expected
+        with (csv_dir / f"{table}.csv").open(newline="") as f:
+            header, *rows = list(csv.reader(f))
+        with contextlib.closing(sqlite3.connect(expected_db)) as con:
+            columns = [row[1] for row in con.execute(f"PRAGMA table_info({table})")]
+        assert header == columns
+        # NULL is an empty field, and flags are 0 and 1 as in SQLite
+        assert rows == [
+            ["" if value is None else str(value) for value in row] for row in expected
+        ]
+    with contextlib.closing(sqlite3.connect(first_db)) as con:
+        indexes = con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            "ORDER BY name"
+        ).fetchall()
+        assert indexes == [("idx_parties_case_id",), ("idx_victims_case_id",)]
+
+
+def test_csv_output_of_an_empty_file(
+    tmp_path: Path, synthetic_inputs: list[str]
+) -> None:
+    collisions, parties, victims = synthetic_inputs
+    Path(victims).write_text("")
+    csv_dir = tmp_path / "csv"
+
+    main([collisions, parties, victims, "--format", "csv", "-o", str(csv_dir)])
+
+    # The victims file has a header and no rows
+    with (csv_dir / "victims.csv").open(newline="") as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 1
+    assert rows[0][:2] == ["id", "case_id"]
+
+
+def test_outputs_need_paths_of_their_own(tmp_path: Path) -> None:
+    output = str(tmp_path / "out")
+    with pytest.raises(ValueError, match="path of its own"):
+        convert_files(
+            "c.txt",
+            "p.txt",
+            "v.txt",
+            output,
+            output_format="csv",
+            extra_outputs=[("sqlite", output)],
+        )
+
+
+@pytest.mark.parametrize("option", ["resume", "defer_unique"])
+def test_sqlite_only_options_need_a_single_output(tmp_path: Path, option: str) -> None:
+    options: dict[str, Any] = {option: True}
+    with pytest.raises(ValueError, match=f"{option} only applies"):
+        convert_files(
+            "c.txt",
+            "p.txt",
+            "v.txt",
+            str(tmp_path / "out.sqlite3"),
+            extra_outputs=[("csv", str(tmp_path / "csv"))],
+            **options,
+        )
+
+
+def test_unknown_extra_format_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="output_format"):
+        convert_files(
+            "c.txt",
+            "p.txt",
+            "v.txt",
+            str(tmp_path / "out.sqlite3"),
+            extra_outputs=[("orc", str(tmp_path / "orc"))],
+        )
+
+
+def test_open_sink_rejects_unknown_formats(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="output_format"):
+        open_sink("orc", str(tmp_path / "orc"), LOAD_PROFILES[DEFAULT_LOAD_PROFILE])
+    assert not list(tmp_path.iterdir())
+
+
+def test_extra_output_must_not_exist(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], synthetic_inputs: list[str]
+) -> None:
+    inputs = synthetic_inputs
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    db_path = tmp_path / "out.sqlite3"
+
+    with pytest.raises(SystemExit):
+        main(
+            [
+                *inputs,
+                *("--format", "sqlite", "--format", "csv"),
+                *("-o", str(db_path), "-o", str(csv_dir)),
+            ]
+        )
+
+    assert f"Output '{csv_dir}' already exists" in capsys.readouterr().err
+    assert not db_path.exists()
+
+
+def test_more_output_files_than_formats(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(SystemExit):
+        main(["c.txt", "p.txt", "v.txt", "-o", "a.sqlite3", "-o", "b.sqlite3"])
+    assert "given more often than --format" in capsys.readouterr().err
+
+
+def test_parquet_and_csv_from_one_pass(
+    tmp_path: Path, synthetic_inputs: list[str]
+) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    inputs = synthetic_inputs
+    csv_dir = tmp_path / "csv"
+    parquet_dir = tmp_path / "parquet"
+
+    collisions, parties, victims = inputs
+    convert_files(
+        collisions,
+        parties,
+        victims,
+        str(parquet_dir),
+        output_format="parquet",
+        extra_outputs=[("csv", str(csv_dir))],
+    )
+
+    for table in TABLES:
+        with (csv_dir / f"{table}.csv").open(newline="") as f:
+            csv_rows = sum(1 for _ in csv.reader(f)) - 1
+        assert pq.read_metadata(parquet_dir / f"{table}.parquet").num_rows == csv_rows
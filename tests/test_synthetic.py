@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import contextlib
+import csv
+import gzip
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from switrs_to_sqlite.main import convert_files
+from switrs_to_sqlite.open_record import open_record_file
+from switrs_to_sqlite.synthetic import generate_records
+
+
+def _read(path: Path) -> list[list[str]]:
+    with open_record_file(str(path)) as f:
+        return list(csv.reader(f))
+
+
+def test_generated_files_convert(tmp_path: Path) -> None:
+    files = generate_records(tmp_path, 500, seed=1)
+    db_path = tmp_path / "out.sqlite3"
+    convert_files(
+        str(files.collision_file),
+        str(files.party_file),
+        str(files.victim_file),
+        str(db_path),
+    )
+
+    with contextlib.closing(sqlite3.connect(db_path)) as con:
+        counts = [
+            con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("collisions", "parties", "victims")
+        ]
+        orphan_parties = con.execute(
+            "SELECT COUNT(*) FROM parties WHERE case_id NOT IN "
+            "(SELECT case_id FROM collisions)"
+        ).fetchone()[0]
+        orphan_victims = con.execute(
+            "SELECT COUNT(*) FROM victims v WHERE NOT EXISTS (SELECT 1 FROM "
+            "parties p WHERE p.case_id = v.case_id "
+            "AND p.party_number = v.party_number)"
+        ).fetchone()[0]
+        wrong_party_counts = con.execute(
+            "SELECT COUNT(*) FROM collisions c WHERE party_count != "
+            "(SELECT COUNT(*) FROM parties p WHERE p.case_id = c.case_id)"
+        ).fetchone()[0]
+        mapped = con.execute(
+            "SELECT COUNT(*) FROM parties WHERE party_sex IN ('male', 'female')"
+        ).fetchone()[0]
+        null_dates = con.execute(
+            "SELECT COUNT(*) FROM collisions WHERE collision_date IS NULL"
+        ).fetchone()[0]
+
+    assert counts == [files.collisions, files.parties, files.victims]
+    assert files.collisions == 500
+    assert files.parties > files.collisions
+    assert orphan_parties == 0
+    assert orphan_victims == 0
+    assert wrong_party_counts == 0
+    assert mapped > 0
+    assert 0 < null_dates < files.collisions // 10
+
+
+def test_same_seed_same_files(tmp_path: Path) -> None:
+    parties = {}
+    for name, seed in (("a", 3), ("b", 3), ("c", 4)):
+        (tmp_path / name).mkdir()
+        files = generate_records(tmp_path / name, 100, seed=seed)
+        parties[name] = _read(files.party_file)
+
+    assert parties["a"] == parties["b"]
+    assert parties["a"] != parties["c"]
+
+
+def test_compressed(tmp_path: Path) -> None:
+    files = generate_records(tmp_path, 50, compress=True)
+    assert files.collision_file.name == "CollisionRecords.txt.gz"
+    with gzip.open(files.victim_file, "rt") as f:
+        assert sum(1 for _ in f) == files.victims + 1
+    assert len(_read(files.collision_file)) == 51
+
+
+def test_negative_collisions_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        generate_records(tmp_path, -1)